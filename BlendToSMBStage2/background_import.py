@@ -0,0 +1,485 @@
+import bpy
+import bmesh
+import json
+import math
+import os
+
+import numpy as np
+
+import xml.etree.ElementTree as etree
+
+from mathutils import Euler, Vector
+from . import dimension_dict, collision_grid
+
+# Number of models created between progress updates
+IMPORT_BATCH_SIZE = 500
+
+# Name of the collection imported background previews are linked to
+IMPORT_COLLECTION_NAME = "Imported Background"
+
+# Name of the mesh object holding the point cloud preview of an imported background
+POINT_CLOUD_NAME = "[EXT_IMPORTED_CLOUD]"
+
+# Custom property holding the (model index, effect index) of an imported background object in its XML.
+# Effect index is -1 for models, and the index of the keyframe among all effect keyframes of the model for effects.
+# Unlike object names, this survives renames.
+IMPORT_ID_PROP = "bg_import_id"
+
+# Custom property holding the (x, y, z) dimensions in SMB coordinates that an imported model's preview was scaled by.
+# Export divides by these rather than by the current dimension table, which may have changed since the import.
+IMPORT_DIMENSIONS_PROP = "bg_import_dimensions"
+
+# Geometry nodes group that draws a cube per point cloud instance
+POINT_CLOUD_NODE_GROUP = "Blend2SMB Background Instances"
+
+# Converts an XML attribute list from SMB coordinates to Blender coordinates,
+# 'n' is whether or not to negate the Y axis
+def convert_from_smb_coords(v, n):
+    return Vector((float(v[0]), (-1+int(2*(not n)))*float(v[2]), float(v[1])))
+
+# Converts an XML attribute list from degrees to radians
+def convert_to_radians(v):
+    return Vector((math.radians(v[0]), math.radians(v[1]), math.radians(v[2])))
+
+# Yields (index, model element) for every background/foreground model of a background XML, one at a time.
+# Each model is freed once it has been handled, so memory use doesn't grow with the size of the file.
+def iter_bg_models(bg_path):
+    depth = 0
+    root = None
+    index = 0
+
+    for event, element in etree.iterparse(bg_path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+                if root.tag != 'superMonkeyBallBackground':
+                    raise ValueError("Imported background XML not an exported background XML")
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                yield index, element
+                index += 1
+                root.clear()
+
+# Returns whether a file is a background XML, only reading as far as its root element
+def is_background_xml(bg_path):
+    for event, element in etree.iterparse(bg_path, events=("start",)):
+        return element.tag == 'superMonkeyBallBackground'
+    return False
+
+# Returns the (position, rotation) of every effect keyframe of a model, as (keyframe index, position, rotation) tuples.
+# Keyframe indices run on across all effect elements of the model, so keyframes of different effect types never share one.
+def get_effect_transforms(model):
+    transforms = []
+
+    effects = model.find('effectKeyframes')
+    if effects is None:
+        return transforms
+
+    for effect in effects:
+        if effect.tag == 'effectType1':
+            for ef1 in effect:
+                effect_pos = convert_from_smb_coords([ef1.attrib['posX'], ef1.attrib['posY'], ef1.attrib['posZ']], True)
+                effect_rot = convert_to_radians(convert_from_smb_coords([ef1.attrib['rotX'], ef1.attrib['rotY'], ef1.attrib['rotZ']], True))
+                transforms.append((len(transforms), effect_pos, effect_rot))
+
+        elif effect.tag == 'effectType2':
+            for ef2 in effect:
+                effect_pos = convert_from_smb_coords([ef2.attrib['posX'], ef2.attrib['posY'], ef2.attrib['posZ']], True)
+                transforms.append((len(transforms), effect_pos, Vector((0,0,0))))
+
+    return transforms
+
+# Returns the dimension table to use for a scene's imported backgrounds
+def get_dimension_table(scene):
+    return dimension_dict.get_table(bpy.path.abspath(scene.background_dimension_table_path))
+
+# Creates the preview empty of a single background model
+def create_model_empty(model, index, use_cubes, dimension_table):
+    preview_name = model.find('name').text
+    preview_pos = convert_from_smb_coords(list(model.find('position').attrib.values()), True)
+    preview_rot = convert_to_radians(convert_from_smb_coords(list(model.find('rotation').attrib.values()), True))
+    preview_scale = convert_from_smb_coords(list(model.find('scale').attrib.values()), False)
+
+    new_empty = bpy.data.objects.new("[EXT_IMPORTED:{}:{}]".format(preview_name, index), None)
+    new_empty[IMPORT_ID_PROP] = (index, -1)
+    new_empty[IMPORT_DIMENSIONS_PROP] = (1.0, 1.0, 1.0)
+    new_empty.location = preview_pos
+    new_empty.rotation_euler = preview_rot
+    if use_cubes:
+        preview_dimensions = Vector((1, 1, 1))
+        if preview_name in dimension_table:
+            new_empty[IMPORT_DIMENSIONS_PROP] = dimension_table[preview_name]
+            preview_dimensions = convert_from_smb_coords(list(dimension_table[preview_name]), False)
+
+        new_empty.empty_display_size = 0.5
+        new_empty.scale = (preview_scale[0] * preview_dimensions[0],
+                           preview_scale[1] * preview_dimensions[1],
+                           preview_scale[2] * preview_dimensions[2])
+        new_empty.empty_display_type = "CUBE"
+    else:
+        new_empty.empty_display_type = "ARROWS"
+
+    return new_empty
+
+# Creates the preview empties of the effect keyframes of a single background model
+def create_effect_empties(model, index):
+    preview_name = model.find('name').text
+    empties = []
+
+    for keyframe_index, effect_pos, effect_rot in get_effect_transforms(model):
+        new_empty = bpy.data.objects.new("[EXT_IMPORTED_FX:{}:{}:{}]".format(preview_name, index, keyframe_index), None)
+        new_empty[IMPORT_ID_PROP] = (index, keyframe_index)
+        new_empty.location = effect_pos
+        new_empty.rotation_euler = effect_rot
+        new_empty.empty_display_type = "ARROWS"
+        empties.append(new_empty)
+
+    return empties
+
+# Imports a background XML as preview empties in a new collection. Objects are linked to the collection before it is
+# linked to the scene, so the view layer is only updated once instead of once per object.
+# Returns the collection and the number of created objects.
+def import_background(bg_path, scene, use_cubes, import_effects, window_manager=None):
+    collection = bpy.data.collections.new(IMPORT_COLLECTION_NAME)
+    dimension_table = get_dimension_table(scene)
+    file_size = max(os.path.getsize(bg_path), 1)
+    created = 0
+
+    if window_manager is not None:
+        window_manager.progress_begin(0, 100)
+
+    try:
+        with open(bg_path, "rb") as bg_file:
+            for index, model in iter_bg_models(bg_file):
+                objects = [create_model_empty(model, index, use_cubes, dimension_table)]
+                if import_effects:
+                    objects.extend(create_effect_empties(model, index))
+
+                for obj in objects:
+                    collection.objects.link(obj)
+                created += len(objects)
+
+                if (index + 1) % IMPORT_BATCH_SIZE == 0:
+                    progress = 100 * bg_file.tell() / file_size
+                    print(f"Imported {index + 1} background models ({progress:.0f}%)")
+                    if window_manager is not None:
+                        window_manager.progress_update(progress)
+    except Exception:
+        # Don't leave a half-imported collection behind
+        for obj in list(collection.objects):
+            bpy.data.objects.remove(obj)
+        bpy.data.collections.remove(collection)
+        raise
+    finally:
+        if window_manager is not None:
+            window_manager.progress_end()
+
+    scene.collection.children.link(collection)
+    return collection, created
+
+# Imports the effect keyframe previews of already imported background models, given their model indices.
+# Returns the number of created objects.
+def import_effect_previews(bg_path, indices, collection):
+    created = 0
+    remaining = set(indices)
+
+    for index, model in iter_bg_models(bg_path):
+        if index not in remaining:
+            continue
+
+        for obj in create_effect_empties(model, index):
+            collection.objects.link(obj)
+            created += 1
+
+        remaining.discard(index)
+        if not remaining:
+            break
+
+    return created
+
+# Returns the model index of an imported background preview empty, or None if the object isn't one
+def get_imported_model_index(obj):
+    if not obj.name.startswith("[EXT_IMPORTED:"):
+        return None
+    try:
+        return int(obj.name.split("]")[0].rsplit(":", 1)[1])
+    except ValueError:
+        return None
+
+# Returns the model index of an imported background effect preview empty, or None if the object isn't one
+def get_imported_effect_model_index(obj):
+    if not obj.name.startswith("[EXT_IMPORTED_FX:"):
+        return None
+    try:
+        return int(obj.name.split("]")[0].rsplit(":", 2)[1])
+    except ValueError:
+        return None
+
+# Stand-in for a preview empty of an instance in a point cloud, used when merging imported backgrounds on export.
+# import_dimensions are the dimensions the instance was scaled by, in SMB coordinates.
+class ImportedInstance:
+    def __init__(self, location, rotation_euler, scale, import_dimensions):
+        self.location = location
+        self.rotation_euler = rotation_euler
+        self.scale = scale
+        self.import_dimensions = import_dimensions
+
+# Returns the (x, y, z) dimensions in SMB coordinates an imported model's preview was scaled by at import,
+# or None for previews imported before these were stored
+def get_import_dimensions(obj):
+    if isinstance(obj, ImportedInstance):
+        return obj.import_dimensions
+    dimensions = obj.get(IMPORT_DIMENSIONS_PROP)
+    if dimensions is None:
+        return None
+    return tuple(float(value) for value in dimensions)
+
+# Returns the geometry nodes group that instances a cube on every point, scaled by its scale and dimensions
+def get_point_cloud_node_group():
+    group = bpy.data.node_groups.get(POINT_CLOUD_NODE_GROUP)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(POINT_CLOUD_NODE_GROUP, 'GeometryNodeTree')
+    group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = group.nodes
+    links = group.links
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    instance_on_points = nodes.new('GeometryNodeInstanceOnPoints')
+    cube = nodes.new('GeometryNodeMeshCube')
+    scale_multiply = nodes.new('ShaderNodeVectorMath')
+    scale_multiply.operation = 'MULTIPLY'
+
+    attributes = {}
+    for name in ("rotation", "scale", "dimensions"):
+        attribute = nodes.new('GeometryNodeInputNamedAttribute')
+        attribute.data_type = 'FLOAT_VECTOR'
+        attribute.inputs["Name"].default_value = name
+        attributes[name] = attribute
+
+    links.new(group_input.outputs[0], instance_on_points.inputs["Points"])
+    links.new(cube.outputs["Mesh"], instance_on_points.inputs["Instance"])
+    links.new(attributes["rotation"].outputs["Attribute"], instance_on_points.inputs["Rotation"])
+    links.new(attributes["scale"].outputs["Attribute"], scale_multiply.inputs[0])
+    links.new(attributes["dimensions"].outputs["Attribute"], scale_multiply.inputs[1])
+    links.new(scale_multiply.outputs["Vector"], instance_on_points.inputs["Scale"])
+    links.new(instance_on_points.outputs["Instances"], group_output.inputs[0])
+
+    return group
+
+# Imports a background XML as a single mesh with one vertex per model and effect keyframe, drawn as cubes through
+# geometry nodes instancing. Transforms, dimensions and model/effect indices are stored as point attributes.
+# Returns the point cloud object and the number of points.
+def import_background_point_cloud(bg_path, scene, use_cubes, import_effects, window_manager=None):
+    dimension_table = get_dimension_table(scene)
+    file_size = max(os.path.getsize(bg_path), 1)
+    names = []
+    positions = []
+    rotations = []
+    scales = []
+    dimensions = []
+    model_indices = []
+    effect_indices = []
+
+    if window_manager is not None:
+        window_manager.progress_begin(0, 100)
+
+    try:
+        with open(bg_path, "rb") as bg_file:
+            for index, model in iter_bg_models(bg_file):
+                preview_name = model.find('name').text
+                names.append(preview_name)
+
+                preview_dimensions = Vector((1, 1, 1))
+                if preview_name in dimension_table:
+                    preview_dimensions = convert_from_smb_coords(list(dimension_table[preview_name]), False)
+
+                positions.append(convert_from_smb_coords(list(model.find('position').attrib.values()), True))
+                rotations.append(convert_to_radians(convert_from_smb_coords(list(model.find('rotation').attrib.values()), True)))
+                scales.append(convert_from_smb_coords(list(model.find('scale').attrib.values()), False))
+                dimensions.append(preview_dimensions)
+                model_indices.append(index)
+                effect_indices.append(-1)
+
+                if import_effects:
+                    for keyframe_index, effect_pos, effect_rot in get_effect_transforms(model):
+                        positions.append(effect_pos)
+                        rotations.append(effect_rot)
+                        scales.append(Vector((1, 1, 1)))
+                        dimensions.append(Vector((1, 1, 1)))
+                        model_indices.append(index)
+                        effect_indices.append(keyframe_index)
+
+                if (index + 1) % IMPORT_BATCH_SIZE == 0:
+                    progress = 100 * bg_file.tell() / file_size
+                    print(f"Imported {index + 1} background models ({progress:.0f}%)")
+                    if window_manager is not None:
+                        window_manager.progress_update(progress)
+    finally:
+        if window_manager is not None:
+            window_manager.progress_end()
+
+    mesh = bpy.data.meshes.new(POINT_CLOUD_NAME)
+    mesh.vertices.add(len(positions))
+    if len(positions) > 0:
+        mesh.vertices.foreach_set("co", np.array(positions, dtype=np.float32).ravel())
+    for name, values in (("rotation", rotations), ("scale", scales), ("dimensions", dimensions)):
+        attribute = mesh.attributes.new(name, 'FLOAT_VECTOR', 'POINT')
+        if len(values) > 0:
+            attribute.data.foreach_set("vector", np.array(values, dtype=np.float32).ravel())
+    for name, values in (("model_index", model_indices), ("effect_index", effect_indices)):
+        attribute = mesh.attributes.new(name, 'INT', 'POINT')
+        if len(values) > 0:
+            attribute.data.foreach_set("value", np.array(values, dtype=np.int32))
+    mesh.update()
+
+    cloud = bpy.data.objects.new(POINT_CLOUD_NAME, mesh)
+    cloud["model_names"] = json.dumps(names)
+    cloud["use_cubes"] = use_cubes
+    cloud.display_type = 'WIRE'
+    modifier = cloud.modifiers.new("Instances", 'NODES')
+    modifier.node_group = get_point_cloud_node_group()
+
+    scene.collection.objects.link(cloud)
+    return cloud, len(positions)
+
+# Returns whether an object is the point cloud preview of an imported background
+def is_point_cloud(obj):
+    return obj is not None and obj.type == 'MESH' and obj.name.startswith(POINT_CLOUD_NAME)
+
+# Reads the point attributes of a point cloud preview as numpy arrays. Positions are returned in world space.
+def get_point_cloud_data(cloud):
+    mesh = cloud.data
+    count = len(mesh.vertices)
+
+    positions = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+    data = {"position": collision_grid.transform_points(positions.reshape(-1, 3), cloud.matrix_world)}
+
+    for name in ("rotation", "scale", "dimensions"):
+        values = np.empty(count * 3, dtype=np.float32)
+        mesh.attributes[name].data.foreach_get("vector", values)
+        data[name] = values.reshape(-1, 3)
+    for name in ("model_index", "effect_index"):
+        values = np.empty(count, dtype=np.int32)
+        mesh.attributes[name].data.foreach_get("value", values)
+        data[name] = values
+
+    return data
+
+# Returns the instances of every point cloud preview in a scene, as a dict of model index -> ImportedInstance and
+# a dict of (model index, effect index) -> ImportedInstance. Scales include the model dimensions stored in the cloud, like cube empties.
+def get_point_cloud_instances(scene):
+    models = {}
+    effects = {}
+
+    for cloud in scene.objects:
+        if not is_point_cloud(cloud):
+            continue
+
+        data = get_point_cloud_data(cloud)
+        for i in range(len(data["position"])):
+            dimensions = data["dimensions"][i]
+            instance = ImportedInstance(Vector(data["position"][i]),
+                                        Euler(data["rotation"][i]),
+                                        Vector(data["scale"][i] * dimensions),
+                                        (float(dimensions[0]), float(dimensions[2]), float(dimensions[1])))
+            if data["effect_index"][i] < 0:
+                models[int(data["model_index"][i])] = instance
+            else:
+                effects[(int(data["model_index"][i]), int(data["effect_index"][i]))] = instance
+
+    return models, effects
+
+# Replaces the selected points of a point cloud preview with regular preview empties so they can be edited.
+# Returns the number of created empties.
+def materialize_point_cloud_selection(cloud):
+    data = get_point_cloud_data(cloud)
+    mesh = cloud.data
+    selected = np.empty(len(mesh.vertices), dtype=bool)
+    mesh.vertices.foreach_get("select", selected)
+    if not selected.any():
+        return 0
+
+    names = json.loads(cloud["model_names"])
+    use_cubes = cloud.get("use_cubes", False)
+    collection = cloud.users_collection[0]
+
+    for i in np.flatnonzero(selected):
+        model_index = int(data["model_index"][i])
+        effect_index = int(data["effect_index"][i])
+
+        if effect_index < 0:
+            new_empty = bpy.data.objects.new("[EXT_IMPORTED:{}:{}]".format(names[model_index], model_index), None)
+            if use_cubes:
+                dimensions = data["dimensions"][i]
+                new_empty[IMPORT_DIMENSIONS_PROP] = (float(dimensions[0]), float(dimensions[2]), float(dimensions[1]))
+                new_empty.empty_display_size = 0.5
+                new_empty.scale = data["scale"][i] * dimensions
+                new_empty.empty_display_type = "CUBE"
+            else:
+                new_empty[IMPORT_DIMENSIONS_PROP] = (1.0, 1.0, 1.0)
+                new_empty.scale = data["scale"][i]
+                new_empty.empty_display_type = "ARROWS"
+        else:
+            new_empty = bpy.data.objects.new("[EXT_IMPORTED_FX:{}:{}:{}]".format(names[model_index], model_index, effect_index), None)
+            new_empty.empty_display_type = "ARROWS"
+
+        new_empty[IMPORT_ID_PROP] = (model_index, effect_index)
+        new_empty.location = data["position"][i]
+        new_empty.rotation_euler = data["rotation"][i]
+        collection.objects.link(new_empty)
+
+    # The empties take over from the materialized points
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.delete(bm, geom=[v for v in bm.verts if v.select], context='VERTS')
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+    return int(selected.sum())
+
+# Returns the (model index, effect index) of an imported background object, or None if the object isn't one.
+# Objects imported before import IDs were stored fall back to their names. Effect names of those imports counted
+# keyframes per effect element, so they only match for models with a single effect element.
+def get_import_id(obj):
+    import_id = obj.get(IMPORT_ID_PROP)
+    if import_id is not None:
+        return (int(import_id[0]), int(import_id[1]))
+
+    model_index = get_imported_model_index(obj)
+    if model_index is not None:
+        return (model_index, -1)
+
+    model_index = get_imported_effect_model_index(obj)
+    if model_index is not None:
+        try:
+            return (model_index, int(obj.name.split("]")[0].rsplit(":", 1)[1]))
+        except ValueError:
+            return None
+
+    return None
+
+# Builds a dict of (model index, effect index) -> imported background object for a scene, in a single pass over its objects.
+# Instances still stored in point clouds are included as ImportedInstance stand-ins, unless an empty has taken their place.
+def build_import_index(scene):
+    index = {}
+    for obj in scene.objects:
+        import_id = get_import_id(obj)
+        # Duplicated objects copy the import ID, only the first object found is used
+        if import_id is not None:
+            index.setdefault(import_id, obj)
+
+    cloud_models, cloud_effects = get_point_cloud_instances(scene)
+    for model_index, instance in cloud_models.items():
+        index.setdefault((model_index, -1), instance)
+    for effect_id, instance in cloud_effects.items():
+        index.setdefault(effect_id, instance)
+
+    return index
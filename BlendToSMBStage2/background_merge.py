@@ -0,0 +1,194 @@
+import copy
+import math
+import os
+
+import numpy as np
+
+from . import background_import
+
+# Animation channels of imported models, in the order of the 9 transform values of a model
+ANIM_CHANNELS = ('posX', 'posY', 'posZ', 'rotX', 'rotY', 'rotZ', 'scaleX', 'scaleY', 'scaleZ')
+
+# Attributes of effect keyframes that are taken from their preview empties
+EFFECT_ATTRIBUTES = {
+    'effectType1': ('posX', 'posY', 'posZ', 'rotX', 'rotY', 'rotZ'),
+    'effectType2': ('posX', 'posY', 'posZ'),
+}
+
+# Transforms that differ by less than this (plus float precision) from the imported XML are treated as unchanged
+CHANGE_TOLERANCE = 1e-4
+
+# Parsed background XMLs, keyed by path. Each entry holds the modification time and size the file was parsed at.
+_background_cache = {}
+
+# A model of an imported background XML. The element is never modified, models are copied before being changed.
+class CachedModel:
+    def __init__(self, element):
+        self.element = element
+        self.name = element.find('name').text
+
+        # Original position, rotation and scale in SMB coordinates
+        self.transform = np.array([float(value) for tag in ('position', 'rotation', 'scale')
+                                   for value in element.find(tag).attrib.values()], dtype=np.float64)
+
+        # Animation keyframe values as (child index, channel index, values) tuples
+        self.anim_channels = []
+        anim = element.find('animKeyframes')
+        if anim is not None:
+            for tag_index, tag in enumerate(list(anim)):
+                if tag.tag in ANIM_CHANNELS:
+                    values = np.array([float(keyframe.attrib['value']) for keyframe in tag], dtype=np.float64)
+                    self.anim_channels.append((tag_index, ANIM_CHANNELS.index(tag.tag), values))
+
+        # Effect keyframes as (child index, effect type, original values) tuples, with one row of values per keyframe
+        self.effects = []
+        effects = element.find('effectKeyframes')
+        if effects is not None:
+            for effect_index, effect in enumerate(list(effects)):
+                if effect.tag in EFFECT_ATTRIBUTES:
+                    attributes = EFFECT_ATTRIBUTES[effect.tag]
+                    values = np.array([[float(keyframe.attrib[attr]) for attr in attributes] for keyframe in effect], dtype=np.float64)
+                    self.effects.append((effect_index, effect.tag, values.reshape(-1, len(attributes))))
+
+# Returns the models of a background XML, parsing it only if it changed since the last call
+def get_background(bg_path):
+    stat = os.stat(bg_path)
+    cached = _background_cache.get(bg_path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    models = [CachedModel(element) for index, element in background_import.iter_bg_models(bg_path)]
+    _background_cache[bg_path] = (stat.st_mtime_ns, stat.st_size, models)
+    return models
+
+def clear_cache():
+    _background_cache.clear()
+
+# Returns the current transform of an imported model's preview as 9 values in SMB coordinates.
+# Cube empties are scaled to their in-game dimensions, which is undone here using the dimensions stored at import.
+# The dimension table is only used for previews imported before those were stored.
+def get_preview_transform(obj, name, dimension_table):
+    dimensions = background_import.get_import_dimensions(obj)
+    if dimensions is None:
+        dimensions = dimension_table.get(name, (1, 1, 1))
+    location = obj.location
+    rotation = obj.rotation_euler
+    scale = obj.scale
+
+    return (location[0], location[2], -location[1],
+            math.degrees(rotation[0]), math.degrees(rotation[2]), -math.degrees(rotation[1]),
+            scale[0]/dimensions[0], scale[2]/dimensions[1], scale[1]/dimensions[2])
+
+# Returns the current values of an effect keyframe's preview, in the order of EFFECT_ATTRIBUTES
+def get_effect_preview_values(obj, effect_type):
+    location = obj.location
+    values = [location[0], location[2], -1*location[1]]
+    if effect_type == 'effectType1':
+        rotation = obj.rotation_euler
+        values.extend((math.degrees(rotation[0]), math.degrees(rotation[2]), math.degrees(-1*rotation[1])))
+    return values
+
+# Returns a changed copy of a model with the given transform (or None if unchanged) and effect values (or None if unchanged) applied.
+# Animation keyframes are moved by the change of rotation and scale, all in one go per channel.
+def apply_model_changes(model, transform, effect_values):
+    element = copy.deepcopy(model.element)
+
+    if transform is not None:
+        for tag_index, tag in enumerate(('position', 'rotation', 'scale')):
+            attrib = element.find(tag).attrib
+            for axis, key in enumerate(('x', 'y', 'z')):
+                attrib[key] = str(float(transform[tag_index*3 + axis]))
+
+    if transform is not None and model.anim_channels:
+        rot_delta = transform[3:6] - model.transform[3:6]
+        scale_delta = transform[6:9] / model.transform[6:9]
+
+        # TODO: Not perfect! Need to handle object translations properly...
+        anim = list(element.find('animKeyframes'))
+        for tag_index, channel, values in model.anim_channels:
+            if channel < 3:
+                continue
+            elif channel < 6:
+                new_values = values + rot_delta[channel - 3]
+            else:
+                new_values = values * scale_delta[channel - 6]
+            for keyframe, value in zip(anim[tag_index], new_values.tolist()):
+                keyframe.attrib['value'] = str(value)
+
+    if effect_values:
+        effects = list(element.find('effectKeyframes'))
+        for (effect_index, effect_type, original), values in zip(model.effects, effect_values):
+            attributes = EFFECT_ATTRIBUTES[effect_type]
+            for j, keyframe in enumerate(effects[effect_index]):
+                if values[j] is None:
+                    continue
+                for attr, value in zip(attributes, values[j]):
+                    keyframe.attrib[attr] = str(float(value))
+
+    return element
+
+# Appends the models of an imported background to a config root, with the changes made to their previews.
+# Models whose previews are unchanged are appended as they were imported, models whose previews were deleted are left out.
+# Returns the number of changed models.
+def append_imported_bg_objects(scene, models, destination_root, use_previews):
+    if not use_previews:
+        for model in models:
+            destination_root.append(model.element)
+        return 0
+
+    # Imported objects (and point cloud instances) by (model index, effect index), built once for the whole background
+    imported_objects = background_import.build_import_index(scene)
+    dimension_table = background_import.get_dimension_table(scene)
+
+    # Compare every preview against its imported transform at once
+    exported = []
+    current = np.empty((len(models), 9), dtype=np.float64)
+    original = np.empty((len(models), 9), dtype=np.float64)
+    for index, model in enumerate(models):
+        imported_blender_object = imported_objects.get((index, -1))
+        if imported_blender_object is None:
+            # The preview was deleted
+            current[index] = original[index] = 0
+            continue
+        exported.append(index)
+        current[index] = get_preview_transform(imported_blender_object, model.name, dimension_table)
+        original[index] = model.transform
+
+    transform_changed = ~np.all(np.isclose(current, original, rtol=1e-6, atol=CHANGE_TOLERANCE), axis=1)
+
+    changed = 0
+    for index in exported:
+        model = models[index]
+
+        # Effect keyframe previews that moved, as one list of values (or None if unchanged) per effect keyframe.
+        # Previews are keyed by the index of the keyframe among all effect keyframes of the model, see get_effect_transforms.
+        effect_values = []
+        effects_changed = False
+        keyframe_index = 0
+        for effect_index, effect_type, original_values in model.effects:
+            values = []
+            for j in range(len(original_values)):
+                effect_obj = imported_objects.get((index, keyframe_index))
+                keyframe_index += 1
+                if effect_obj is None:
+                    values.append(None)
+                    continue
+                preview_values = get_effect_preview_values(effect_obj, effect_type)
+                if np.allclose(preview_values, original_values[j], rtol=1e-6, atol=CHANGE_TOLERANCE):
+                    values.append(None)
+                else:
+                    values.append(preview_values)
+                    effects_changed = True
+            effect_values.append(values)
+
+        if transform_changed[index] or effects_changed:
+            element = apply_model_changes(model,
+                                          current[index] if transform_changed[index] else None,
+                                          effect_values if effects_changed else None)
+            changed += 1
+        else:
+            element = model.element
+
+        destination_root.append(element)
+
+    return changed
@@ -0,0 +1,379 @@
+import bpy
+
+from mathutils import Euler, Matrix
+from .. import developer_utils
+
+# numpy takes longer to import than the rest of the addon, so it's only loaded the first time geometry is measured
+np = developer_utils.lazy_import("numpy")
+
+# Object types that can be converted to a mesh for collision grid fitting
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+
+# Objects without geometry (placeables) are assumed to be 10m x 10m
+PLACEABLE_HALF_SIZE = 5.0
+
+# Maximum number of transformed points held in memory at once when sweeping geometry over an animation
+SWEEP_CHUNK_POINTS = 4000000
+
+# Step counts tried per axis by the step count tuner
+TUNER_STEP_COUNTS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+
+# Collision grid heatmaps, keyed by item group name. Each entry holds the grid parameters, item group transform
+# relative to the grid and local geometry it was computed for, and a tuple of (triangles per cell, triangles outside of the grid).
+_heatmap_cache = {}
+
+# Sampled item group animation matrices, keyed by (item group name, action name, first frame, last frame, keyframe fingerprint)
+_sample_cache = {}
+
+# Keyframe fingerprints, keyed by action name. Cleared whenever an action is updated.
+_fingerprint_cache = {}
+
+# Item group geometry in the item group's local space, keyed by item group name. Each entry holds the layout it was read
+# for (see get_geometry_layout) and a LocalGeometry. Entries are discarded when the geometry of a descendant changes.
+_local_geometry_cache = {}
+
+# Rotation modes whose animation is exported, and so can be swept
+EULER_ROTATION_MODES = {'XYZ', 'XZY', 'YXZ', 'YZX', 'ZXY', 'ZYX'}
+
+# Decimals that transforms relative to an item group are rounded to, so float noise doesn't discard cached geometry
+LAYOUT_PRECISION = 5
+
+# Transforms an (N, 3) array of points by a 4x4 matrix
+def transform_points(points, matrix):
+    matrix = np.array(matrix, dtype=np.float64)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+# Returns the item group and all of its descendants
+def get_item_group_objects(ig):
+    return [ig, *ig.children_recursive]
+
+# Vertices and collision triangles of an item group and all of its descendants, in the item group's local space
+class LocalGeometry:
+    def __init__(self, points, triangles):
+        # (N, 3) array of every vertex, placeables are represented by the corners of their assumed footprint
+        self.points = points
+        # (T, 3, 3) array of the triangles of every model without [NOCOLI]
+        self.triangles = triangles
+
+# Returns the name, data and transform relative to the item group of every object of an item group.
+# Cached local geometry stays valid for as long as this doesn't change and none of the objects' geometry is updated.
+def get_geometry_layout(ig):
+    ig_inv = np.linalg.inv(np.array(ig.matrix_world, dtype=np.float64))
+    layout = []
+    for obj in get_item_group_objects(ig):
+        relative = np.round(ig_inv @ np.array(obj.matrix_world, dtype=np.float64), LAYOUT_PRECISION)
+        layout.append((obj.name, obj.data.name if obj.data is not None else None, relative.tobytes()))
+    return tuple(layout)
+
+# Returns the LocalGeometry of an item group, reading the evaluated geometry of its objects only if it changed
+def get_local_geometry(ig, depsgraph):
+    layout = get_geometry_layout(ig)
+    entry = _local_geometry_cache.get(ig.name)
+    if entry is not None and entry[0] == layout:
+        return entry[1]
+
+    ig_inv = np.linalg.inv(np.array(ig.matrix_world, dtype=np.float64))
+    ig_scale = np.array(ig.matrix_world.to_scale(), dtype=np.float64)
+    points = []
+    triangles = []
+
+    for obj in get_item_group_objects(ig):
+        relative = ig_inv @ np.array(obj.matrix_world, dtype=np.float64)
+
+        # Handle meshes
+        if obj.type in GEOMETRY_TYPES:
+            obj_eval = obj.evaluated_get(depsgraph)
+            mesh = obj_eval.to_mesh()
+            try:
+                if mesh is None:
+                    continue
+                coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+                mesh.vertices.foreach_get("co", coords)
+                indices = None
+                if "[NOCOLI]" not in obj.name:
+                    mesh.calc_loop_triangles()
+                    indices = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+                    mesh.loop_triangles.foreach_get("vertices", indices)
+            finally:
+                obj_eval.to_mesh_clear()
+
+            local_verts = transform_points(coords.reshape(-1, 3), relative)
+            points.append(local_verts)
+            if indices is not None:
+                triangles.append(local_verts[indices.reshape(-1, 3)])
+
+        # If the object has no data (is a placeable), we assume it to be 10m x 10m, along the item group's axes
+        elif obj.data is None:
+            corners = np.tile(relative[:3, 3], (4, 1))
+            corners[:, :2] += np.array([(-1, -1), (-1, 1), (1, -1), (1, 1)]) * PLACEABLE_HALF_SIZE / np.where(ig_scale[:2] != 0, ig_scale[:2], 1)
+            points.append(corners)
+
+    geometry = LocalGeometry(np.concatenate(points) if points else np.empty((0, 3)),
+                             np.concatenate(triangles) if triangles else np.empty((0, 3, 3)))
+    _local_geometry_cache[ig.name] = (layout, geometry)
+    return geometry
+
+# Discards the cached local geometry of the item groups an object belongs to
+def invalidate_local_geometry(obj):
+    while obj is not None:
+        _local_geometry_cache.pop(obj.name, None)
+        obj = obj.parent
+
+# Returns the world space vertices of an item group and all of its descendants as an (N, 3) array.
+# Placeables are represented by the corners of their assumed footprint.
+def get_world_points(ig, depsgraph):
+    return transform_points(get_local_geometry(ig, depsgraph).points, ig.matrix_world)
+
+# Returns the min/max world space XY coordinates of an item group and all of its descendants, or None if there's nothing to fit
+def get_world_bounds(ig, depsgraph):
+    points = get_world_points(ig, depsgraph)
+    if len(points) == 0:
+        return None
+    return points[:, :2].min(axis=0), points[:, :2].max(axis=0)
+
+# Returns the first and last frame of an object's animation loop, following the same rules as the config export
+def get_anim_frame_range(obj, scene):
+    start_frame = scene.frame_start
+    end_frame = scene.frame_end
+
+    # Sets up a custom animation loop time if one is specified
+    if "animLoopTime" in obj:
+        if obj["animLoopTime"] != -1.0:
+            end_frame = start_frame + int(round(obj["animLoopTime"]*60))-1
+
+    return start_frame, max(start_frame, end_frame)
+
+# Hash of every keyframe and handle of an action, so cached samples are discarded whenever the animation is edited.
+# Cached until clear_cache() is called for an action update.
+def get_keyframe_fingerprint(action):
+    fingerprint = _fingerprint_cache.get(action.name)
+    if fingerprint is not None:
+        return fingerprint
+
+    parts = []
+    for c in action.fcurves:
+        keyframes = np.empty(len(c.keyframe_points) * 6, dtype=np.float32)
+        points = keyframes.reshape(3, -1)
+        c.keyframe_points.foreach_get("co", points[0])
+        c.keyframe_points.foreach_get("handle_left", points[1])
+        c.keyframe_points.foreach_get("handle_right", points[2])
+        parts.append((c.data_path, c.array_index, keyframes.tobytes()))
+    fingerprint = hash(tuple(parts))
+    _fingerprint_cache[action.name] = fingerprint
+    return fingerprint
+
+# Whether an item group's animation can be swept. Only Euler rotations are exported, quaternion and axis-angle
+# rotations would sweep a motion the game never plays.
+def is_sweep_supported(ig):
+    return ig.rotation_mode in EULER_ROTATION_MODES
+
+# Samples an item group's animation on every frame of its loop. Returns the object matrices (relative to the parent) as
+# an (F, 4, 4) array, and the matrices that move the collision grid (the location/rotation offset from the first frame),
+# or None if the item group isn't animated or its rotation mode isn't supported (see is_sweep_supported).
+def sample_item_group_matrices(ig, scene):
+    if ig.animation_data is None or ig.animation_data.action is None or not is_sweep_supported(ig):
+        return None
+
+    action = ig.animation_data.action
+    start_frame, end_frame = get_anim_frame_range(ig, scene)
+    rot_mode = ig.rotation_mode
+
+    curves = {}
+    for c in action.fcurves:
+        if c.data_path in ("location", "rotation_euler", "scale") and c.array_index < 3:
+            curves[(c.data_path, c.array_index)] = c
+
+    # Channels without an F-curve keep their current value, which can change without the action being updated
+    static_values = tuple(getattr(ig, data_path)[i] for data_path in ("location", "rotation_euler", "scale")
+                          for i in range(3) if (data_path, i) not in curves)
+    key = (ig.name, action.name, start_frame, end_frame, get_keyframe_fingerprint(action), rot_mode, static_values)
+    if key in _sample_cache:
+        return _sample_cache[key]
+
+    frames = range(start_frame, end_frame + 1)
+    values = {}
+    for data_path in ("location", "rotation_euler", "scale"):
+        channel = np.tile(np.array(getattr(ig, data_path), dtype=np.float64), (len(frames), 1))
+        for i in range(3):
+            c = curves.get((data_path, i))
+            if c is not None:
+                channel[:, i] = [c.evaluate(frame) for frame in frames]
+        values[data_path] = channel
+
+    obj_mats = np.empty((len(frames), 4, 4))
+    grid_mats = np.empty((len(frames), 4, 4))
+    rot_start = values["rotation_euler"][0]
+    for f in range(len(frames)):
+        loc = values["location"][f]
+        rot = values["rotation_euler"][f]
+        obj_mtx = Matrix.Translation(loc) @ Euler(rot, rot_mode).to_matrix().to_4x4() @ Matrix.Diagonal((*values["scale"][f], 1.0))
+        grid_mtx = Matrix.Translation(loc - values["location"][0]) @ Euler(rot - rot_start, rot_mode).to_matrix().to_4x4()
+        obj_mats[f] = obj_mtx
+        grid_mats[f] = grid_mtx
+
+    # Only the latest samples of each item group are kept
+    for stale_key in [k for k in _sample_cache if k[0] == ig.name]:
+        del _sample_cache[stale_key]
+    _sample_cache[key] = (obj_mats, grid_mats)
+    return _sample_cache[key]
+
+def clear_cache():
+    _sample_cache.clear()
+    _fingerprint_cache.clear()
+
+def clear_local_geometry():
+    _local_geometry_cache.clear()
+
+# Returns the min/max XY coordinates, in the space of the collision grid, reached by an item group's geometry over its whole animation loop.
+# Children are assumed to follow the item group rigidly. A parent's animation isn't swept: parented item groups
+# are swept as if the parent stayed where it is on the current frame.
+def get_swept_bounds(ig, depsgraph, scene):
+    samples = sample_item_group_matrices(ig, scene)
+    if samples is None:
+        return get_world_bounds(ig, depsgraph)
+
+    points = get_local_geometry(ig, depsgraph).points
+    if len(points) == 0:
+        return None
+
+    # Geometry at frame t, relative to the grid at frame t: grid(t)^-1 @ parent @ ig(t), where parent is everything
+    # between the item group's own transform and the world (parent, parent inverse and constraints) on the current frame
+    obj_mats, grid_mats = samples
+    parent = np.array(ig.matrix_world, dtype=np.float64) @ np.linalg.inv(np.array(ig.matrix_basis, dtype=np.float64))
+    transforms = np.linalg.inv(grid_mats) @ parent @ obj_mats
+
+    min_xy = np.full(2, np.inf)
+    max_xy = np.full(2, -np.inf)
+    chunk_frames = max(1, SWEEP_CHUNK_POINTS // len(points))
+    for start in range(0, len(transforms), chunk_frames):
+        chunk = transforms[start:start + chunk_frames]
+        swept = np.einsum('fij,nj->fni', chunk[:, :2, :3], points) + chunk[:, None, :2, 3]
+        min_xy = np.minimum(min_xy, swept.min(axis=(0, 1)))
+        max_xy = np.maximum(max_xy, swept.max(axis=(0, 1)))
+
+    return min_xy, max_xy
+
+# Returns the grid start position (Blender coordinates, top left corner) and dimensions for the given bounds and margin percentage
+def get_grid_fit(bounds, margin):
+    min_xy, max_xy = bounds
+    dimensions = max_xy - min_xy
+    pos = (min_xy[0] - dimensions[0]*(0.5*margin/100),
+           max_xy[1] + dimensions[1]*(0.5*margin/100))
+    return pos, tuple(dimensions * (1+margin/100))
+
+# Assigns the collision grid start and step of an item group, keeping its step count
+def apply_grid_fit(ig, pos, dimensions):
+    ig["collisionStartX"] = float(pos[0])
+    ig["collisionStartY"] = -1*float(pos[1])   # Adjust for SMB coordinate system
+    ig["collisionStepX"] = float(dimensions[0]) / ig["collisionStepCountX"]
+    ig["collisionStepY"] = float(dimensions[1]) / ig["collisionStepCountY"]
+
+def is_item_group(obj):
+    return "[IG]" in obj.name and "collisionStepCountX" in obj.keys()
+
+# Returns the world space collision triangles of an item group's models as a (T, 3, 3) array
+def get_collision_triangles(ig, depsgraph):
+    triangles = get_local_geometry(ig, depsgraph).triangles
+    return transform_points(triangles.reshape(-1, 3), ig.matrix_world).reshape(-1, 3, 3)
+
+# Returns the XZ bounds of triangles in SMB coordinates (Z is Blender's -Y), as two (T, 2) arrays
+def get_triangle_bounds_smb(triangles):
+    smb_xz = np.stack((triangles[:, :, 0], -triangles[:, :, 1]), axis=-1)
+    return smb_xz.min(axis=1), smb_xz.max(axis=1)
+
+# Counts the triangles overlapping each cell of a grid, using each triangle's bounding box like the stagedef does.
+# Returns a (count Z, count X) array.
+def count_triangles_per_cell(tri_min, tri_max, start, step, counts):
+    counts = np.array(counts)
+    first = np.floor((tri_min - start) / step).astype(np.int64)
+    last = np.floor((tri_max - start) / step).astype(np.int64)
+
+    # Triangles entirely outside of the grid can never be collided with
+    inside = np.all((last >= 0) & (first < counts), axis=1)
+    first = np.clip(first[inside], 0, counts - 1)
+    last = np.clip(last[inside], 0, counts - 1)
+
+    # 2D difference array, summed up into per-cell counts
+    diff = np.zeros((counts[1] + 1, counts[0] + 1), dtype=np.int64)
+    np.add.at(diff, (first[:, 1], first[:, 0]), 1)
+    np.add.at(diff, (first[:, 1], last[:, 0] + 1), -1)
+    np.add.at(diff, (last[:, 1] + 1, first[:, 0]), -1)
+    np.add.at(diff, (last[:, 1] + 1, last[:, 0] + 1), 1)
+    return diff.cumsum(axis=0).cumsum(axis=1)[:counts[1], :counts[0]]
+
+# Size in bytes of a grid's triangle index lists: a pointer per cell, plus a u16 index per triangle and a terminator per non-empty cell
+def get_grid_memory(cell_counts):
+    return cell_counts.size * 4 + (int(cell_counts.sum()) + int(np.count_nonzero(cell_counts))) * 2
+
+# Grid start and step of an item group in SMB coordinates, normalized so that steps are positive
+def get_grid_extent(ig):
+    start = np.array((ig["collisionStartX"], ig["collisionStartY"]), dtype=np.float64)
+    step = np.array((ig["collisionStepX"], ig["collisionStepY"]), dtype=np.float64)
+    counts = np.array((ig["collisionStepCountX"], ig["collisionStepCountY"]))
+    start = np.where(step < 0, start + step * counts, start)
+    return start, np.abs(step) * counts
+
+# Picks the step counts with the lowest expected lookup cost (mean triangles per non-empty cell, plus a quarter of the
+# worst cell) whose index lists fit within the memory budget. Returns (count X, count Z, stats) or None if nothing fits.
+def tune_step_counts(triangles, start, size, memory_budget, candidates=TUNER_STEP_COUNTS):
+    tri_min, tri_max = get_triangle_bounds_smb(triangles)
+
+    best = None
+    for count_x in candidates:
+        for count_z in candidates:
+            counts = (count_x, count_z)
+            cell_counts = count_triangles_per_cell(tri_min, tri_max, start, size / counts, counts)
+            memory = get_grid_memory(cell_counts)
+            if memory > memory_budget:
+                continue
+
+            nonempty = cell_counts[cell_counts > 0]
+            mean = float(nonempty.mean()) if len(nonempty) else 0.0
+            worst = int(cell_counts.max())
+            cost = mean + 0.25 * worst
+
+            if best is None or (cost, memory) < (best[0], best[1]):
+                best = (cost, memory, count_x, count_z, {"mean": mean, "max": worst, "memory": memory})
+
+    if best is None:
+        return None
+    return best[2], best[3], best[4]
+
+# Assigns new step counts to an item group, keeping the area covered by its grid
+def apply_step_counts(ig, count_x, count_z):
+    ig["collisionStepX"] = ig["collisionStepX"] * ig["collisionStepCountX"] / count_x
+    ig["collisionStepY"] = ig["collisionStepY"] * ig["collisionStepCountY"] / count_z
+    ig["collisionStepCountX"] = count_x
+    ig["collisionStepCountY"] = count_z
+
+# Returns the triangle count of every cell of an item group's collision grid as a (count Z, count X) array,
+# along with the collision triangles that aren't fully inside the grid, in the grid's space.
+# grid_mtx is the offset of the grid on the current frame, geometry is binned where it is relative to the moved grid.
+# Cached until the grid, the geometry or the item group's transform relative to the grid changes.
+def get_heatmap(ig, depsgraph, grid_mtx):
+    start, size = get_grid_extent(ig)
+    counts = (ig["collisionStepCountX"], ig["collisionStepCountY"])
+    geometry = get_local_geometry(ig, depsgraph)
+    relative = np.linalg.inv(np.array(grid_mtx, dtype=np.float64)) @ np.array(ig.matrix_world, dtype=np.float64)
+    key = (tuple(start), tuple(size), counts, np.round(relative, LAYOUT_PRECISION).tobytes())
+
+    entry = _heatmap_cache.get(ig.name)
+    if entry is not None and entry[0] == key and entry[1] is geometry:
+        return entry[2]
+
+    triangles = transform_points(geometry.triangles.reshape(-1, 3), relative).reshape(-1, 3, 3)
+    tri_min, tri_max = get_triangle_bounds_smb(triangles)
+    cell_counts = count_triangles_per_cell(tri_min, tri_max, start, size / counts, counts)
+    outside = np.any((tri_min < start) | (tri_max > start + size), axis=1)
+
+    heatmap = (cell_counts, triangles[outside])
+    _heatmap_cache[ig.name] = (key, geometry, heatmap)
+    return heatmap
+
+# Discards the heatmaps of item groups that aren't in a set of names anymore
+def prune_heatmaps(names):
+    for name in [name for name in _heatmap_cache if name not in names]:
+        del _heatmap_cache[name]
+
+def clear_heatmaps():
+    _heatmap_cache.clear()
@@ -25,6 +25,10 @@ class DescriptorBanana(DescriptorBase):
         radius = 0.5 if (banana_type == 'SINGLE') else 1.0
         stage_object_drawing.draw_generic_sphere(obj, radius, stage_object_drawing.COLOR_YELLOW)
 
+    @staticmethod
+    def get_drop_height(obj):
+        return 0.5 if (DescriptorBanana.get_object_type(obj) == 'SINGLE') else 1.0
+
     @staticmethod
     def get_object_type(obj):
         if "[BANANA_S]" in obj.name:
@@ -29,3 +29,8 @@ class DescriptorBase:
     @staticmethod
     def return_properties(obj):
         pass
+
+    # Returns the distance the object is placed above the surface it's dropped onto
+    @staticmethod
+    def get_drop_height(obj):
+        pass
@@ -24,3 +24,7 @@ class DescriptorCylinderCol(DescriptorBase):
     def render(obj):
         stage_object_drawing.draw_cylinder_col(obj)
 
+    @staticmethod
+    def get_drop_height(obj):
+        return obj.scale.z/2
+
@@ -22,3 +22,7 @@ class DescriptorSphereCol(DescriptorBase):
     def render(obj):
         stage_object_drawing.draw_sphere_col(obj)
 
+    @staticmethod
+    def get_drop_height(obj):
+        return obj.scale.x
+
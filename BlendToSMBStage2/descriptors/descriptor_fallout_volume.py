@@ -20,3 +20,7 @@ class DescriptorFalloutVolume(DescriptorBase):
     def render(obj):
         stage_object_drawing.draw_fallout_volume(obj)
 
+    @staticmethod
+    def get_drop_height(obj):
+        return obj.scale.z/2
+
@@ -22,6 +22,10 @@ class DescriptorStart(DescriptorBase):
     def render(obj):
         stage_object_drawing.draw_start(obj)
 
+    @staticmethod
+    def get_drop_height(obj):
+        return 0.5
+
     @staticmethod
     def construct(obj):
         obj["playerID"] = 1
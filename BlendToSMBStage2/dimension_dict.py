@@ -1,774 +1,132 @@
-from mathutils import Vector
+import difflib
+import json
+import os
+import struct
 
-# This is a dictionary of the dimensions of various vanilla BG objects
-dimensions = {
-    "STM_CIRCLE_BIG": Vector((375.0, 25.0, 375.0)),
-    "STM_CIRCLE_SMALL": Vector((195.0, 25.0, 195.0)),
-    "STM_FIREBASE": Vector((16.0, 5.625, 16.0)),
-    "STM_PILLAR": Vector((10.0, 100.0, 9.511)),
-    "STM_RAIN00": Vector((1.0, 2.0, 0.01)),
-    "STM_RAIN01": Vector((1.0, 1.0, 0.01)),
-    "STM_RAIN02": Vector((1.0, 0.01, 1.0)),
-    "STM_SKY": Vector((1616.001, 693.462, 1616.001)),
-    "STM_STATUE00": Vector((29.748, 49.408, 41.745)),
-    "STM_STATUE01": Vector((16.982, 28.225, 36.214)),
-    "STM_STATUE02": Vector((13.727, 44.064, 21.657)),
-    "STM_STATUE03": Vector((16.392, 45.604, 29.285)),
-    "STM_STATUE04": Vector((22.12, 26.601, 20.606)),
-    "STM_STATUE05": Vector((19.189, 27.85, 19.476)),
-    "STM_TOWER": Vector((65.009, 315.0, 55.0)),
-    "NIG_CITY00": Vector((4599.917, 15.004, 2549.353)),
-    "NIG_DINER00": Vector((66.0, 39.671, 26.4)),
-    "NIG_DINER00_NEON": Vector((60.077, 19.354, 1.212)),
-    "NIG_DINER01": Vector((45.4, 27.81, 20.4)),
-    "NIG_DINER01_NEON": Vector((48.0, 8.8, 0.15)),
-    "NIG_DINER02": Vector((39.375, 25.873, 26.25)),
-    "NIG_DINER02_NEON": Vector((32.184, 7.68, 0.313)),
-    "NIG_GROUND": Vector((5838.617, 0.001, 6554.783)),
-    "NIG_GROUND_SEP": Vector((7784.823, 0.001, 7784.823)),
-    "NIG_MOUNTAIN": Vector((4383.12, 519.145, 6713.096)),
-    "NIG_SIGN00": Vector((7.5, 43.5, 23.062)),
-    "NIG_SKY": Vector((1616.001, 1057.686, 1616.001)),
-    "NIG_TREE": Vector((41.364, 54.124, 41.163)),
-    "JUN_SKY": Vector((3499.999, 2566.783, 3499.999)),
-    "JUN_FLOOR": Vector((67.111, 65.952, 73.244)),
-    "JUN_WATER04": Vector((609.633, 502.368, 241.335)),
-    "JUN_TUTA": Vector((69.278, 33.309, 75.518)),
-    "JUN_CLIFF04": Vector((2135.011, 161.706, 371.411)),
-    "JUN_YASHI": Vector((41.364, 78.324, 55.495)),
-    "JUN_GROUND00": Vector((2008.542, 632.977, 1705.681)),
-    "JUN_GROUND01": Vector((1184.319, 705.504, 929.957)),
-    "JUN_GROUND02": Vector((738.199, 535.44, 303.65)),
-    "JUN_GROUND03": Vector((700.68, 225.056, 384.231)),
-    "JUN_GROUND05": Vector((470.939, 304.357, 539.688)),
-    "JUN_GROUND06": Vector((500.956, 174.787, 443.864)),
-    "JUN_RAINBOW": Vector((843.946, 334.97, 0.01)),
-    "JUN_GROUND07": Vector((1131.474, 802.36, 1340.434)),
-    "JUN_MIZUSHIBUKI_A": Vector((10.0, 10.0, 0.01)),
-    "JUN_TUTA_LOD1Z": Vector((150.302, 1030.132, 145.72)),
-    "JUN_WATER_SMOKE_A": Vector((10.0, 10.0, 0.01)),
-    "JUN_WATER01": Vector((270.351, 502.368, 239.017)),
-    "JUN_WATER02": Vector((637.729, 125.944, 249.38)),
-    "JUN_WATER03": Vector((349.241, 125.944, 91.377)),
-    "JUN_WATER07": Vector((1661.363, 2529.5, 1574.382)),
-    "JUN_WOODS00": Vector((1382.415, 156.189, 551.88)),
-    "JUN_WOODS01": Vector((858.965, 259.572, 522.871)),
-    "JUN_WOODS04": Vector((1016.138, 308.148, 818.24)),
-    "JUN_WATER07_SHT": Vector((1661.363, 1702.5, 1574.382)),
-    "JUN_WATER_SPEC_A": Vector((1996.624, 40.593, 1174.453)),
-    "JUN_WATER_SMOKE_B": Vector((10.0, 10.0, 0.01)),
-    "JUN_SPLA_EDGE_A": Vector((384.585, 31.203, 271.843)),
-    "JUN_SPLA_EDGE_B": Vector((508.466, 55.473, 192.656)),
-    "JUN_SPLA_EDGE_C": Vector((206.179, 38.041, 114.119)),
-    "JUN_SMOKE_SCREEN_A": Vector((10.0, 10.0, 0.01)),
-    "JUN_GROUND07_RACE": Vector((1131.474, 705.504, 1340.434)),
-    "JUN_WOODS00_RACE": Vector((1333.827, 142.473, 477.433)),
-    "JUN_WOODS01_RACE": Vector((858.965, 194.866, 522.871)),
-    "JUN_WOODS02_RACE": Vector((624.217, 334.175, 761.143)),
-    "JUN_WOODS04_RACE": Vector((687.814, 268.158, 712.784)),
-    "JUN_WATER02_RACE": Vector((637.729, 125.944, 249.38)),
-    "JUN_WATER04_RACE": Vector((609.633, 502.368, 241.335)),
-    "JUN_WATER07_RACE": Vector((1661.363, 2.5, 1574.382)),
-    "JUN_WATER01_RACE": Vector((261.55, 502.368, 216.104)),
-    "BNS_GRASS": Vector((10.0, 27.155, 10.0)),
-    "BNS_KINGYO": Vector((40.819, 17.119, 8.092)),
-    "BNS_SKY_KUMO_A": Vector((931.746, 1219.87, 931.746)),
-    "BNS_FLOWER": Vector((207.2, 302.707, 224.967)),
-    "BNS_LUNE": Vector((109.854, 149.981, 53.241)),
-    "BNS_SKY_KUMO_B": Vector((931.746, 1219.87, 931.746)),
-    "BNS_SKY_KUMO_C": Vector((931.746, 1219.87, 931.746)),
-    "BNS_LUNE_CLOUD_A": Vector((75.907, 40.061, 16.045)),
-    "BNS_LUNE_CLOUD_B": Vector((94.883, 50.076, 20.057)),
-    "BNS_LUNE_CLOUD_C": Vector((94.883, 50.076, 20.057)),
-    "BNS_SKY": Vector((2019.798, 2000.0, 2019.798)),
-    "BNS_FLO_KABEN_A": Vector((20.833, 60.959, 24.491)),
-    "BNS_SOLIL_LUNE": Vector((397.631, 339.749, 273.309)),
-    "BNS_SKY_KUMO_D": Vector((931.746, 1219.87, 931.746)),
-    "BNS_CLOUD_A": Vector((1222.817, 232.924, 1222.816)),
-    "BNS_FLO_KABEN_B": Vector((20.833, 60.959, 24.491)),
-    "BNS_SKY_WHITE": Vector((1718.568, 464.554, 1718.568)),
-    "BNS_FLO_KABEN_C": Vector((20.833, 60.959, 24.491)),
-    "BNS_FLO_KABEN_D": Vector((20.833, 60.959, 24.491)),
-    "BNS_FLO_KABEN_E": Vector((20.833, 60.959, 24.491)),
-    "BNS_GLASS": Vector((150.0, 136.327, 150.0)),
-    "BNS_GLASS_TUTI": Vector((60.277, 118.976, 55.628)),
-    "BNS_LUNE_CLOUD_D": Vector((118.604, 62.595, 25.071)),
-    "BNS_SOLIL_A": Vector((339.749, 339.749, 56.306)),
-    "BNS_SOLIL_B": Vector((339.749, 339.749, 62.341)),
-    "BNS_STARS_A": Vector((1412.142, 699.557, 1519.674)),
-    "STARLIGHT_A": Vector((20.0, 20.0, 0.01)),
-    "BNS_SKY_HIRU_KUMO": Vector((1490.794, 301.336, 1490.794)),
-    "BNS_STARS_B": Vector((1174.5, 710.645, 1182.63)),
-    "BNS_STAR_LIGHT": Vector((0.01, 2.171, 2.283)),
-    "BNS_SKY_BLEU": Vector((1272.792, 146.447, 1272.792)),
-    "BNS_ASI_KABA": Vector((21.526, 616.657, 21.526)),
-    "BNS_GLASS_ASI_A": Vector((28.701, 277.067, 28.701)),
-    "BNS_GLASS_ASI_B": Vector((7.175, 416.657, 7.175)),
-    "BNS_LIGHTMAP": Vector((1.0, 1.0, 0.01)),
-    "BNS_LIGHTMAP_A": Vector((20.0, 20.0, 0.01)),
-    "BNS_GOAL": Vector((6.12, 5.57, 1.958)),
-    "BNS_GOAL_B": Vector((6.12, 5.57, 1.958)),
-    "WA2_POKOPOKO": Vector((14.577, 21.384, 14.577)),
-    "WA2_FISH_BODY": Vector((29.558, 45.121, 66.526)),
-    "WA2_FIS_HIRE_B": Vector((17.014, 18.661, 23.26)),
-    "WA2_IKATAMA_A": Vector((60.259, 122.327, 48.141)),
-    "WA2_IKATAMA_B": Vector((37.785, 81.551, 35.102)),
-    "WA2_KAIMEN": Vector((2975.999, 0.01, 2975.999)),
-    "WA2_KAITEI": Vector((541.267, 1085.392, 931.893)),
-    "WA2_LAMP_L": Vector((114.932, 164.619, 206.878)),
-    "WA2_LAMP_M_A": Vector((56.995, 160.356, 65.435)),
-    "WA2_LAMP_M_B": Vector((62.03, 160.356, 64.141)),
-    "WA2_LAMP_S_A": Vector((41.58, 132.555, 24.658)),
-    "WA2_SHIP_HO_C_skin": Vector((150.0, 112.432, 0.01)),
-    "WA2_LIGHT_A": Vector((42.464, 36.095, 41.603)),
-    "WA2_LIGHT_B": Vector((42.946, 36.095, 41.137)),
-    "WA2_LIGHT_C": Vector((35.846, 36.095, 45.098)),
-    "WA2_LIGHT_D": Vector((45.202, 36.095, 25.199)),
-    "WA2_NYORO_A": Vector((97.313, 118.103, 169.505)),
-    "WA2_SHIP_HO_D_skin": Vector((112.5, 67.432, 0.01)),
-    "WA2_POKO_LIGHT": Vector((135.0, 135.0, 0.01)),
-    "WA2_SHIP": Vector((187.5, 323.556, 490.408)),
-    "WA2_ROPE_A_skin": Vector((34.085, 56.477, 75.052)),
-    "WA2_ROPE_B_skin": Vector((66.61, 115.984, 38.93)),
-    "WA2_UNI": Vector((208.77, 89.96, 455.35)),
-    "WA2_FIS_HIRE_A": Vector((4.112, 18.661, 28.183)),
-    "WA2_SHIP_HO_A_skin": Vector((150.0, 112.432, 0.01)),
-    "WA2_SHIP_HO_B_skin": Vector((112.5, 67.432, 0.01)),
-    "WA2_LIGHTMAP_GRAD": Vector((1.0, 1.0, 0.01)),
-    "WA2_SNOW": Vector((1.0, 1.0, 0.01)),
-    "WA2_SUIMEN_TEST_HI_CONT": Vector((1.0, 1.0, 0.01)),
-    "WA2_SUIMEN_TEST_LOW_CONT": Vector((1.0, 1.0, 0.01)),
-    "WA2_ROPE_C_skin": Vector((1.0, 36.483, 96.034)),
-    "WA2_ROPE_D_skin": Vector((72.853, 59.562, 100.276)),
-    "WA2_ROPE_E_skin": Vector((1.0, 169.449, 216.637)),
-    "WA2_ROPE_F_skin": Vector((14.609, 146.277, 90.48)),
-    "WA2_ROPE_G_skin": Vector((12.726, 241.21, 56.682)),
-    "WA2_ROPE_H_skin": Vector((12.75, 218.177, 46.103)),
-    "WA2_ROPE_I_skin": Vector((20.604, 221.73, 113.025)),
-    "WA2_ROPE_J_skin": Vector((72.853, 109.049, 179.692)),
-    "WA2_IWAKABE_A": Vector((1987.296, 928.7, 2185.35)),
-    "WA2_IWAKABE_B": Vector((1397.56, 927.358, 1611.381)),
-    "WA2_IWAKABE_C": Vector((893.01, 600.632, 951.08)),
-    "WA2_IWAKABE_D": Vector((1379.347, 752.941, 936.273)),
-    "WA2_IWAKABE_E": Vector((1910.469, 909.274, 845.747)),
-    "WA2_SUNA_A": Vector((1992.629, 394.752, 2130.013)),
-    "WA2_SUNA_B": Vector((2356.6, 717.002, 2350.118)),
-    "WA2_FISH_LIP_DW": Vector((20.365, 8.384, 13.971)),
-    "WA2_FISH_LIP_UP": Vector((20.365, 15.35, 15.071)),
-    "WA2_FISH_HEAD": Vector((35.571, 40.303, 40.391)),
-    "WA2_FISH_O": Vector((12.413, 46.856, 30.423)),
-    "ELE_AMPLIFIER": Vector((287.732, 55.0, 87.097)),
-    "ELE_BATTERY": Vector((21.0, 68.6, 21.0)),
-    "ELE_BOTTOM_SPHERE": Vector((784.628, 255.395, 875.762)),
-    "ELE_BRIDGE": Vector((440.0, 4.5, 440.0)),
-    "ELE_BRIDGE_ARM": Vector((138.512, 99.227, 233.693)),
-    "ELE_CEILING": Vector((500.0, 65.0, 500.0)),
-    "ELE_CEIL_SPHERE": Vector((750.842, 186.432, 750.842)),
-    "ELE_CIRCUIT00Z": Vector((69.155, 100.0, 46.861)),
-    "ELE_CIRCUIT01Z": Vector((75.037, 100.0, 34.114)),
-    "ELE_HATCH": Vector((216.478, 113.778, 288.486)),
-    "ELE_MID_SPHERE": Vector((800.0, 100.0, 800.0)),
-    "ELE_PLUG": Vector((25.981, 80.5, 30.0)),
-    "ELE_REEL": Vector((52.5, 74.333, 52.5)),
-    "ELE_REEL_TURN": Vector((42.0, 50.0, 42.0)),
-    "ELE_SOCKET": Vector((87.5, 94.1, 87.5)),
-    "ELE_SPEAKER15Z": Vector((56.375, 118.072, 45.555)),
-    "ELE_SPEAKER30Z": Vector((114.83, 91.541, 86.185)),
-    "ELE_TRANSISTOR00Z": Vector((70.0, 106.0, 70.0)),
-    "ELE_VACUUMTUBE00Z": Vector((44.55, 55.267, 34.066)),
-    "ELE_VACUUMTUBE01Z": Vector((18.15, 38.842, 18.848)),
-    "ELE_VACUUMTUBE02Z": Vector((15.0, 20.0, 15.0)),
-    "ELE_WALL_PARTS00Z": Vector((127.064, 373.591, 156.072)),
-    "ELE_WALL_PARTS01": Vector((177.982, 323.591, 177.982)),
-    "ELE_GEAR00Z": Vector((303.349, 30.0, 140.819)),
-    "ELE_GEAR01Z": Vector((303.349, 30.0, 128.148)),
-    "ELE_TV_MONITOR": Vector((152.203, 100.258, 93.486)),
-    "ELE_WALL_PARTS02Z": Vector((156.072, 286.432, 182.042)),
-    "ELE_REEL_TURN1": Vector((42.0, 50.0, 42.0)),
-    "ELE_CLOUD_STAR_A": Vector((3915.111, 849.746, 1830.703)),
-    "ELE_SEIUN_A": Vector((9999.998, 5533.93, 6285.317)),
-    "ELE_STARS_A": Vector((147.862, 130.148, 0.5)),
-    "ELE_STAR_A": Vector((6428.79, 2412.64, 3501.818)),
-    "DOG_KIBAN_NOCOLI": Vector((1142.799, 150.0, 471.417)),
-    "GEAR_GROUND02": Vector((10111.082, 592.305, 3621.92)),
-    "GEAR_CATSLE00": Vector((5743.132, 2210.237, 2591.4)),
-    "GEAR_CATSLE01": Vector((2541.368, 1200.0, 2928.32)),
-    "GEAR_CHURCH": Vector((1680.0, 2030.0, 1140.181)),
-    "GEAR_GROUND03": Vector((3217.407, 592.305, 2012.463)),
-    "GEAR_CLTOWER_TOP": Vector((500.0, 1200.0, 500.0)),
-    "GEAR_CL_AXLE00": Vector((44.667, 145.87, 120.822)),
-    "GEAR_CL_WOOD00": Vector((375.0, 39.071, 450.0)),
-    "GEAR_CL_WOOD01": Vector((375.0, 804.386, 429.757)),
-    "GEAR_CL_AXLE01": Vector((85.647, 172.049, 205.867)),
-    "GEAR_CL_CLANEBASE": Vector((35.0, 255.0, 20.0)),
-    "GEAR_CL_COMPRESS01": Vector((80.0, 114.614, 80.0)),
-    "GEAR_CL_CONVEYOR00": Vector((25.0, 20.0, 442.5)),
-    "GEAR_CL_CONVEYOR01": Vector((336.0, 20.0, 25.0)),
-    "GEAR_CL_CONVEYOR02": Vector((25.0, 20.0, 330.0)),
-    "GEAR_CL_CONVEYOR03": Vector((25.0, 20.0, 273.0)),
-    "GEAR_CL_CONVEYOR04": Vector((322.75, 20.0, 25.0)),
-    "GEAR_CL_IN_WALL00": Vector((375.0, 210.386, 497.5)),
-    "GEAR_ARM00Z": Vector((10.0, 70.0, 13.625)),
-    "GEAR_CL_MAINBASE": Vector((103.75, 180.0, 189.0)),
-    "GEAR_CL_POWERUNIT00": Vector((30.0, 60.0, 53.167)),
-    "GEAR_LIFT00Z": Vector((20.0, 5.0, 20.0)),
-    "GEAR_ARM01Z": Vector((7.5, 22.0, 4.0)),
-    "GEAR_CL_RACK": Vector((20.0, 185.0, 175.0)),
-    "GEAR_CL_SAKU00": Vector((6.0, 26.0, 375.0)),
-    "GEAR_CL_SAKU01": Vector((136.719, 26.0, 6.0)),
-    "GEAR_SHRINE": Vector((2336.601, 1200.0, 2320.385)),
-    "GEAR_SKY": Vector((39899.992, 10913.04, 39899.992)),
-    "GEAR_SUN": Vector((2310.336, 1869.524, 1575.822)),
-    "GEAR_TEMPLE": Vector((990.08, 1560.0, 1395.904)),
-    "GEAR_TOWER00": Vector((770.534, 1800.0, 872.17)),
-    "GEAR_CL_STAIR00": Vector((12.0, 112.0, 269.75)),
-    "TES1_TOWER01": Vector((438.319, 1156.8, 438.326)),
-    "GEAR_BRIDGE00": Vector((2039.159, 705.0, 8046.948)),
-    "GEAR_BRIDGE01": Vector((1865.512, 705.0, 7008.263)),
-    "GEAR_GROUND00": Vector((34188.469, 40.0, 7932.738)),
-    "GEAR_GROUND01": Vector((34188.469, 40.0, 16044.338)),
-    "GEAR_HOUSE00Z": Vector((5866.479, 733.677, 1416.045)),
-    "GEAR_HOUSE01Z": Vector((4494.454, 733.677, 3932.267)),
-    "GEAR_HOUSE02Z": Vector((3503.49, 733.677, 2817.793)),
-    "GEAR_HOUSE03Z": Vector((3474.701, 733.677, 2765.147)),
-    "GEAR_HOUSE04Z": Vector((5880.377, 733.677, 5252.952)),
-    "GEAR_HOUSE05Z": Vector((6995.474, 833.677, 4276.188)),
-    "GEAR_HOUSE06Z": Vector((5869.814, 733.677, 3536.04)),
-    "GEAR_HOUSE07Z": Vector((6833.125, 733.677, 5854.419)),
-    "GEAR_HOUSE08Z": Vector((5192.524, 733.677, 3652.64)),
-    "GEAR_HOUSE09Z": Vector((5051.886, 733.677, 3424.069)),
-    "GEAR_HOUSE10Z": Vector((8668.506, 913.677, 3376.289)),
-    "GEAR_HOUSE11Z": Vector((7055.523, 733.677, 4077.245)),
-    "GEAR_HOUSE12Z": Vector((4148.486, 742.32, 3254.469)),
-    "GEAR_HOUSE13Z": Vector((2854.196, 815.394, 3103.553)),
-    "GEAR_HOUSE14Z": Vector((3189.954, 733.677, 2651.37)),
-    "GEAR_HOUSE15Z": Vector((2726.187, 733.677, 2835.679)),
-    "GEAR_HOUSE16Z": Vector((2956.235, 808.677, 1734.551)),
-    "GEAR_RIVER": Vector((36147.672, 0.01, 10190.565)),
-    "GEAR_RIVER_TEST": Vector((10.0, 10.0, 10.0)),
-    "GEAR_BELL": Vector((115.81, 117.08, 108.172)),
-    "GEAR_BELLTAMA": Vector((25.0, 63.907, 21.651)),
-    "GEAR_CL_STAIR01": Vector((270.0, 108.0, 20.0)),
-    "GEAR_CL_STAIR02": Vector((20.0, 152.0, 390.0)),
-    "GEAR_CL_STAIR03": Vector((292.0, 122.0, 12.0)),
-    "GEAR_CL_STAY00": Vector((150.647, 111.812, 113.375)),
-    "GEAR_CL_STAY01": Vector((71.75, 192.5, 100.0)),
-    "GEAR_CL_PUSH00": Vector((20.0, 23.5, 5.0)),
-    "GEAR_COMPRESS00": Vector((64.0, 120.0, 64.0)),
-    "GEAR_CRANE00Z": Vector((20.0, 142.5, 163.47)),
-    "GEAR_GEAR0LZ": Vector((158.631, 10.0, 158.631)),
-    "GEAR_GEAR0SZ": Vector((59.487, 59.487, 7.5)),
-    "GEAR_GEAR12Z": Vector((74.43, 74.43, 10.0)),
-    "GEAR_GEAR9Z": Vector((73.868, 72.746, 10.0)),
-    "GEAR_PARTS02Z": Vector((22.223, 40.0, 5.0)),
-    "GEAR_SKY_UP": Vector((33856.262, 3844.223, 33856.262)),
-    "GEAR_CLTOWER_BASE": Vector((625.0, 1200.0, 625.0)),
-    "GEAR_CLTOWER_BODY": Vector((500.0, 800.0, 517.0)),
-    "GEAR_CL_LIFT00Z": Vector((20.0, 5.0, 20.0)),
-    "GEAR_CL_POWERUNIT01Z": Vector((48.229, 31.167, 15.0)),
-    "GEAR_GROUND02_RACE": Vector((10111.082, 200.0, 3621.92)),
-    "ICE_BG": Vector((6400.0, 1775.469, 6400.0)),
-    "ICE_FLOAT": Vector((14.051, 15.181, 29.589)),
-    "ICE_FLOE_A": Vector((190.164, 125.241, 225.612)),
-    "ICE_FLOE_B": Vector((202.788, 57.968, 197.69)),
-    "ICE_FLOE_C": Vector((181.647, 76.312, 226.557)),
-    "ICE_FLOE_D": Vector((106.561, 68.113, 83.022)),
-    "ICE_FLOE_E": Vector((181.467, 154.999, 221.523)),
-    "ICE_FLOE_F": Vector((236.184, 10.0, 246.693)),
-    "ICE_FLOE_G": Vector((57.444, 10.0, 50.64)),
-    "ICE_FLOE_H": Vector((362.203, 9.517, 813.193)),
-    "ICE_FLOE_I": Vector((524.705, 10.0, 651.23)),
-    "ICE_FLOE_J": Vector((351.227, 13.299, 636.683)),
-    "ICE_FLOE_K": Vector((269.905, 18.636, 328.332)),
-    "ICE_FLOE_L": Vector((455.868, 6.0, 761.76)),
-    "ICE_FLOE_M": Vector((527.261, 6.0, 864.672)),
-    "ICE_FLOE_N": Vector((461.547, 6.0, 884.323)),
-    "ICE_FLOE_O": Vector((205.995, 6.0, 323.583)),
-    "ICE_FLOE_P": Vector((486.285, 6.0, 687.206)),
-    "ICE_FLOE_Q": Vector((535.692, 6.0, 582.258)),
-    "ICE_GROUND": Vector((2458.56, 204.831, 2500.0)),
-    "ICE_KEMU_A": Vector((923.741, 158.74, 500.449)),
-    "ICE_KEMU_B": Vector((500.449, 158.74, 923.741)),
-    "ICE_KEMU_C": Vector((923.741, 158.74, 500.449)),
-    "ICE_KEMU_D": Vector((500.449, 158.74, 923.741)),
-    "ICE_MIRROR_GROUND": Vector((2458.56, 204.832, 2500.0)),
-    "ICE_PENGUIN_0_BADY": Vector((0.547, 1.081, 0.703)),
-    "ICE_PENGUIN_180_BADY": Vector((0.547, 1.081, 0.703)),
-    "ICE_PENGUIN_270_BADY": Vector((0.703, 1.081, 0.547)),
-    "ICE_PENGUIN_90_BADY": Vector((0.703, 1.081, 0.547)),
-    "ICE_PENGUIN_BADY": Vector((0.547, 1.081, 0.703)),
-    "ICE_PENGUIN_W0_LEFT": Vector((0.316, 0.301, 0.18)),
-    "ICE_PENGUIN_W0_RIGHT": Vector((0.316, 0.301, 0.18)),
-    "ICE_PENGUIN_W180_LEFT": Vector((0.316, 0.301, 0.18)),
-    "ICE_PENGUIN_W180_RIGHT": Vector((0.316, 0.301, 0.18)),
-    "ICE_PENGUIN_W270_LEFT": Vector((0.18, 0.301, 0.316)),
-    "ICE_PENGUIN_W270_RIGHT": Vector((0.18, 0.301, 0.316)),
-    "ICE_PENGUIN_W90_LEFT": Vector((0.18, 0.301, 0.316)),
-    "ICE_PENGUIN_W90_RIGHT": Vector((0.18, 0.301, 0.316)),
-    "ICE_PENGUIN_W_LEFT": Vector((0.316, 0.301, 0.18)),
-    "ICE_PENGUIN_W_RIGHT": Vector((0.316, 0.301, 0.18)),
-    "ICE_SKY": Vector((3360.0, 1120.0, 3360.0)),
-    "ICE_SNOW_CRYSTAL_A": Vector((0.32, 4.825, 4.975)),
-    "ICE_SNOW_CRYSTAL_B": Vector((0.25, 5.089, 4.997)),
-    "ICE_WATER": Vector((3461.547, 340.514, 3363.79)),
-    "cyl41": Vector((540.711, 1.0, 321.87)),
-    "ICE_FLOAT_B": Vector((11.24, 10.65, 12.492)),
-    "ICE_FLOAT_C": Vector((11.24, 9.364, 12.492)),
-    "NOCOLI_ICE_SKY": Vector((776.059, 172.849, 776.059)),
-    "ICE_SKY_FUTI": Vector((840.0, 107.151, 840.0)),
-    "ICE_ST_PIN_NOCOLI": Vector((12.76, 0.1, 12.76)),
-    "JUN_BUTTERFLY": Vector((0.06, 0.181, 0.04)),
-    "JUN_BUTTERFLY1": Vector((0.04, 0.181, 0.06)),
-    "JUN_BUTTERFLY1_LEFT": Vector((0.187, 0.517, 0.286)),
-    "JUN_BUTTERFLY1_RIGHT": Vector((0.187, 0.517, 0.286)),
-    "JUN_BUTTERFLY_LEFT": Vector((0.286, 0.517, 0.187)),
-    "JUN_BUTTERFLY_RIGHT": Vector((0.286, 0.517, 0.187)),
-    "JUN_CLOUD00A_NOCOLI": Vector((242.732, 39.34, 84.137)),
-    "JUN_CLOUD00B_NOCOLI": Vector((84.137, 39.34, 242.732)),
-    "JUN_CLOUD00C_NOCOLI": Vector((242.732, 39.34, 84.137)),
-    "JUN_CLOUD00D_NOCOLI": Vector((84.137, 39.34, 242.732)),
-    "JUN_CLOUD01_NOCOLI": Vector((20.0, 1.576, 20.0)),
-    "JUN_FLOWER_NOCOLI": Vector((1.908, 1.903, 1.873)),
-    "JUN_GROUND_NOCOLI": Vector((2458.366, 148.171, 2458.365)),
-    "JUN_MAME_NOCOLI": Vector((14.142, 141.572, 14.745)),
-    "JUN_SKY_NOCOLI": Vector((350.0, 241.141, 350.0)),
-    "JUN_TREE_A_NOCOLI": Vector((2.585, 3.394, 2.651)),
-    "JUN_TREE_B_NOCOLI": Vector((4.023, 4.422, 3.743)),
-    "JUN_TREE_C_NOCOLI": Vector((2.585, 3.394, 2.651)),
-    "MOV_TENTO_ASI_NOCOLI": Vector((0.021, 0.31, 0.487)),
-    "MOV_TENTO_NOCOLI": Vector((0.2, 0.382, 0.4)),
-    "JUN_PIYO": Vector((0.239, 0.262, 0.298)),
-    "JUN_FIG_CLOUD_A": Vector((350.0, 25.0, 350.0)),
-    "JUN_GROUND_ADV": Vector((2448.14, 148.171, 2451.08)),
-    "JUN_GOL_SKY": Vector((2800.0, 723.422, 2799.999)),
-    "LAV_DRAGON_A": Vector((539.439, 567.761, 514.942)),
-    "LAV_FUNSUI_A": Vector((232.921, 233.066, 231.033)),
-    "LAV_DRAGON_LAVA_A_skin": Vector((212.665, 469.006, 108.328)),
-    "LAV_LAVA_A": Vector((5818.842, 246.465, 7189.086)),
-    "LAV_LAVA_B": Vector((1068.1, 1608.227, 791.02)),
-    "LAV_ROCK_A": Vector((593.498, 1296.46, 1630.997)),
-    "LAV_ROCK_B": Vector((3157.783, 2731.475, 3476.281)),
-    "LAV_ROCK_C": Vector((4647.551, 2737.388, 5641.903)),
-    "LAV_ROCK_D": Vector((3751.934, 2712.594, 2195.949)),
-    "LAV_ROCK_E": Vector((6631.959, 2547.697, 5239.476)),
-    "LAV_LAVA_C": Vector((1408.056, 1331.772, 1439.097)),
-    "LAV_YOUGAN_LIGHT_A": Vector((10.0, 10.0, 0.01)),
-    "LAV_LAVA_D": Vector((2539.267, 637.926, 4776.766)),
-    "LAV_LAVA_E": Vector((2204.166, 2241.006, 1507.73)),
-    "LAV_TENJO_A": Vector((5518.34, 2554.436, 6708.361)),
-    "LAV_HATAKE_A": Vector((449.607, 408.818, 608.46)),
-    "LAV_HATAKE_B": Vector((1219.548, 937.5, 963.519)),
-    "LAV_HATAKE_C": Vector((703.41, 804.48, 507.454)),
-    "LAV_HATAKE_D": Vector((1350.499, 851.867, 1503.425)),
-    "LAV_HATAKE_E": Vector((939.511, 976.1, 745.501)),
-    "LAV_LAVA_F": Vector((1039.675, 1759.512, 1489.846)),
-    "LAV_LAVA_G": Vector((2534.925, 1646.695, 2945.673)),
-    "LAV_ISEKI_A": Vector((2062.415, 763.031, 3360.123)),
-    "LAV_YOUGAN_INDMAP_A": Vector((10.0, 10.0, 0.01)),
-    "LAV_LAVA_FUNSUI_A": Vector((179.303, 77.948, 177.693)),
-    "LAV_FIRE_A": Vector((40.875, 86.1, 0.01)),
-    "LAV_TENJO_B": Vector((16753.93, 6267.219, 16753.928)),
-    "LAV_ROCK_F": Vector((2684.497, 2116.795, 1934.553)),
-    "LAV_FIRE_GROW_A": Vector((248.618, 292.637, 0.01)),
-    "MST_BACKGROUND_A": Vector((30000.0, 24406.605, 30000.0)),
-    "MST_BOTTOMCLOUD_A": Vector((25564.52, 4217.67, 25564.52)),
-    "MST_SPRA_CLOUD_A": Vector((250.0, 1290.0, 0.01)),
-    "MST_YOUSAI_WATER_A": Vector((1016.749, 0.838, 1032.433)),
-    "MST_ROLING_CLOUD_A": Vector((26220.0, 11570.678, 26220.0)),
-    "MST_MAME_TYPE_A": Vector((483.409, 2030.193, 643.376)),
-    "MST_MINI_CLOUD_A": Vector((250.0, 250.0, 0.01)),
-    "MST_MINI_CLOUD_B": Vector((250.0, 250.0, 0.01)),
-    "MST_MINI_CLOUD_C": Vector((250.0, 250.0, 0.01)),
-    "MST_PARADISE_A": Vector((2167.781, 1133.0, 2167.78)),
-    "MST_PARADISE_CLOUD_A": Vector((2418.416, 453.881, 1197.622)),
-    "MST_STG_CLOUD_A": Vector((10.0, 10.0, 0.01)),
-    "MST_ROLING_CLOUD_B": Vector((16559.973, 7731.638, 16559.977)),
-    "MST_CLOUD_GEN_A": Vector((211.242, 175.8, 214.501)),
-    "MST_CROUD_GEN_POLE_M": Vector((103.614, 1622.16, 103.614)),
-    "MST_CROUD_GEN_POLE_S": Vector((53.188, 954.896, 53.188)),
-    "MST_YOUSAI_WATER_B": Vector((1016.749, 0.838, 1032.433)),
-    "MST_CLOUD_GEN_B": Vector((211.242, 173.2, 214.501)),
-    "MST_MAME_TYPE_B": Vector((275.596, 1835.998, 263.959)),
-    "MST_MAME_TYPE_C": Vector((506.643, 1068.903, 643.376)),
-    "MST_MAME_TYPE_D": Vector((500.052, 505.98, 377.431)),
-    "MST_PARADISE_CLOUD_B": Vector((2418.416, 453.881, 1197.622)),
-    "MST_TSUTA_TYPE_A": Vector((424.706, 742.831, 485.352)),
-    "MST_TSUTA_TYPE_B": Vector((415.835, 1847.621, 421.673)),
-    "MST_PARADISE_B": Vector((1678.184, 431.0, 1678.184)),
-    "MST_PARADISE_C": Vector((1312.5, 1312.5, 0.01)),
-    "MST_YOUSAI_WATER_C": Vector((1016.749, 60.305, 1032.433)),
-    "MST_YOUSAI_WATER_SPEC": Vector((10.0, 10.0, 0.01)),
-    "PAR_TENT": Vector((2265.702, 270.655, 2520.958)),
-    "PAR_ANA": Vector((831.6, 1425.0, 831.6)),
-    "PAR_CASTLE": Vector((850.041, 400.0, 832.543)),
-    "PAR_CREAM": Vector((74.077, 110.59, 70.019)),
-    "PAR_FERRIS_WHEEL": Vector((225.0, 235.0, 56.0)),
-    "PAR_GROUND": Vector((1537.684, 342.0, 2290.459)),
-    "PAR_TOWN_A": Vector((455.416, 273.0, 1003.019)),
-    "PAR_MONO_CAR_A": Vector((17.578, 10.125, 10.125)),
-    "PAR_MONO_CAR_B": Vector((16.875, 10.125, 10.125)),
-    "PAR_MONO_CAR_C": Vector((17.578, 10.125, 10.125)),
-    "PAR_MONO_RAIL": Vector((1857.044, 473.018, 2394.796)),
-    "PAR_OCC_DEADTREE": Vector((930.664, 386.021, 941.395)),
-    "PAR_OCC_GATE": Vector((276.382, 138.754, 678.067)),
-    "PAR_OCC_GROUND": Vector((1440.001, 480.026, 2880.0)),
-    "PAR_OCC_MANSION": Vector((294.246, 432.0, 565.744)),
-    "PAR_OCC_NEEDLE": Vector((273.839, 427.541, 1967.123)),
-    "PAR_PALM_A": Vector((669.688, 264.271, 325.106)),
-    "PAR_TOWN_B": Vector((686.669, 153.0, 1064.787)),
-    "PAR_PLANE": Vector((384.858, 162.144, 392.853)),
-    "PAR_RIBBON": Vector((9.0, 48.75, 225.0)),
-    "PAR_SIGN": Vector((394.144, 54.0, 762.3)),
-    "PAR_PLANE_HANE": Vector((79.288, 79.759, 10.106)),
-    "PAR_SPACE_AREA": Vector((750.696, 546.0, 849.499)),
-    "PAR_STAR_A": Vector((80.0, 80.0, 80.0)),
-    "PAR_STAR_B": Vector((30.0, 30.0, 30.0)),
-    "PAR_STAR_C": Vector((30.0, 30.0, 30.0)),
-    "PAR_USA_AREA": Vector((326.828, 391.31, 404.876)),
-    "PAR_VEHICLE": Vector((120.0, 30.2, 120.0)),
-    "PAR_SKY_A": Vector((4242.64, 878.68, 4242.64)),
-    "PAR_BASKET_A": Vector((30.0, 30.0, 22.0)),
-    "PAR_BASKET_B": Vector((30.0, 30.0, 22.0)),
-    "PAR_SKY_B": Vector((1500.0, 2121.32, 4242.64)),
-    "PAR_RING_A": Vector((136.0, 13.856, 136.0)),
-    "PAR_RING_B": Vector((189.0, 7.794, 189.0)),
-    "PAR_TOGE_A": Vector((64.302, 55.688, 11.48)),
-    "PAR_TOGE_B": Vector((45.018, 38.987, 8.037)),
-    "PAR_TOGE_C": Vector((64.302, 55.688, 11.48)),
-    "PAR_TOGE_D": Vector((45.012, 38.982, 8.036)),
-    "PAR_WHEEL": Vector((355.0, 355.0, 60.0)),
-    "PAR_SKY_C": Vector((4242.64, 2121.32, 1500.0)),
-    "PAR_SKY_D": Vector((3847.748, 2121.32, 4367.254)),
-    "PAR_SKY_E": Vector((4242.64, 2121.32, 1500.0)),
-    "PAR_PIKA": Vector((0.01, 127.8, 162.0)),
-    "POD_KAMADO_A": Vector((612.285, 151.787, 559.003)),
-    "POD_MAKI_A": Vector((308.588, 312.0, 366.426)),
-    "POD_MOUNTAIN_A": Vector((30447.299, 7400.602, 18681.328)),
-    "POD_POD_AWA_A": Vector((283.303, 57.282, 277.529)),
-    "POD_POD_A": Vector((571.791, 181.895, 356.225)),
-    "POD_ROCK_A": Vector((4154.791, 237.965, 4362.195)),
-    "POD_ROCK_B": Vector((14548.626, 3207.957, 18260.793)),
-    "POD_ROCK_C": Vector((23901.943, 9176.5, 17332.221)),
-    "POD_SHINDEN_A": Vector((3834.815, 3239.048, 4889.823)),
-    "POD_SHINDEN_B": Vector((3834.815, 3239.048, 3005.377)),
-    "POD_SHOKUDAI_A": Vector((70.216, 444.0, 68.041)),
-    "POD_SPIA_A": Vector((83.002, 622.685, 35.374)),
-    "POD_TABLE_A": Vector((835.576, 136.481, 769.041)),
-    "POD_TENT_A": Vector((1804.362, 1272.561, 1809.621)),
-    "POD_TREE_A": Vector((10515.069, 10804.27, 6635.48)),
-    "POD_TREE_B": Vector((9773.479, 9170.721, 3280.933)),
-    "POD_TREE_C": Vector((5667.905, 8879.501, 5247.083)),
-    "POD_TUBO_A": Vector((157.643, 251.954, 123.475)),
-    "POD_TUBO_B": Vector((119.523, 127.954, 118.744)),
-    "POD_GLASS_A": Vector((3757.841, 835.921, 4084.807)),
-    "POD_YAGURA_A": Vector((565.017, 1006.108, 532.829)),
-    "POD_SKY_A": Vector((37326.789, 18136.141, 37326.789)),
-    "POD_GLASS_B": Vector((4328.878, 469.774, 2506.099)),
-    "POD_GLASS_C": Vector((2338.734, 126.723, 1684.048)),
-    "POD_RENZ_FREA_A": Vector((10.0, 10.0, 0.01)),
-    "POD_YUGE_A": Vector((10.0, 10.0, 0.01)),
-    "POD_SUN_A": Vector((6197.074, 2114.08, 5808.376)),
-    "POD_GLASS_D": Vector((3318.769, 181.32, 1907.074)),
-    "POD_GLASS_E": Vector((2724.391, 1314.75, 11359.051)),
-    "POD_GLASS_F": Vector((3270.448, 1063.509, 3482.715)),
-    "POD_LEAVES_A_skin": Vector((16009.596, 9904.054, 14287.744)),
-    "POD_MOUNTAIN_B": Vector((27257.51, 8313.269, 22126.16)),
-    "POD_POD_NINJIN_A": Vector((64.555, 177.258, 40.856)),
-    "POD_POD_TAMANEGI_A": Vector((81.138, 69.882, 81.138)),
-    "POD_SHINDEN_C": Vector((3214.19, 3235.048, 4889.823)),
-    "POD_POD_SUIMEN_A": Vector((304.836, 21.639, 302.297)),
-    "POD_FIRE_A": Vector((61.312, 129.15, 0.01)),
-    "POD_FIRE_POWDER_A": Vector((83.85, 83.7, 0.01)),
-    "POD_FISH_BOW_A": Vector((65.88, 4.914, 4.914)),
-    "POD_SHOKUDAI_B": Vector((89.713, 138.105, 77.158)),
-    "POD_POD_FISH_A": Vector((148.025, 67.617, 20.245)),
-    "POD_AXE_A": Vector((112.854, 419.298, 28.14)),
-    "POD_GLASS_G": Vector((5882.95, 4190.167, 6048.86)),
-    "POD_GLASS_H": Vector((9802.542, 3237.889, 4151.939)),
-    "POD_GLASS_I": Vector((5662.785, 411.884, 5241.936)),
-    "POD_GLASS_J": Vector((6060.859, 182.425, 3955.793)),
-    "POD_GLASS_K": Vector((1164.358, 94.915, 614.532)),
-    "POD_GLASS_L": Vector((1560.969, 81.293, 1010.79)),
-    "POD_POD_FIRE_A": Vector((416.489, 58.647, 412.56)),
-    "POD_POD_FIRE_B": Vector((416.489, 69.027, 412.56)),
-    "POD_SUIJOKI_A": Vector((10.0, 10.0, 0.01)),
-    "POD_SUIJOKI_B": Vector((10.0, 10.0, 0.01)),
-    "POD_FISH_FIRE_A": Vector((110.195, 68.816, 10.721)),
-    "POD_MIZUSHIBUKI_A": Vector((10.0, 20.0, 0.01)),
-    "POD_MIZUSHIBUKI_B": Vector((10.0, 10.0, 0.01)),
-    "POD_YAGURA_FLAG_A": Vector((135.442, 105.58, 110.439)),
-    "POD_SANSHO_A": Vector((10.0, 10.0, 0.01)),
-    "POD_SHADOWMAKE_A": Vector((10.0, 10.0, 0.01)),
-    "POD_SHADOWMAKE_B": Vector((10.0, 10.0, 0.01)),
-    "SHIMMER_GRAD": Vector((1.0, 1.0, 0.01)),
-    "SND_FUNSUI_A": Vector((47.497, 21.258, 48.548)),
-    "SND_FUNSUI_DOWN_TATE": Vector((25.503, 2.089, 25.503)),
-    "SND_FUNSUI_DOWN_YOKO": Vector((31.975, 0.15, 35.95)),
-    "SND_FUNSUI_GRAD_A": Vector((5.001, 5.001, 0.01)),
-    "SND_FUNSUI_IND_A": Vector((5.001, 5.001, 0.01)),
-    "SND_FUNSUI_UP_TATE": Vector((10.259, 1.426, 10.259)),
-    "SND_FUNSUI_UP_YOKO": Vector((14.664, 0.15, 16.487)),
-    "SND_FUNSUI_WATER_A": Vector((25.25, 8.375, 25.25)),
-    "SND_FUNSUI_WATER_A_URA": Vector((25.25, 8.375, 25.25)),
-    "SND_FUNSUI_WATER_B": Vector((46.346, 136.925, 41.556)),
-    "SND_FUNSUI_WATER_B_URA": Vector((46.346, 136.925, 41.556)),
-    "SND_KAGE_LOW_MAP_A": Vector((5.001, 5.001, 0.01)),
-    "SND_PIRAM_CLOUD_A": Vector((3626.71, 298.4, 3425.41)),
-    "SND_PIRAM_CLOUD_B": Vector((2915.962, 20.0, 2915.962)),
-    "SND_POLE_A": Vector((87.484, 87.784, 88.293)),
-    "SND_POLE_B": Vector((119.938, 87.794, 150.46)),
-    "SND_POLE_BASE_A": Vector((228.423, 29.663, 78.423)),
-    "SND_POLE_C": Vector((408.793, 136.727, 115.394)),
-    "SND_POLE_D": Vector((237.688, 102.838, 105.598)),
-    "SND_POLE_E": Vector((319.52, 87.937, 89.561)),
-    "SND_PYRAMID_A": Vector((1060.129, 678.465, 1060.129)),
-    "SND_PYRAMID_B": Vector((309.386, 117.242, 324.386)),
-    "SND_PYRAMID_C": Vector((528.936, 117.242, 202.693)),
-    "SND_PYRAMID_D": Vector((243.0, 184.68, 243.0)),
-    "SND_SABAKU_BASE_A": Vector((2626.244, 192.166, 2936.236)),
-    "SND_SABAKU_MAIN_A": Vector((7302.752, 1136.85, 7252.412)),
-    "SND_SAKYU_A": Vector((4244.446, 576.72, 3618.892)),
-    "SND_SAKYU_B": Vector((2546.641, 826.2, 5941.881)),
-    "SND_SAKYU_C": Vector((4101.904, 720.9, 7655.87)),
-    "SND_SAKYU_D": Vector((9514.679, 865.08, 4365.339)),
-    "SND_SAKYU_E": Vector((7187.262, 1009.26, 6676.558)),
-    "SND_SAKYU_F": Vector((8665.975, 1239.3, 6001.049)),
-    "SND_SAKYU_G": Vector((12286.021, 1858.95, 10783.17)),
-    "SND_SAKYU_H": Vector((9151.982, 1652.4, 12949.668)),
-    "SND_SAKYU_I": Vector((10974.521, 2065.5, 12195.084)),
-    "SND_SAKYU_J": Vector((7639.919, 2162.7, 17825.641)),
-    "SND_SANDSTORM_A": Vector((7887.612, 1315.107, 7887.611)),
-    "SND_SKY": Vector((36450.047, 18066.834, 36450.039)),
-    "SND_WOODS_A": Vector((2526.147, 493.601, 1730.987)),
-    "SND_WOODS_B": Vector((2484.565, 492.48, 3189.151)),
-    "SND_WOODS_C": Vector((2527.514, 483.435, 2404.127)),
-    "SND_WOODS_D": Vector((2104.777, 493.29, 1595.819)),
-    "SND_PYRAMID_E": Vector((1271.607, 118.081, 1331.607)),
-    "SND_SABAKU_BASE_B": Vector((2084.514, 50.0, 2614.224)),
-    "SND_RACEGATE_A": Vector((37.44, 12.856, 5.524)),
-    "SAN_START_SIGN": Vector((9.842, 2.532, 5.67)),
-    "polyshadow01_emit": Vector((2.0, 2.0, 0.01)),
-    "SPA_BACKGROUND": Vector((8999.999, 9000.0, 8999.999)),
-    "SPA_DOSEI": Vector((1600.282, 800.0, 1600.0)),
-    "SPA_DOSEI_RING_L1": Vector((0.001, 5599.516, 5599.517)),
-    "SPA_INSEKI_A": Vector((18.645, 6.7, 12.655)),
-    "SPA_INSEKI_B": Vector((17.433, 6.3, 12.225)),
-    "SPA_INSEKI_C": Vector((11.431, 6.3, 15.147)),
-    "SPA_INSEKI_D": Vector((14.247, 5.5, 11.003)),
-    "SPA_JINKOU_EISEI_A": Vector((370.0, 132.202, 75.931)),
-    "SPA_MOKUSEI_CLOUD": Vector((1687.5, 2124.257, 2922.836)),
-    "SPA_MOKUSEI_HINODE": Vector((419.231, 719.446, 2301.121)),
-    "SPA_MOKUSEI_JIMEN": Vector((1687.5, 2124.257, 2922.836)),
-    "SPA_ROCKET": Vector((53.72, 134.8, 47.2)),
-    "SPA_STARS_A": Vector((3098.386, 2615.298, 0.01)),
-    "SPA_STARS_B": Vector((4313.634, 3295.534, 0.001)),
-    "SPA_STARS_C": Vector((4548.016, 4117.849, 0.01)),
-    "SPA_YOUSAI_ARM": Vector((216.228, 256.329, 40.0)),
-    "SPA_YOUSAI_ARM_YER": Vector((47.554, 135.022, 18.256)),
-    "SPA_YOUSAI_CORE": Vector((78.463, 214.894, 78.463)),
-    "SPA_YOUSAI_LIGHT_BLUE_D": Vector((154.475, 19.2, 154.475)),
-    "SPA_YOUSAI_LIGHT_GREEN_U1": Vector((37.5, 37.5, 0.01)),
-    "SPA_YOUSAI_LIGHT_RED_D1": Vector((30.0, 30.0, 0.01)),
-    "SPA_YOUSAI_LIGHT_RED_U1": Vector((30.0, 30.0, 0.01)),
-    "SPA_YOUSAI_RING_DOWN": Vector((177.704, 26.0, 157.592)),
-    "SPA_YOUSAI_RING_UP": Vector((206.998, 30.0, 206.998)),
-    "SPA_DOSEI_IND_MAP": Vector((30.0, 30.0, 0.01)),
-    "SPA_ROCKET_109_L": Vector((9.226, 29.428, 6.799)),
-    "SPA_ROCKET_109_R": Vector((9.226, 29.428, 6.799)),
-    "SPA_ROCKET_109_L_LOW": Vector((6.708, 29.428, 6.16)),
-    "SPA_ROCKET_109_R_LOW": Vector((6.708, 29.428, 6.16)),
-    "SPA_CORO_ARM_A": Vector((193.032, 135.311, 31.4)),
-    "SPA_CORO_CENTRE_A": Vector((56.973, 21.017, 56.851)),
-    "SPA_CORO_CENTRE_B": Vector((61.966, 33.649, 62.226)),
-    "SPA_CORO_DOME_A": Vector((150.119, 17.978, 148.69)),
-    "SPA_CORO_RING_A": Vector((165.268, 36.117, 150.351)),
-    "SPA_CORO_RING_B": Vector((72.138, 17.736, 86.819)),
-    "SPA_CORO_RING_C": Vector((217.749, 6.232, 222.827)),
-    "SPA_STAR_A": Vector((6428.79, 3090.151, 6041.089)),
-    "SPA_STAR_B": Vector((4355.29, 235.127, 4327.19)),
-    "SPA_ARROW_A": Vector((4.447, 0.01, 3.965)),
-    "SPA_ARROW_B": Vector((4.445, 0.01, 4.558)),
-    "SPA_CORO_LAMP_A": Vector((63.0, 59.551, 19.4)),
-    "SPA_CLOUD_STAR_A": Vector((3915.111, 1340.826, 3679.132)),
-    "SPA_CORO_SHADOW_A": Vector((372.009, 99.1, 372.009)),
-    "SPA_CORO_LAMP_B": Vector((44.371, 84.506, 44.134)),
-    "SPA_CORO_LAMP_C": Vector((5.113, 1.679, 4.998)),
-    "SPA_CORO_TOWN_A": Vector((28.215, 17.902, 40.4)),
-    "SPA_CORO_TOWN_B": Vector((38.84, 19.85, 31.712)),
-    "SPA_CORO_SHADOW_BOX_vtx": Vector((391.536, 107.4, 391.536)),
-    "SPA_CORO_LAMP_D": Vector((3.292, 3.047, 3.216)),
-    "SPA_CORO_GARDEN_C": Vector((37.094, 11.549, 38.532)),
-    "SPA_CORO_DOME_BOX": Vector((141.053, 18.65, 141.053)),
-    "SPA_CORO_DOME_SPEC_A": Vector((139.415, 24.044, 138.088)),
-    "SPA_SEIUN_A": Vector((9999.998, 13311.703, 11075.398)),
-    "SPA_CORO_DOME_BOX_B": Vector((54.5, 4.6, 54.5)),
-    "SPA_CORO_DOME_BOX_C": Vector((47.633, 4.33, 47.633)),
-    "SPA_CORO_DOME_SPEC_B": Vector((36.445, 3.901, 36.469)),
-    "SPA_CORO_DOME_SPEC_C": Vector((33.878, 6.6, 33.884)),
-    "SPA_ARROW_C": Vector((3.91, 0.01, 4.604)),
-    "SPA_TOPLIGHT_A": Vector((11.136, 5.093, 12.317)),
-    "SPA_CORO_GARDEN_A": Vector((67.734, 11.585, 68.592)),
-    "SPA_ARROW_D": Vector((85.065, 0.01, 83.672)),
-    "SPA_ARROW_E": Vector((79.811, 0.01, 78.738)),
-    "SPA_ARROW_F": Vector((2.232, 2.83, 3.01)),
-    "SPA_ARROW_G": Vector((2.851, 2.83, 2.84)),
-    "SPA_ARROW_H": Vector((3.123, 2.83, 2.324)),
-    "SPA_BEAM_A": Vector((99.759, 33.65, 99.759)),
-    "SPA_CORO_GARDEN_B": Vector((36.368, 11.364, 36.907)),
-    "SUN_CASTLE": Vector((100.0, 57.775, 100.4)),
-    "SUN_CASTLE_KUSA": Vector((87.321, 40.905, 95.134)),
-    "SUN_CLOUD_A": Vector((1400.0, 5.6, 1400.0)),
-    "SUN_GROUND": Vector((3375.0, 202.0, 3375.0)),
-    "SUN_HS_HEMU": Vector((2.0, 1.0, 0.01)),
-    "SUN_ROCK_A": Vector((177.56, 127.651, 74.866)),
-    "SUN_ROCK_B": Vector((66.908, 125.558, 107.741)),
-    "SUN_ROCK_C": Vector((106.713, 131.14, 60.29)),
-    "SUN_ROCK_D": Vector((95.68, 97.91, 72.655)),
-    "SUN_ROCK_E": Vector((79.962, 131.474, 217.135)),
-    "SUN_ROCK_F": Vector((99.936, 127.695, 119.021)),
-    "SUN_ROCK_G": Vector((82.746, 129.996, 44.492)),
-    "SUN_ROCK_H": Vector((95.68, 97.91, 72.655)),
-    "SUN_ROCK_I": Vector((63.665, 128.992, 66.129)),
-    "SUN_ROCK_J": Vector((50.932, 98.625, 52.904)),
-    "SUN_ROCK_K": Vector((61.99, 130.463, 65.093)),
-    "SUN_ROCK_L": Vector((95.68, 97.91, 72.655)),
-    "SUN_SKY": Vector((1000.0, 597.545, 1000.0)),
-    "SUN_17_CLOUD": Vector((1400.0, 5.6, 1400.0)),
-    "SKY_OUT_A": Vector((1000.499, 288.887, 1000.499)),
-    "SKY_OUT_B": Vector((1000.499, 288.887, 1000.499)),
-    "SKY_OUT_C": Vector((1000.499, 288.887, 1000.499)),
-    "SKY_OUT_D": Vector((1000.499, 288.887, 1000.499)),
-    "WAT_BACKGROUND": Vector((1657.948, 808.596, 1657.948)),
-    "WAT_BUBBLE_A": Vector((1.0, 1.0, 0.01)),
-    "WAT_GROWLIGHT_A": Vector((49.593, 8.955, 7.92)),
-    "WAT_LIGHTCHAIN_A": Vector((63.774, 29.403, 5.0)),
-    "WAT_LIGHTCHAIN_B": Vector((67.643, 15.772, 5.0)),
-    "WAT_LIGHTCHAIN_C": Vector((63.774, 29.403, 5.0)),
-    "WAT_LIGHTCHAIN_D": Vector((67.643, 15.772, 5.0)),
-    "WAT_LIGHTCHAIN_E": Vector((77.266, 29.403, 5.347)),
-    "WAT_LIGHTCHAIN_F": Vector((77.266, 29.403, 5.347)),
-    "WAT_LIGHTMAP": Vector((1.0, 1.0, 0.01)),
-    "WAT_LIGHTMAP_GRAD": Vector((1.0, 1.0, 0.01)),
-    "WAT_LIGHTMAP_STAGE": Vector((1.0, 1.0, 0.01)),
-    "WAT_LONG_CHAIN": Vector((46.834, 12.587, 3.378)),
-    "WAT_PLANT_A": Vector((29.998, 23.893, 27.864)),
-    "WAT_PLANT_B": Vector((28.276, 4.438, 28.502)),
-    "WAT_PLANT_C": Vector((24.928, 4.103, 24.482)),
-    "WAT_PLANT_D": Vector((26.234, 0.01, 26.234)),
-    "WAT_PLANT_E": Vector((41.152, 161.796, 33.669)),
-    "WAT_PLANT_F": Vector((43.6, 161.796, 33.669)),
-    "WAT_PLANT_G": Vector((41.194, 161.796, 33.669)),
-    "WAT_ROCK_A": Vector((836.09, 143.411, 581.928)),
-    "WAT_ROCK_B": Vector((704.072, 145.0, 458.124)),
-    "WAT_ROCK_C": Vector((311.348, 112.67, 824.777)),
-    "WAT_SANSYO_TEX_WATER": Vector((1.0, 1.0, 0.01)),
-    "WAT_SUB": Vector((58.875, 43.7, 27.129)),
-    "WAT_SUB_SUKRYU": Vector((4.844, 10.253, 9.68)),
-    "WAT_SUIMEN": Vector((2969.299, 18.16, 2969.299)),
-    "WAT_SUIMEN_LIGHT": Vector((542.157, 11.006, 542.157)),
-    "WAT_SUIMEN_MAT_ONLY": Vector((2969.299, 18.16, 2969.299)),
-    "WAT_SUIMEN_TEST_HI_CONT": Vector((1.0, 1.0, 0.01)),
-    "WAT_SUIMEN_TEST_LOW_CONT": Vector((1.0, 1.0, 0.01)),
-    "WAT_UKIWA": Vector((43.966, 4.76, 43.966)),
-    "WAT_WATERBOWL_A": Vector((249.5, 134.24, 249.5)),
-    "WAT_WATERBOWL_B": Vector((249.5, 134.24, 249.5)),
-    "WAT_WATERBOWL_C": Vector((249.5, 134.24, 249.5)),
-    "WAT_WATERBOWL_D": Vector((249.5, 134.24, 249.5)),
-    "WAT_WATERLIGHT_A": Vector((2.0, 3.0, 0.01)),
-    "WAT_WEED_A": Vector((28.75, 262.0, 0.01)),
-    "WAT_WEED_B": Vector((25.0, 195.0, 0.01)),
-    "WAVE_BALL_A": Vector((400.0, 400.0, 400.0)),
-    "WHA_BALL_A_ltmp": Vector((570.898, 297.16, 570.898)),
-    "WHA_BIL_A": Vector((429.0, 360.0, 349.0)),
-    "WHA_BIL_B": Vector((65.625, 320.0, 60.0)),
-    "WHA_BIL_C": Vector((146.0, 816.0, 80.0)),
-    "WHA_BIL_D": Vector((100.0, 296.0, 80.0)),
-    "WHA_BIL_E": Vector((100.0, 370.0, 80.0)),
-    "WHA_BLIDGE_A": Vector((1050.0, 58.452, 47.524)),
-    "WHA_BLIDGE_POLE_A": Vector((40.72, 81.935, 44.515)),
-    "WHA_BODY_A": Vector((5243.276, 3486.943, 6000.001)),
-    "WHA_BODY_A_ltmp": Vector((5238.364, 2324.488, 4499.156)),
-    "WHA_BODY_B": Vector((5078.015, 4267.962, 13248.6)),
-    "WHA_BODY_B_ltmp": Vector((5238.364, 2324.486, 2999.634)),
-    "WHA_BODY_C_ltmp": Vector((3170.099, 1859.34, 5964.021)),
-    "WHA_BONE_A": Vector((5243.277, 2943.486, 12128.077)),
-    "WHA_BONE_A_ltmp": Vector((3495.517, 1896.973, 3129.904)),
-    "WHA_BONE_B_ltmp": Vector((5243.277, 2385.913, 3238.157)),
-    "WHA_BONE_C_ltmp": Vector((2621.638, 1664.394, 3257.981)),
-    "WHA_CAR_A": Vector((14.184, 9.773, 39.861)),
-    "WHA_CAR_B": Vector((15.119, 11.558, 41.864)),
-    "WHA_CAR_C": Vector((13.083, 15.767, 37.858)),
-    "WHA_HARABONE_A": Vector((4273.249, 2015.543, 12197.266)),
-    "WHA_IN_LIGHT_A": Vector((10.0, 10.0, 0.01)),
-    "WHA_LIGHTBALL_A": Vector((381.541, 494.702, 252.223)),
-    "WHA_LIGHTMAP_A": Vector((10.0, 10.0, 0.01)),
-    "WHA_MOUTH_A": Vector((3061.786, 1427.539, 2570.746)),
-    "WHA_MOUTH_B": Vector((3061.786, 1427.54, 2570.746)),
-    "WHA_ROAD_A": Vector((188.098, 46.29, 1156.413)),
-    "WHA_ROAD_B": Vector((200.023, 533.654, 580.778)),
-    "WHA_ROPE_A": Vector((2809.548, 802.309, 28.284)),
-    "WHA_SEBONE_A": Vector((1073.725, 1259.013, 10502.87)),
-    "WHA_SKY_A": Vector((26488.199, 5773.377, 12921.168)),
-    "WHA_SKY_B": Vector((2185.972, 314.395, 2185.972)),
-    "WHA_TOWN_A": Vector((682.193, 1074.16, 726.876)),
-    "WHA_TOWN_B": Vector((682.193, 1074.16, 726.876)),
-    "WHA_TOWN_C": Vector((484.265, 959.52, 499.679)),
-    "WHA_TOWN_LOW_A": Vector((682.193, 1045.16, 726.876)),
-    "WHA_WAVE_A_skin": Vector((5449.012, 0.01, 16932.164)),
-    "WHA_WAVE_HIGHLIGHT_A": Vector((4715.561, 117.0, 9074.948)),
-    "WHA_WAVE_PAT_A": Vector((10.0, 10.0, 0.01)),
-    "WHA_WAVE_PAT_B": Vector((10.0, 10.0, 0.01)),
-    "WHA_WAVE_PAT_C": Vector((10.0, 10.0, 0.01)),
-    "WHA_WAVE_SPEC_A": Vector((10.0, 10.0, 0.01)),
-    "WHA_CAP_A": Vector((668.72, 661.549, 727.239)),
-    "BUB_FENCE": Vector((5904.9, 426.465, 65.61)),
-    "BUB_BARN": Vector((706.1, 475.672, 706.1)),
-    "BUB_HOUSE": Vector((3332.988, 650.331, 4645.188)),
-    "BUB_PARTITION": Vector((1335.163, 360.855, 32.805)),
-    "BUB_POLE": Vector((2310.317, 671.3, 2580.157)),
-    "BUB_ROOF": Vector((1443.42, 918.934, 1497.22)),
-    "BUB_SPA": Vector((1797.729, 443.728, 1722.213)),
-    "BUB_TAP": Vector((282.746, 346.872, 264.168)),
-    "BUB_FAR_HOUSE_A": Vector((5908.037, 1690.531, 8185.496)),
-    "BUB_WALL": Vector((5576.849, 406.782, 8529.299)),
-    "BUB_WASH": Vector((336.78, 270.0, 201.55)),
-    "BUB_BUBBLE": Vector((25.0, 25.0, 0.01)),
-    "BUB_FAR_HOUSE_B": Vector((7928.354, 1051.656, 6178.808)),
-    "BUB_FAR_HOUSE_C": Vector((2351.046, 1014.319, 1925.85)),
-    "BUB_GROUND_A": Vector((6248.8, 407.65, 8529.299)),
-    "BUB_GROUND_B": Vector((984.149, 735.205, 6232.949)),
-    "BUB_GROUND_C": Vector((3330.896, 752.335, 2313.03)),
-    "BUB_GROUND_D": Vector((1640.249, 381.598, 656.1)),
-    "BUB_HEDGE_A": Vector((162.843, 667.476, 1133.949)),
-    "BUB_HEDGE_B": Vector((162.843, 785.68, 1133.949)),
-    "BUB_HEDGE_C": Vector((162.843, 686.727, 1133.949)),
-    "BUB_HEDGE_D": Vector((162.843, 785.68, 1133.949)),
-    "BUB_HEDGE_E": Vector((5860.303, 796.091, 3004.249)),
-    "BUB_HEDGE_F": Vector((645.0, 610.173, 3317.2)),
-    "BUB_HEDGE_G": Vector((2978.0, 613.987, 3257.2)),
-    "BUB_KAGO": Vector((117.539, 50.0, 143.654)),
-    "BUB_TOWER": Vector((2996.023, 1034.673, 6580.87)),
-    "BUB_TREE_A": Vector((196.284, 628.581, 320.782)),
-    "BUB_TREE_B": Vector((347.14, 587.5, 233.846)),
-    "BUB_TREE_C": Vector((283.623, 628.581, 243.614)),
-    "BUB_URA_DOOR": Vector((2700.787, 610.173, 1558.914)),
-    "BUB_WASH_TIMER": Vector((20.0, 6.0, 20.0)),
-    "BUB_WASH_TS": Vector((81.033, 52.645, 66.006)),
-    "BUB_WASH_TW": Vector((65.638, 12.858, 37.405)),
-    "BUB_BUTTERFLY_DOU": Vector((1.21, 5.425, 1.79)),
-    "BUB_WASH_SHEET_skin": Vector((15.084, 248.678, 318.654)),
-    "BUB_WASH_SKIRT_skin": Vector((19.1, 146.289, 79.045)),
-    "BUB_WASH_TOWEL_A_skin": Vector((15.084, 181.5, 112.09)),
-    "BUB_WASH_TOWEL_B_skin": Vector((15.084, 181.5, 112.09)),
-    "BUB_WASH_TOWEL_C_skin": Vector((15.084, 181.5, 112.09)),
-    "BUB_WASH_TOWEL_D_skin": Vector((15.084, 140.153, 96.022)),
-    "BUB_WASH_T_SHIRT_skin": Vector((17.929, 127.72, 177.284)),
-    "BUB_BUTTERFLY_LEFT": Vector((5.594, 15.498, 8.586)),
-    "BUB_BUTTERFLY_RIGHT": Vector((5.594, 15.498, 8.586)),
-    "BUB_YUGE_YUKIO": Vector((10.0, 10.0, 0.01)),
-    "BUB_AWAWA": Vector((234.0, 80.632, 191.562)),
-    "BUB_YUGE_YUKIO_B": Vector((10.0, 10.0, 0.01)),
-    "BUB_BUCKET": Vector((102.87, 80.0, 99.552)),
-    "BUB_CLEANSER": Vector((102.54, 125.114, 40.0)),
-    "BUB_SKY": Vector((19000.0, 8500.0, 18999.996)),
-}
+from concurrent.futures import ThreadPoolExecutor
+from . import gma_tpl_reader
+
+# Dimensions of vanilla BG objects, as name -> (x, y, z) in SMB coordinates.
+# Loaded from bg_dimensions.json on first use, since most sessions never import a background.
+VANILLA_TABLE_PATH = os.path.join(os.path.dirname(__file__), "bg_dimensions.json")
+
+_vanilla_table = None
+
+# Smallest dimension written for a measured model
+MIN_DIMENSION = 0.01
+
+# User-supplied tables, keyed by path. Each entry holds the modification time the file was loaded at and its table.
+_user_tables = {}
+
+# Merged vanilla + user tables, keyed by user table path
+_merged_tables = {}
+
+# Reads a dimension table from a JSON file of name -> [x, y, z]
+def load_table(path):
+    with open(path, "r") as table_file:
+        table = json.load(table_file)
+    return {name: tuple(float(value) for value in dimensions) for name, dimensions in table.items()}
+
+def get_vanilla_table():
+    global _vanilla_table
+    if _vanilla_table is None:
+        _vanilla_table = load_table(VANILLA_TABLE_PATH)
+    return _vanilla_table
+
+# Returns the user table at a path, reloading it if the file changed
+def get_user_table(path):
+    mtime = os.path.getmtime(path)
+    cached = _user_tables.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, load_table(path))
+        _user_tables[path] = cached
+        _merged_tables.pop(path, None)
+    return cached[1]
+
+# Returns the dimension table, with the entries of a user table (if given and it exists) added to or overriding vanilla ones
+def get_table(user_table_path=""):
+    if user_table_path == "" or not os.path.isfile(user_table_path):
+        return get_vanilla_table()
+
+    user_table = get_user_table(user_table_path)
+    merged = _merged_tables.get(user_table_path)
+    if merged is None:
+        merged = {**get_vanilla_table(), **user_table}
+        _merged_tables[user_table_path] = merged
+    return merged
+
+# Returns the dimensions of a BG object, or the default if it isn't in the table
+def get_dimensions(name, default=None, user_table_path=""):
+    return get_table(user_table_path).get(name, default)
+
+# Returns the sorted names of all BG objects starting with a prefix
+def find_prefix(prefix, user_table_path=""):
+    return sorted(name for name in get_table(user_table_path) if name.startswith(prefix))
+
+# Returns the names of the BG objects most similar to a name, best match first
+def find_similar(name, count=5, cutoff=0.6, user_table_path=""):
+    return difflib.get_close_matches(name, get_table(user_table_path).keys(), n=count, cutoff=cutoff)
+
+# Writes a dimension table to a JSON file, in the same layout as bg_dimensions.json
+def write_table(path, table):
+    with open(path, "w") as table_file:
+        table_file.write("{\n" + ",\n".join(f"    {json.dumps(name)}: {json.dumps(list(dimensions))}" for name, dimensions in table.items()) + "\n}\n")
+
+# Returns the dimensions of every model in a GMA, measured from the box around its vertices.
+# Models whose vertices can't be read are returned separately with their bounding sphere diameter, which is only an
+# approximation of their size and isn't used as dimensions.
+def get_gma_dimensions(path):
+    gma = gma_tpl_reader.read_gma(path, read_bounds=True)
+    table = {}
+    approximate = {}
+    for model in gma.models:
+        if model.bounding_box is not None:
+            box_min, box_max = model.bounding_box
+            # Flat models get the same small thickness as the hand-measured ones, so previews can still be unscaled
+            table[model.name] = tuple(max(round(high - low, 3), MIN_DIMENSION) for low, high in zip(box_min, box_max))
+        elif model.bounding_sphere_radius > 0:
+            approximate[model.name] = round(model.bounding_sphere_radius * 2, 3)
+    return table, approximate
+
+# Measures every model of every GMA in a directory (and its subdirectories). Files are read in parallel.
+# Returns the table, a dict of name -> bounding sphere diameter for models that couldn't be measured,
+# and a list of (path, error) for files that couldn't be read.
+def generate_table(gma_directory, max_workers=None):
+    paths = []
+    for root, dirs, files in os.walk(gma_directory):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".gma"))
+    paths.sort()
+
+    def measure(path):
+        try:
+            return get_gma_dimensions(path) + (None,)
+        except (ValueError, OSError, struct.error) as e:
+            return {}, {}, str(e)
+
+    table = {}
+    approximate = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        for path, (gma_table, gma_approximate, error) in zip(paths, pool.map(measure, paths)):
+            table.update(gma_table)
+            approximate.update(gma_approximate)
+            if error is not None:
+                errors.append((path, error))
+
+    # Models measured in any file aren't approximated
+    for name in table:
+        approximate.pop(name, None)
+
+    return table, approximate, errors
+
+def clear_cache():
+    global _vanilla_table
+    _vanilla_table = None
+    _user_tables.clear()
+    _merged_tables.clear()
+
+# Compatibility with code that still uses dimension_dict.dimensions, loads the table on first access
+def __getattr__(name):
+    if name == "dimensions":
+        return get_vanilla_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
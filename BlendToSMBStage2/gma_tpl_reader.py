@@ -0,0 +1,387 @@
+import mmap
+import os
+import struct
+import bpy
+
+import numpy as np
+
+from . import tpl_encoder
+
+GCMF_MAGIC = b"GCMF"
+GCMF_HEADER_SIZE = 0x40
+GCMF_MATERIAL_SIZE = 0x20
+GCMF_TRANSFORM_MATRIX_SIZE = 0x30
+GCMF_MESH_HEADER_SIZE = 0x60
+
+# GCMF section flags of models whose vertices aren't plain float positions in a mesh's display lists
+# (16 bit, stitching, skinned and effective models)
+GCMF_UNSUPPORTED_BOUNDS_FLAGS = 0x01 | 0x04 | 0x08 | 0x10
+
+# Size in bytes of each vertex attribute of a GCMF mesh, by bit of its vertex attribute flags. Attributes are stored in bit order.
+GX_ATTRIBUTE_SIZES = {0: 1, **{bit: 1 for bit in range(1, 9)}, 9: 12, 10: 12, 11: 4, 12: 4, **{bit: 8 for bit in range(13, 21)}}
+GX_POSITION_BIT = 9
+
+# GX primitive commands of a display list, with the vertex format index in the low 3 bits
+GX_PRIMITIVE_COMMANDS = {0x80, 0x90, 0x98, 0xA0, 0xA8, 0xB0, 0xB8}
+
+GX_FORMAT_NAMES = {format_id: name for name, format_id in tpl_encoder.GX_FORMAT_IDS.items()}
+
+class TplTextureInfo:
+    def __init__(self, index, format_id, offset, width, height, level_count):
+        self.index = index
+        self.format_id = format_id
+        self.format = GX_FORMAT_NAMES.get(format_id)
+        self.offset = offset
+        self.width = width
+        self.height = height
+        self.level_count = level_count
+
+        if self.format is not None:
+            self.size = tpl_encoder.get_encoded_size(width, height, self.format, max(level_count - 1, 0))
+        else:
+            self.size = 0
+
+class TplFile:
+    def __init__(self, path, textures, file_size):
+        self.path = path
+        self.textures = textures
+        self.file_size = file_size
+
+class GmaModel:
+    def __init__(self, index, name, offset, size):
+        self.index = index
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.texture_indices = []
+        self.layer1_mesh_count = 0
+        self.layer2_mesh_count = 0
+        self.bounding_sphere_center = (0.0, 0.0, 0.0)
+        self.bounding_sphere_radius = 0.0
+        # (min, max) corners of the box around the model's vertices, if read and the model's vertices could be read
+        self.bounding_box = None
+
+class GmaFile:
+    def __init__(self, path, models, file_size):
+        self.path = path
+        self.models = models
+        self.file_size = file_size
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+# Reads the texture headers of a Monkey Ball TPL. Empty texture slots are returned as None.
+def read_tpl(path):
+    data = _map_file(path)
+    try:
+        texture_count, = struct.unpack_from(">I", data, 0)
+        if 4 + texture_count * tpl_encoder.TPL_HEADER_ENTRY_SIZE > len(data):
+            raise ValueError(f"{path} is not a valid TPL file")
+
+        textures = []
+        for i in range(texture_count):
+            format_id, offset, width, height, level_count, _ = struct.unpack_from(
+                    ">IIHHHH", data, 4 + i * tpl_encoder.TPL_HEADER_ENTRY_SIZE)
+            if offset == 0 or width == 0 or height == 0:
+                textures.append(None)
+            else:
+                textures.append(TplTextureInfo(i, format_id, offset, width, height, level_count))
+
+        return TplFile(path, textures, len(data))
+    finally:
+        data.close()
+
+# Returns the offset of the material table of a GCMF model. Models with transform matrices (0x30 bytes each) store
+# them ahead of the materials. Each material stores its own index at +0x0E, which is used to confirm where the
+# table starts, falling back to the offset past the matrices.
+def _find_gcmf_materials(data, header, material_count, matrix_count):
+    after_matrices = header + GCMF_HEADER_SIZE + matrix_count * GCMF_TRANSFORM_MATRIX_SIZE
+    for offset in (after_matrices, header + GCMF_HEADER_SIZE):
+        if offset + material_count * GCMF_MATERIAL_SIZE > len(data):
+            continue
+        if all(struct.unpack_from(">H", data, offset + m * GCMF_MATERIAL_SIZE + 0x0E)[0] == m for m in range(material_count)):
+            return offset
+    return after_matrices
+
+# Returns the (min, max) corners of the box around the vertex positions of a GCMF model's display lists, or None if
+# the model's vertex layout isn't supported or doesn't parse. Boxes that don't fit in the bounding sphere are rejected.
+def _read_gcmf_bounds(data, header, end, center, radius):
+    flags, = struct.unpack_from(">I", data, header + 0x04)
+    layer1_count, layer2_count = struct.unpack_from(">HH", data, header + 0x1A)
+    mesh_offset, = struct.unpack_from(">I", data, header + 0x20)
+    if flags & GCMF_UNSUPPORTED_BOUNDS_FLAGS:
+        return None
+
+    mins = []
+    maxs = []
+    position = header + mesh_offset
+    for _ in range(layer1_count + layer2_count):
+        if position + GCMF_MESH_HEADER_SIZE > end:
+            return None
+        list_flags = data[position + 0x13]
+        vertex_flags, = struct.unpack_from(">I", data, position + 0x1C)
+        list_sizes = struct.unpack_from(">II", data, position + 0x28)
+        # Extra display lists are only used by skinned meshes
+        if list_flags & 0x0C or not vertex_flags & (1 << GX_POSITION_BIT):
+            return None
+        if any(vertex_flags & (1 << bit) for bit in range(32) if bit not in GX_ATTRIBUTE_SIZES):
+            return None
+
+        stride = sum(size for bit, size in GX_ATTRIBUTE_SIZES.items() if vertex_flags & (1 << bit))
+        position_offset = sum(GX_ATTRIBUTE_SIZES[bit] for bit in range(GX_POSITION_BIT) if vertex_flags & (1 << bit))
+
+        position += GCMF_MESH_HEADER_SIZE
+        for list_index, list_size in enumerate(list_sizes):
+            if not list_flags & (1 << list_index):
+                continue
+            list_end = position + list_size
+            if list_end > end:
+                return None
+            while position < list_end:
+                command = data[position]
+                if command == 0:
+                    # Padding
+                    position += 1
+                    continue
+                if command & 0xF8 not in GX_PRIMITIVE_COMMANDS or position + 3 > list_end:
+                    return None
+                count, = struct.unpack_from(">H", data, position + 1)
+                position += 3
+                if position + count * stride > list_end:
+                    return None
+                if count > 0:
+                    positions = np.ndarray((count, 3), dtype=">f4", buffer=data, offset=position + position_offset, strides=(stride, 4))
+                    mins.append(positions.min(axis=0))
+                    maxs.append(positions.max(axis=0))
+                position += count * stride
+
+    if not mins:
+        return None
+
+    box_min = np.min(mins, axis=0)
+    box_max = np.max(maxs, axis=0)
+    # A wrongly parsed vertex layout shows up as positions far outside the bounding sphere
+    corner = np.maximum(np.abs(box_min - center), np.abs(box_max - center))
+    if not np.all(np.isfinite(corner)) or np.any(corner > radius * 1.01 + 0.01):
+        return None
+    return tuple(box_min.tolist()), tuple(box_max.tolist())
+
+# Reads the model list of a Monkey Ball GMA, along with the materials of each model.
+# If read_bounds is set, the box around each model's vertices is also measured.
+def read_gma(path, read_bounds=False):
+    data = _map_file(path)
+    try:
+        model_count, model_base = struct.unpack_from(">II", data, 0)
+        name_base = 8 + model_count * 8
+        if name_base > len(data):
+            raise ValueError(f"{path} is not a valid GMA file")
+
+        entries = []
+        for i in range(model_count):
+            offset, name_offset = struct.unpack_from(">II", data, 8 + i * 8)
+            if offset == 0xFFFFFFFF:
+                continue
+            name_start = name_base + name_offset
+            name_end = data.find(b"\x00", name_start)
+            if name_end == -1:
+                raise ValueError(f"{path} is not a valid GMA file (unterminated name of model {i})")
+            name = data[name_start:name_end].decode("ascii", errors="replace")
+            entries.append((i, name, offset))
+
+        # Models are stored back to back, so each model ends where the next one starts
+        model_ends = sorted({offset for _, _, offset in entries} | {len(data) - model_base})
+
+        models = []
+        for i, name, offset in entries:
+            end = next((end for end in model_ends if end > offset), None)
+            if end is None:
+                raise ValueError(f"{path} is not a valid GMA file (model {i} starts past the end of the file)")
+            model = GmaModel(i, name, offset, end - offset)
+
+            header = model_base + offset
+            if data[header:header + 4] == GCMF_MAGIC:
+                center = struct.unpack_from(">fff", data, header + 0x08)
+                radius, material_count, layer1_count, layer2_count, matrix_count = struct.unpack_from(">fHHHB", data, header + 0x14)
+                model.bounding_sphere_center = center
+                model.bounding_sphere_radius = radius
+                model.layer1_mesh_count = layer1_count
+                model.layer2_mesh_count = layer2_count
+                materials = _find_gcmf_materials(data, header, material_count, matrix_count)
+                for m in range(material_count):
+                    offset = materials + m * GCMF_MATERIAL_SIZE + 0x04
+                    if offset + 2 > len(data):
+                        break
+                    texture_index, = struct.unpack_from(">H", data, offset)
+                    model.texture_indices.append(texture_index)
+                if read_bounds:
+                    try:
+                        model.bounding_box = _read_gcmf_bounds(data, header, model_base + end, center, radius)
+                    except struct.error:
+                        model.bounding_box = None
+
+            models.append(model)
+
+        return GmaFile(path, models, len(data))
+    finally:
+        data.close()
+
+# Reassembles GX tiles into a (height, width, channels) image, cropping away block padding
+def _from_blocks(blocks, width, height, block_w, block_h):
+    blocks_x = -(-width // block_w)
+    blocks_y = -(-height // block_h)
+    channels = blocks.shape[-1]
+    pixels = blocks.reshape(blocks_y, blocks_x, block_h, block_w, channels).transpose(0, 2, 1, 3, 4)
+    return pixels.reshape(blocks_y * block_h, blocks_x * block_w, channels)[:height, :width]
+
+def _gray(intensity, alpha):
+    return np.stack((intensity, intensity, intensity, alpha), axis=-1).astype(np.uint8)
+
+def _decode_i4(raw, width, height):
+    raw = raw.reshape(-1, 32)
+    i = np.empty((raw.shape[0], 64), dtype=np.uint8)
+    i[:, 0::2] = raw >> 4
+    i[:, 1::2] = raw & 0xF
+    i *= 17
+    return _from_blocks(_gray(i, i), width, height, 8, 8)
+
+def _decode_i8(raw, width, height):
+    i = raw.reshape(-1, 32)
+    return _from_blocks(_gray(i, i), width, height, 8, 4)
+
+def _decode_ia4(raw, width, height):
+    raw = raw.reshape(-1, 32)
+    return _from_blocks(_gray((raw & 0xF) * 17, (raw >> 4) * 17), width, height, 8, 4)
+
+def _decode_ia8(raw, width, height):
+    raw = raw.reshape(-1, 16, 2)
+    return _from_blocks(_gray(raw[..., 1], raw[..., 0]), width, height, 4, 4)
+
+def _expand_rgb565(packed):
+    packed = packed.astype(np.uint16)
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.uint8)
+
+def _decode_rgb565(raw, width, height):
+    packed = raw.view('>u2').reshape(-1, 16)
+    rgba = np.full(packed.shape + (4,), 255, dtype=np.uint8)
+    rgba[..., :3] = _expand_rgb565(packed)
+    return _from_blocks(rgba, width, height, 4, 4)
+
+def _decode_rgb5a3(raw, width, height):
+    packed = raw.view('>u2').reshape(-1, 16).astype(np.uint16)
+    opaque = (packed & 0x8000) != 0
+
+    r5, g5, b5 = (packed >> 10) & 0x1F, (packed >> 5) & 0x1F, packed & 0x1F
+    a3, r4, g4, b4 = (packed >> 12) & 0x7, (packed >> 8) & 0xF, (packed >> 4) & 0xF, packed & 0xF
+
+    rgba = np.empty(packed.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = np.where(opaque, (r5 << 3) | (r5 >> 2), r4 * 17)
+    rgba[..., 1] = np.where(opaque, (g5 << 3) | (g5 >> 2), g4 * 17)
+    rgba[..., 2] = np.where(opaque, (b5 << 3) | (b5 >> 2), b4 * 17)
+    rgba[..., 3] = np.where(opaque, 255, (a3 << 5) | (a3 << 2) | (a3 >> 1))
+    return _from_blocks(rgba, width, height, 4, 4)
+
+def _decode_rgba8(raw, width, height):
+    raw = raw.reshape(-1, 2, 16, 2)
+    rgba = np.empty((raw.shape[0], 16, 4), dtype=np.uint8)
+    rgba[..., 3] = raw[:, 0, :, 0]
+    rgba[..., 0] = raw[:, 0, :, 1]
+    rgba[..., 1] = raw[:, 1, :, 0]
+    rgba[..., 2] = raw[:, 1, :, 1]
+    return _from_blocks(rgba, width, height, 4, 4)
+
+def _decode_cmpr(raw, width, height):
+    blocks = raw.reshape(-1, 8)
+    count = blocks.shape[0]
+    c0 = blocks[:, 0:2].copy().view('>u2').reshape(count).astype(np.uint16)
+    c1 = blocks[:, 2:4].copy().view('>u2').reshape(count).astype(np.uint16)
+    p0 = _expand_rgb565(c0).astype(np.uint16)
+    p1 = _expand_rgb565(c1).astype(np.uint16)
+    four_color = (c0 > c1)[:, None]
+
+    palette = np.empty((count, 4, 4), dtype=np.uint8)
+    palette[:, 0, :3] = p0
+    palette[:, 1, :3] = p1
+    palette[:, 2, :3] = np.where(four_color, (2 * p0 + p1) // 3, (p0 + p1) // 2)
+    palette[:, 3, :3] = np.where(four_color, (p0 + 2 * p1) // 3, 0)
+    palette[:, :, 3] = 255
+    palette[:, 3, 3] = np.where(four_color[:, 0], 255, 0)
+
+    index_bytes = blocks[:, 4:8]
+    indices = np.stack(((index_bytes >> 6) & 3, (index_bytes >> 4) & 3, (index_bytes >> 2) & 3, index_bytes & 3), axis=-1)
+    indices = indices.reshape(count, 16)
+    rgba = np.take_along_axis(palette, indices[..., None].astype(np.intp), axis=1)
+
+    # Undo the 2x2 arrangement of 4x4 sub-blocks within each 8x8 tile
+    blocks_x = -(-width // 8)
+    blocks_y = -(-height // 8)
+    pixels = rgba.reshape(blocks_y, blocks_x, 2, 2, 4, 4, 4).transpose(0, 2, 4, 1, 3, 5, 6)
+    return pixels.reshape(blocks_y * 8, blocks_x * 8, 4)[:height, :width]
+
+_DECODERS = {
+    "I4": _decode_i4,
+    "I8": _decode_i8,
+    "IA4": _decode_ia4,
+    "IA8": _decode_ia8,
+    "RGB565": _decode_rgb565,
+    "RGB5A3": _decode_rgb5a3,
+    "RGBA8": _decode_rgba8,
+    "CMPR": _decode_cmpr,
+}
+
+# Decodes the top mipmap level of a TPL texture into a top-down (height, width, 4) uint8 array
+def decode_tpl_texture(tpl, index):
+    tex = tpl.textures[index]
+    if tex is None:
+        raise ValueError(f"Texture {index} of {tpl.path} is empty")
+    if tex.format is None:
+        raise ValueError(f"Texture {index} of {tpl.path} has unsupported format {tex.format_id:#x}")
+
+    size = tpl_encoder.get_encoded_size(tex.width, tex.height, tex.format)
+    data = _map_file(tpl.path)
+    try:
+        if tex.offset + size > len(data):
+            raise ValueError(f"Texture {index} of {tpl.path} is truncated")
+        raw = np.frombuffer(data, dtype=np.uint8, count=size, offset=tex.offset).copy()
+    finally:
+        data.close()
+
+    return _DECODERS[tex.format](raw, tex.width, tex.height)
+
+# Reads every texture of a TPL as encoded data, so it can be copied into another TPL. Empty slots are returned as None.
+def read_tpl_encoded_textures(path):
+    tpl = read_tpl(path)
+    data = _map_file(path)
+    try:
+        textures = []
+        for tex in tpl.textures:
+            if tex is None:
+                textures.append(None)
+                continue
+            if tex.format is None:
+                raise ValueError(f"Texture {tex.index} of {path} has unsupported format {tex.format_id:#x}")
+            if tex.offset + tex.size > len(data):
+                raise ValueError(f"Texture {tex.index} of {path} is truncated")
+            textures.append(tpl_encoder.EncodedTplTexture(data[tex.offset:tex.offset + tex.size], tex.format,
+                                                          tex.width, tex.height, max(tex.level_count - 1, 0)))
+        return textures
+    finally:
+        data.close()
+
+# Writes decoded pixels into a Blender image, creating it if needed
+def pixels_to_image(pixels, name):
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.get(name)
+    if image is None or tuple(image.size) != (width, height):
+        if image is not None:
+            bpy.data.images.remove(image)
+        image = bpy.data.images.new(name, width, height, alpha=True)
+
+    image.pixels.foreach_set((pixels[::-1].astype(np.float32) / 255.0).ravel())
+    image.update()
+    return image
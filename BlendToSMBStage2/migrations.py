@@ -0,0 +1,217 @@
+import bpy
+
+# Schema version of the stage data written by this version of the addon. Files are stamped with the version they were
+# last migrated to, so only newer migration steps run when they're loaded.
+SCHEMA_VERSION = 1
+
+# Scene custom property holding the schema version of a file
+SCHEMA_VERSION_PROP = "blend2smb_schema_version"
+
+# Version 1: delete old unused animation properties
+def remove_old_anim_props(obj):
+    if "posXAnim" in obj.keys():
+        del obj["posXAnim"]
+    if "posYAnim" in obj.keys():
+        del obj["posYAnim"]
+    if "posZAnim" in obj.keys():
+        del obj["posZAnim"]
+    if "rotXAnim" in obj.keys():
+        del obj["rotXAnim"]
+    if "rotYAnim" in obj.keys():
+        del obj["rotYAnim"]
+    if "rotZAnim" in obj.keys():
+        del obj["rotZAnim"]
+
+# Version 1: item group properties with changed names, types and new properties
+def migrate_item_group(obj):
+    # Properties with changed names
+    # Properties with _ in the beginning of their name were used for a hacky RNA property display thing
+    # This isn't used anymore, so they're removed
+    if "_initPlaying" in obj.keys():
+        obj["initPlaying"] = obj["_initPlaying"]
+        del obj["_initPlaying"]
+    if "_loopAnim" in obj.keys():
+        obj["loopAnim"] = obj["_loopAnim"]
+        del obj["_loopAnim"]
+
+    # "loopTime" was renamed to "animLoopTime" for clarity
+    if "loopTime" in obj.keys():
+        obj["animLoopTime"] = obj["loopTime"]
+        del obj["loopTime"]
+
+    # Cast collision start and step amounts to floats
+    for floatKey in ["collisionStartX", "collisionStartY", "collisionStepX", "collisionStepY"]:
+        if floatKey in obj.keys():
+            obj[floatKey] = float(obj[floatKey])
+
+    # Casts to float, since certain old properties don't line up correctly
+    if "animLoopTime" in obj.keys():
+        if type(obj["animLoopTime"]) is int:
+            obj["animLoopTime"] = float(obj["animLoopTime"])
+            if (obj["animLoopTime"] != -1.0):
+                obj["animLoopTime"] = obj["animLoopTime"]/bpy.context.scene.render.fps
+
+    # New properties
+    if "seesawSensitivity" not in obj.keys():
+        obj["seesawSensitivity"] = 0.0
+    if "seesawFriction" not in obj.keys():
+        obj["seesawFriction"] = 0.0
+    if "seesawSpring" not in obj.keys():
+        obj["seesawSpring"] = 0.0
+    if "texScrollUSpeed" not in obj.keys():
+        obj["texScrollUSpeed"] = 0.0
+    if "texScrollVSpeed" not in obj.keys():
+        obj["texScrollVSpeed"] = 0.0
+    if "exportTimestep" not in obj.keys():
+        obj["exportTimestep"] = -1
+    if "conveyorX" not in obj.keys():
+        obj["conveyorX"] = 0.0
+    if "conveyorY" not in obj.keys():
+        obj["conveyorY"] = 0.0
+    if "conveyorZ" not in obj.keys():
+        obj["conveyorZ"] = 0.0
+    if "collisionTriangleFlag" not in obj.keys():
+        obj["collisionTriangleFlag"] = 0
+
+# Version 1: goal properties
+def migrate_goal(obj):
+    if "_cast_shadow" in obj.keys():
+        obj["cast_shadow"] = obj["_cast_shadow"]
+        del obj["_cast_shadow"]
+    if "cast_shadow" not in obj.keys():
+        obj["cast_shadow"] = True
+
+# Version 1: wormhole properties
+def migrate_wormhole(obj):
+    if "id" in obj.keys():
+        obj["whId"] = obj["id"]
+        del obj["id"]
+    if "_id" in obj.keys():
+        obj["whId"] = obj["_id"]
+        del obj["_id"]
+    if "_linkedId" in obj.keys(): 
+        obj["linkedId"] = obj["_linkedId"]
+        del obj["_linkedId"]
+    if "_linkedObject" in obj.keys():
+        obj["linkedObject"] = obj["_linkedObject"]
+        del obj["_linkedObject"]
+    if "linkedObject" not in obj.keys():
+        obj["linkedObject"] = None
+
+# Version 1: switch properties
+def migrate_switch(obj):
+    if "_animId" in obj.keys():
+        obj["linkedId"] = obj["_animId"]
+        del obj["_animId"]
+    if "animId" in obj.keys():
+        obj["linkedId"] = obj["animId"]
+        del obj["animId"]
+    if "_linkedObject" in obj.keys():
+        obj["linkedObject"] = obj["_linkedObject"]
+        del obj["_linkedObject"]
+    if "linkedObject" not in obj.keys():
+        obj["linkedObject"] = None
+
+# Version 1: BG object properties
+def migrate_bg(obj):
+    if "animLoopTime" not in obj.keys():
+        obj["animLoopTime"] = -1.0
+    if "meshType" not in obj.keys():
+        obj["meshType"] = 0x1f
+    if "texScrollUSpeed" not in obj.keys():
+        obj["texScrollUSpeed"] = 0.0
+    if "texScrollVSpeed" not in obj.keys():
+        obj["texScrollVSpeed"] = 0.0
+
+# Version 1: enable backface culling and convert Diffuse BSDF nodes to Principled BSDF
+def migrate_material(mat):
+    # Enable backface culling for all materials
+    if hasattr(mat, 'use_backface_culling'):
+        mat.use_backface_culling = True
+
+    if (mat.use_nodes):
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+
+        material_output_node = None
+        image_texture_node = None
+        diffuse_node = None
+
+        for node in nodes:
+            if (node.type == 'BSDF_PRINCIPLED'):
+                continue
+            elif (node.type =='OUTPUT_MATERIAL'):
+                material_output_node = node
+            elif (node.type == 'TEX_IMAGE'):
+                image_texture_node = node
+            elif (node.type =='BSDF_DIFFUSE'):
+                diffuse_node = node
+            #else:
+                #print("Removing extraneous node" + str(node))
+                #nodes.remove(node)
+
+        # Convert Diffuse BSDF nodes to Principled BSDF
+        if diffuse_node is not None:
+            print("Converting material " + mat.name + " diffuse BSDF node to principled BSDF...")
+            nodes.remove(diffuse_node)
+            principled_node = nodes.new("ShaderNodeBsdfPrincipled")
+            links.new(material_output_node.inputs['Surface'], principled_node.outputs['BSDF'])
+            links.new(principled_node.inputs['Base Color'], image_texture_node.outputs['Color'])
+            principled_node.inputs['Specular'].default_value = 0.0
+
+# Object migration steps as (schema version, object name tag, function), in the order they run.
+# A tag of None runs the step for every object.
+OBJECT_MIGRATIONS = [
+    (1, None, remove_old_anim_props),
+    (1, "[IG]", migrate_item_group),
+    (1, "[GOAL_", migrate_goal),
+    (1, "[WH]", migrate_wormhole),
+    (1, "[SW_", migrate_switch),
+    (1, "[BG]", migrate_bg),
+]
+
+# Material migration steps as (schema version, function)
+MATERIAL_MIGRATIONS = [
+    (1, migrate_material),
+]
+
+# Returns the schema version of the open file, which is the oldest version any of its scenes were migrated to
+def get_file_schema_version():
+    return min((scene.get(SCHEMA_VERSION_PROP, 0) for scene in bpy.data.scenes), default=SCHEMA_VERSION)
+
+def stamp_file_schema_version():
+    for scene in bpy.data.scenes:
+        scene[SCHEMA_VERSION_PROP] = SCHEMA_VERSION
+
+# Runs every migration step newer than the given schema version (by default, the version of the open file) in a single
+# pass over objects and materials, and stamps the file with the current version.
+# Returns the number of migration steps that ran.
+def migrate_file(from_version=None):
+    if from_version is None:
+        from_version = get_file_schema_version()
+
+    object_steps = [(tag, step) for version, tag, step in OBJECT_MIGRATIONS if version > from_version]
+    material_steps = [step for version, step in MATERIAL_MIGRATIONS if version > from_version]
+
+    if object_steps:
+        # Object names are only read once per object, steps are matched by their tags
+        untagged_steps = [step for tag, step in object_steps if tag is None]
+        tagged_steps = [(tag, step) for tag, step in object_steps if tag is not None]
+        for obj in bpy.data.objects:
+            name = obj.name
+            for step in untagged_steps:
+                step(obj)
+            for tag, step in tagged_steps:
+                if tag in name:
+                    step(obj)
+
+    if material_steps:
+        for mat in bpy.data.materials:
+            for step in material_steps:
+                step(mat)
+
+    if from_version < SCHEMA_VERSION:
+        print(f"Migrated file from schema version {from_version} to {SCHEMA_VERSION}")
+        stamp_file_schema_version()
+
+    return len(object_steps) + len(material_steps)
@@ -0,0 +1,104 @@
+import bpy
+
+import numpy as np
+
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+
+from . import collision_grid
+from .descriptors import descriptors
+
+# Ray directions the drop operator can use, in world space. LOCAL uses each object's own -Z axis.
+DROP_DIRECTIONS = {
+    'NEG_Z': Vector((0, 0, -1)),
+    'POS_Z': Vector((0, 0, 1)),
+    'NEG_X': Vector((-1, 0, 0)),
+    'POS_X': Vector((1, 0, 0)),
+    'NEG_Y': Vector((0, -1, 0)),
+    'POS_Y': Vector((0, 1, 0)),
+}
+
+# Returns the distance an object should be placed above the surface it's dropped onto, as given by its descriptors
+def get_drop_height(obj):
+    for desc in descriptors.descriptors:
+        if desc.get_object_name() in obj.name:
+            height = desc.get_drop_height(obj)
+            if height is not None:
+                return height
+    return 0.0
+
+# Returns the objects to drop onto: every object with geometry, or only the collision models of item groups.
+# If an item group is given, only its descendants are used.
+def get_drop_targets(scene, collidable_only, item_group=None):
+    if item_group is not None:
+        candidates = collision_grid.get_item_group_objects(item_group)
+    elif collidable_only:
+        candidates = []
+        for obj in scene.objects:
+            if "[IG]" in obj.name:
+                candidates.extend(collision_grid.get_item_group_objects(obj))
+    else:
+        candidates = scene.objects
+
+    targets = []
+    for obj in candidates:
+        if obj.type not in collision_grid.GEOMETRY_TYPES or not obj.visible_get():
+            continue
+        if collidable_only and "[NOCOLI]" in obj.name:
+            continue
+        targets.append(obj)
+    return targets
+
+# Builds a single world space BVH tree from the evaluated triangles of the given objects, or returns None if they have no triangles
+def build_drop_bvh(objects, depsgraph):
+    all_verts = []
+    all_tris = []
+    vert_offset = 0
+
+    for obj in objects:
+        obj_eval = obj.evaluated_get(depsgraph)
+        mesh = obj_eval.to_mesh()
+        try:
+            if mesh is None:
+                continue
+            mesh.calc_loop_triangles()
+            if len(mesh.loop_triangles) == 0:
+                continue
+
+            verts = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+            mesh.vertices.foreach_get("co", verts)
+            tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int64)
+            mesh.loop_triangles.foreach_get("vertices", tris)
+        finally:
+            obj_eval.to_mesh_clear()
+
+        all_verts.append(collision_grid.transform_points(verts.reshape(-1, 3), obj_eval.matrix_world))
+        all_tris.append(tris.reshape(-1, 3) + vert_offset)
+        vert_offset += len(verts) // 3
+
+    if not all_tris:
+        return None
+
+    return BVHTree.FromPolygons(np.concatenate(all_verts).tolist(), np.concatenate(all_tris).tolist(), all_triangles=True)
+
+# Drops objects onto the nearest surface of a BVH tree along a direction, offset by the height of each object type.
+# Returns the number of objects that hit a surface.
+def drop_objects(objects, bvh, direction, distance):
+    dropped = 0
+
+    for obj in objects:
+        if direction == 'LOCAL':
+            ray_dir = obj.matrix_world.to_quaternion() @ Vector((0, 0, -1))
+        else:
+            ray_dir = DROP_DIRECTIONS[direction]
+
+        location, normal, index, hit_distance = bvh.ray_cast(obj.matrix_world.to_translation(), ray_dir, distance)
+        if location is None:
+            continue
+
+        # Set in world space so parented objects (such as placeables inside item groups) land in the right spot
+        face_rotation = Vector.to_track_quat(normal, 'Z')
+        obj.matrix_world = Matrix.LocRotScale(location + normal*get_drop_height(obj), face_rotation, obj.matrix_world.to_scale())
+        dropped += 1
+
+    return dropped
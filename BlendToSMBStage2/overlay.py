@@ -0,0 +1,294 @@
+import bpy
+import blf
+import gpu
+import time
+
+from collections import deque
+
+from bpy.app.handlers import persistent
+from . import statics, stage_object_drawing, collision_grid
+from .descriptors import descriptors, descriptor_base
+
+# Objects with a viewport overlay, stored as object name -> (object, descriptors).
+# Kept up to date from depsgraph updates so redraws don't have to scan every object in the scene.
+draw_list = {}
+draw_list_dirty = True
+draw_list_scene = None
+draw_list_object_count = 0
+
+# Owner used for message bus subscriptions
+msgbus_owner = object()
+
+# Overlay statistics of the last redraw, shown by the statistics HUD
+class OverlayStats:
+    def __init__(self):
+        self.draw_time = 0.0
+        self.draw_times = deque(maxlen=60)
+        self.visited = 0
+        self.drawn = 0
+        self.culled = 0
+        self.batches = 0
+        self.vertices = 0
+        # Descriptor name -> [drawn objects, culled objects, vertices, batches, time]. Time is spent queueing the
+        # descriptor's overlays plus its share (by vertices) of the time spent culling and drawing the batch.
+        self.descriptors = {}
+
+overlay_stats = OverlayStats()
+
+# Descriptors that actually draw something
+def get_renderable_descriptors():
+    return [desc for desc in descriptors.descriptors if desc.render is not descriptor_base.DescriptorBase.render]
+
+def get_object_descriptors(obj):
+    return tuple(desc for desc in get_renderable_descriptors() if desc.get_object_name() in obj.name)
+
+# Forces the draw list to be rebuilt on the next redraw
+@persistent
+def mark_dirty(*args):
+    global draw_list_dirty
+    draw_list_dirty = True
+    stage_object_drawing.clear_anim_cache()
+    collision_grid.clear_cache()
+    collision_grid.clear_local_geometry()
+    schedule_heatmap_update()
+
+def rebuild_draw_list(scene):
+    global draw_list_dirty, draw_list_scene, draw_list_object_count
+
+    draw_list.clear()
+    renderable = get_renderable_descriptors()
+    for obj in scene.objects:
+        descs = tuple(desc for desc in renderable if desc.get_object_name() in obj.name)
+        if descs:
+            draw_list[obj.name] = (obj, descs)
+
+    draw_list_dirty = False
+    draw_list_scene = scene.name
+    draw_list_object_count = len(scene.objects)
+
+# Adds, updates or removes a single object in the draw list
+def update_object(obj):
+    descs = get_object_descriptors(obj)
+    if descs:
+        draw_list[obj.name] = (obj, descs)
+    else:
+        draw_list.pop(obj.name, None)
+
+# Returns a list of (object, descriptors) pairs for the given scene
+def get_draw_list(scene):
+    if draw_list_dirty or draw_list_scene != scene.name:
+        rebuild_draw_list(scene)
+    return list(draw_list.values())
+
+# Requests a redraw of every 3D viewport. Overlays are only redrawn when something they show has changed.
+def tag_redraw(*args):
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+# Update callback for scene properties that affect the overlays
+def update_overlay_setting(self, context):
+    schedule_heatmap_update()
+    tag_redraw()
+
+# Recomputes collision grid heatmaps from a timer, since evaluating geometry isn't safe while drawing.
+# Updates requested in quick succession (such as from several depsgraph updates) are handled once.
+def update_heatmaps_timer():
+    context = bpy.context
+    if context.scene is not None and context.scene.draw_stage_objects and context.scene.draw_collision_heatmap:
+        stage_object_drawing.update_heatmaps(context.scene, context.evaluated_depsgraph_get())
+        tag_redraw()
+    return None
+
+def schedule_heatmap_update():
+    if not bpy.app.timers.is_registered(update_heatmaps_timer):
+        bpy.app.timers.register(update_heatmaps_timer, first_interval=0.0)
+
+# Callback function for drawing stage objects, as well as the fallout plane grid
+def draw_callback_3d():
+    global overlay_stats
+    context = bpy.context
+    gpu.state.blend_set("ALPHA")
+    gpu.state.depth_test_set("LESS_EQUAL")
+
+    if context.scene.draw_stage_objects:
+        # Overlays are queued and then drawn with one batch per line width and color
+        view = None
+        if context.region is not None and context.region_data is not None:
+            view = stage_object_drawing.ViewInfo(context.region, context.region_data, context.scene.overlay_lod_bias)
+        show_stats = context.scene.overlay_show_stats
+        start_time = time.perf_counter()
+        stats = OverlayStats() if show_stats else None
+        stage_object_drawing.reset_draw_stats()
+
+        # Descriptor name -> time spent queueing overlays
+        queue_times = {}
+
+        stage_object_drawing.begin_batch(view, context.scene.overlay_use_instancing, show_stats)
+        try:
+            # Draw objects
+            draw_list = get_draw_list(context.scene)
+            for obj, descs in draw_list:
+                try:
+                    if not obj.visible_get():
+                        continue
+                except ReferenceError:
+                    # Object was removed since the draw list was last updated
+                    mark_dirty()
+                    continue
+
+                if show_stats:
+                    for desc in descs:
+                        stage_object_drawing.set_draw_owner(desc.__name__, obj.name)
+                        desc_start = time.perf_counter()
+                        desc.render(obj)
+                        queue_times[desc.__name__] = queue_times.get(desc.__name__, 0.0) + time.perf_counter() - desc_start
+                else:
+                    for desc in descs:
+                        desc.render(obj)
+            stage_object_drawing.clear_draw_owner()
+            # Draw fallout plane
+            if context.scene.draw_falloutProp:
+                FALLOUT_COLOR = (0.96, 0.26, 0.21, 0.3)
+                stage_object_drawing.draw_grid(-512, -512, 32, 32, 32, 32, context.scene.falloutProp, FALLOUT_COLOR)
+        finally:
+            batch_start = time.perf_counter()
+            stage_object_drawing.end_batch()
+            batch_time = time.perf_counter() - batch_start
+
+        if show_stats:
+            draw_stats = stage_object_drawing.draw_stats
+            stats.draw_time = time.perf_counter() - start_time
+            stats.draw_times = overlay_stats.draw_times
+            stats.draw_times.append(stats.draw_time)
+            stats.visited = len(draw_list)
+            stats.drawn = draw_stats["drawn"]
+            stats.culled = draw_stats["culled"]
+            stats.batches = draw_stats["batches"]
+            stats.vertices = draw_stats["vertices"]
+
+            # Culling and drawing happen for the whole batch at once, so that time is split by vertices
+            descriptor_vertices = sum(entry[2] for entry in draw_stats["descriptors"].values())
+            for name, (drawn, culled, vertices, batches) in draw_stats["descriptors"].items():
+                share = vertices / descriptor_vertices if descriptor_vertices else 0.0
+                stats.descriptors[name] = [drawn, culled, vertices, batches, queue_times.get(name, 0.0) + batch_time * share]
+            overlay_stats = stats
+
+# Callback function for drawing the overlay statistics HUD in the corner of the viewport
+def draw_callback_2d():
+    context = bpy.context
+    if not (context.scene.draw_stage_objects and context.scene.overlay_show_stats):
+        return
+
+    stats = overlay_stats
+    average = sum(stats.draw_times) / len(stats.draw_times) if stats.draw_times else 0.0
+    lines = [
+        f"Blend2SMB overlays: {stats.draw_time * 1000:.2f} ms (avg {average * 1000:.2f} ms)",
+        f"Objects: {stats.drawn} drawn, {stats.culled} culled / {stats.visited} visited",
+        f"Batches: {stats.batches}  Vertices: {stats.vertices}",
+    ]
+    for name, (drawn, culled, vertices, batches, desc_time) in sorted(stats.descriptors.items(), key=lambda item: -item[1][4]):
+        lines.append(f"  {name.replace('Descriptor', '')}: {drawn} drawn, {culled} culled, {vertices} vertices in {batches} batches ({desc_time * 1000:.2f} ms)")
+
+    font_id = 0
+    line_height = 16
+    blf.size(font_id, 12)
+    blf.color(font_id, 1.0, 1.0, 1.0, 0.9)
+    blf.enable(font_id, blf.SHADOW)
+    blf.shadow(font_id, 3, 0.0, 0.0, 0.0, 0.8)
+    for i, line in enumerate(lines):
+        blf.position(font_id, 20, 20 + (len(lines) - 1 - i) * line_height, 0)
+        blf.draw(font_id, line)
+    blf.disable(font_id, blf.SHADOW)
+
+@persistent
+def depsgraph_update_handler(scene, depsgraph):
+    tag_redraw()
+
+    # Edited keyframes change the animation offsets of collision grids and the sampled animation of item groups
+    if depsgraph.id_type_updated('ACTION'):
+        stage_object_drawing.clear_anim_cache()
+        collision_grid.clear_cache()
+
+    # Edited geometry changes the cached local geometry of the item groups it belongs to. Moved objects are caught by
+    # its layout, and heatmaps are only recomputed once their grid, geometry or position relative to the grid changed.
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and update.is_updated_geometry:
+            collision_grid.invalidate_local_geometry(update.id.original)
+    schedule_heatmap_update()
+
+    if draw_list_dirty or draw_list_scene != scene.name:
+        return
+
+    for update in depsgraph.updates:
+        updated_id = update.id
+        if isinstance(updated_id, bpy.types.Collection):
+            # Objects were linked or unlinked
+            mark_dirty()
+            return
+        elif isinstance(updated_id, bpy.types.Scene):
+            # Objects linked directly to the scene collection only show up as a scene update
+            if len(scene.objects) != draw_list_object_count:
+                mark_dirty()
+                return
+        elif isinstance(updated_id, bpy.types.Object):
+            update_object(updated_id.original)
+
+# Renaming an object can change which descriptors apply to it
+def subscribe_name_changes():
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+            key=(bpy.types.Object, "name"),
+            owner=msgbus_owner,
+            args=(),
+            notify=mark_dirty,
+    )
+
+# Object pointers are invalidated on undo/redo and file load, and message bus subscriptions are cleared on load
+@persistent
+def load_handler(dummy):
+    stage_object_drawing.clear_heatmaps()
+    mark_dirty()
+    subscribe_name_changes()
+    tag_redraw()
+
+@persistent
+def frame_change_handler(scene, depsgraph):
+    schedule_heatmap_update()
+    tag_redraw()
+
+def handle_register():
+    # Exactly one draw handler (plus the statistics HUD) for the lifetime of the addon
+    handler = bpy.types.SpaceView3D.draw_handler_add(draw_callback_3d, (), "WINDOW", "POST_VIEW")
+    statics.active_draw_handlers.append(handler)
+    handler = bpy.types.SpaceView3D.draw_handler_add(draw_callback_2d, (), "WINDOW", "POST_PIXEL")
+    statics.active_draw_handlers.append(handler)
+
+    bpy.app.handlers.frame_change_post.append(frame_change_handler)
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_handler)
+    bpy.app.handlers.undo_post.append(mark_dirty)
+    bpy.app.handlers.redo_post.append(mark_dirty)
+    bpy.app.handlers.load_post.append(load_handler)
+    subscribe_name_changes()
+    mark_dirty()
+
+def handle_unregister():
+    for handler in statics.active_draw_handlers:
+        bpy.types.SpaceView3D.draw_handler_remove(handler, "WINDOW")
+    statics.active_draw_handlers.clear()
+
+    bpy.app.handlers.frame_change_post.remove(frame_change_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_handler)
+    bpy.app.handlers.undo_post.remove(mark_dirty)
+    bpy.app.handlers.redo_post.remove(mark_dirty)
+    bpy.app.handlers.load_post.remove(load_handler)
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    if bpy.app.timers.is_registered(update_heatmaps_timer):
+        bpy.app.timers.unregister(update_heatmaps_timer)
+    stage_object_drawing.clear_heatmaps()
+    draw_list.clear()
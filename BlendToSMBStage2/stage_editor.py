@@ -10,14 +10,17 @@ import random
 import math
 import re
 import locale
+import struct
+import time
 import gpu
 
-from . import statics, stage_object_drawing, generate_config, dimension_dict
+from . import statics, stage_object_drawing, generate_config, dimension_dict, tpl_encoder, gma_tpl_reader, overlay, collision_grid, stage_report, object_drop, background_import, background_merge, migrations
 
 from .descriptors import descriptors, descriptor_item_group, descriptor_model_stage, descriptor_track_path, descriptor_model_bg, descriptor_model_fg
-from bpy.props import BoolProperty, PointerProperty, EnumProperty, FloatProperty, FloatVectorProperty, IntProperty
+from bpy.props import BoolProperty, PointerProperty, EnumProperty, FloatProperty, FloatVectorProperty, IntProperty, StringProperty
 from sys import platform
 from mathutils import Vector, Matrix
+from bpy.app.handlers import persistent
 
 import xml.etree.ElementTree as etree
 import xml.dom.minidom as minidom
@@ -220,6 +223,45 @@ class OBJECT_OT_collision_grid_subdivide(bpy.types.Operator):
 
         return {'FINISHED'}
 
+# Operator for choosing collision grid step counts from the density of collision triangles
+class OBJECT_OT_collision_grid_tune(bpy.types.Operator):
+    bl_idname = "object.collision_grid_tune"
+    bl_label = "Tune Collision Grid Step Counts"
+    bl_description = "Chooses the step counts of collision grids that minimize the number of triangles checked per collision grid cell, while keeping the triangle lists within a memory budget. Keeps the area covered by each grid."
+    bl_options = {'UNDO', 'REGISTER'}
+
+    memory_budget: IntProperty(name="Memory Budget (KiB)", description="Maximum size of the collision triangle lists of each item group", default=32, min=1)
+    all_item_groups: BoolProperty(name="All Item Groups", description="Tune every item group in the scene instead of only the selected ones", default=False)
+
+    def execute(self, context):
+        depsgraph = context.evaluated_depsgraph_get()
+
+        if self.all_item_groups:
+            item_groups = [obj for obj in context.scene.objects if collision_grid.is_item_group(obj)]
+        else:
+            item_groups = [obj for obj in context.selected_objects if collision_grid.is_item_group(obj)]
+
+        tuned = 0
+        for obj in item_groups:
+            triangles = collision_grid.get_collision_triangles(obj, depsgraph)
+            if len(triangles) == 0:
+                continue
+
+            start, size = collision_grid.get_grid_extent(obj)
+            result = collision_grid.tune_step_counts(triangles, start, size, self.memory_budget * 1024)
+            if result is None:
+                self.report({'WARNING'}, f"No step counts for {obj.name} fit within the memory budget")
+                continue
+
+            count_x, count_z, stats = result
+            print(f"Tuned {obj.name}: {count_x}x{count_z}, {stats['mean']:.1f} mean / {stats['max']} max triangles per cell, {stats['memory']} bytes")
+            collision_grid.apply_step_counts(obj, count_x, count_z)
+            updateUIProps(obj)
+            tuned += 1
+
+        self.report({'INFO'}, f"Tuned collision grids of {tuned} item groups")
+        return {'FINISHED'}
+
 # Operator for fitting a collision grid to geometry
 class OBJECT_OT_collision_grid_fit(bpy.types.Operator):
     bl_idname = "object.collision_grid_fit"
@@ -231,66 +273,41 @@ class OBJECT_OT_collision_grid_fit(bpy.types.Operator):
     dimensions: FloatVectorProperty(name="Dimensions", min=0.0, size=2)
     margin: FloatProperty(name="Margin (%)", default=50, soft_max=200, soft_min=0, subtype="PERCENTAGE")
     auto_fit: BoolProperty(name="Auto-fit", default=True)
+    all_selected: BoolProperty(name="All Selected Item Groups", description="Auto-fit every selected item group instead of only the active one", default=False)
+    swept: BoolProperty(name="Sweep Animation", description="Fit the grid to the geometry over the item group's whole animation loop instead of only the current frame", default=False)
 
     def execute(self, context):
         active_obj = bpy.context.active_object
 
         if self.auto_fit:
-            total_max_x = None
-            total_min_x = None
-            total_max_y = None
-            total_min_y = None
-
-            # Get the min/max X/Y worldspace coordinates for the vertices of the IG and its children
-            obj_check_list = [active_obj, *active_obj.children]
-            for obj in obj_check_list:
-                # Handle meshes
-                if obj.data is not None:
-                    bm = bmesh.new()
-                    bm.from_mesh(obj.data)
-
-                    obj_world_mtx = obj.matrix_world
-                    obj_world_verts = [(obj_world_mtx @ vert.co) for vert in bm.verts]
-                    obj_x_verts = [vert[0] for vert in obj_world_verts]
-                    obj_y_verts = [vert[1] for vert in obj_world_verts]
+            depsgraph = context.evaluated_depsgraph_get()
 
-                    max_x = max(obj_x_verts)
-                    min_x = min(obj_x_verts)
-                    max_y = max(obj_y_verts)
-                    min_y = min(obj_y_verts)
-
-                    bm.free()
-
-                # If the object has no data (is a placeable), we assume it to be 5m x 5m
+            if self.all_selected:
+                item_groups = [obj for obj in context.selected_objects if collision_grid.is_item_group(obj)]
+            else:
+                item_groups = [active_obj]
+
+            for obj in item_groups:
+                # Get the min/max X/Y worldspace coordinates for the vertices of the IG and all of its descendants
+                if self.swept and not collision_grid.is_sweep_supported(obj):
+                    self.report({'WARNING'}, f"{obj.name} uses {obj.rotation_mode} rotation, which isn't exported. Fitted to the current frame only")
+                    bounds = collision_grid.get_world_bounds(obj, depsgraph)
+                elif self.swept:
+                    bounds = collision_grid.get_swept_bounds(obj, depsgraph, context.scene)
                 else:
-                    obj_pos = obj.matrix_world.to_translation()
-                    max_x = obj_pos.x + 5 
-                    min_x = obj_pos.x - 5 
-                    max_y = obj_pos.y + 5
-                    min_y = obj_pos.y - 5
-
-                if (total_max_x is None) or (max_x > total_max_x): total_max_x = max_x
-                if (total_min_x is None) or (min_x < total_min_x): total_min_x = min_x
-                if (total_max_y is None) or (max_y > total_max_y): total_max_y = max_y
-                if (total_min_y is None) or (min_y < total_min_y): total_min_y = min_y
-
-            self.dimensions = Vector((
-                    (total_max_x-total_min_x), 
-                    (total_max_y-total_min_y)
-                    ))
-
-            self.pos = Vector((
-                     total_min_x - (self.dimensions[0]*(0.5*self.margin/100)), 
-                     total_max_y + (self.dimensions[1]*(0.5*self.margin/100)) 
-                    ))
-
-            self.dimensions = Vector(self.dimensions) * (1+self.margin/100)
-
-        active_obj["collisionStartX"] = self.pos[0]
-        active_obj["collisionStartY"] = -1*(self.pos[1])   # Adjust for SMB coordinate system
-        active_obj["collisionStepX"] = self.dimensions[0] / active_obj["collisionStepCountX"]
-        active_obj["collisionStepY"] = self.dimensions[1] / active_obj["collisionStepCountY"]
-
+                    bounds = collision_grid.get_world_bounds(obj, depsgraph)
+                if bounds is None:
+                    continue
+                pos, dimensions = collision_grid.get_grid_fit(bounds, self.margin)
+                if obj == active_obj:
+                    self.pos = pos
+                    self.dimensions = dimensions
+                collision_grid.apply_grid_fit(obj, pos, dimensions)
+                updateUIProps(obj)
+
+            return {'FINISHED'}
+
+        collision_grid.apply_grid_fit(active_obj, self.pos, self.dimensions)
         updateUIProps(active_obj)
 
         return {'FINISHED'}
@@ -405,9 +422,51 @@ class VIEW3D_PT_2b_stage_object_panel(bpy.types.Panel):
         bg_path = layout.prop(context.scene, "background_import_path")
         bg_preview = layout.prop(context.scene, "background_import_preview")
         bg_cube = layout.prop(context.scene, "background_import_use_cubes")
+        bg_effects = layout.prop(context.scene, "background_import_effects")
+        bg_effects_import = layout.operator("object.import_background_effects", text="Import Effects of Selected")
+        bg_point_cloud = layout.prop(context.scene, "background_import_point_cloud")
+        bg_dimension_table = layout.prop(context.scene, "background_dimension_table_path")
+        bg_dimension_gma = layout.prop(context.scene, "background_dimension_gma_directory")
+        bg_dimension_generate = layout.operator("object.generate_dimension_table", text="Measure BG Dimensions from GMAs")
+        bg_materialize = layout.operator("object.materialize_background_instances", text="Materialize Selected Instances")
         gma_import = layout.prop(context.scene, "import_gma_path")
         tpl_import = layout.prop(context.scene, "import_tpl_path")
 
+# UI panel for inspecting the external GMA/TPL that gets merged into exported models
+class VIEW3D_PT_2c_gmatpl_inspector_panel(bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_2c_gmatpl_inspector_panel"
+    bl_label = "External GMA/TPL Inspector"
+    bl_category = "Blend2SMB"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator("object.inspect_gmatpl", text="Inspect External GMA/TPL")
+
+        gma = statics.inspected_gma
+        tpl = statics.inspected_tpl
+
+        if gma is not None:
+            box = layout.box()
+            box.label(text=f"GMA: {os.path.basename(gma.path)} ({gma.file_size / 1024:.1f} KiB)")
+            box.label(text=f"{len(gma.models)} models, {sum(len(m.texture_indices) for m in gma.models)} materials")
+            for model in gma.models:
+                box.label(text=f"{model.name}: {len(model.texture_indices)} materials, {model.size / 1024:.1f} KiB")
+
+        if tpl is not None:
+            textures = [tex for tex in tpl.textures if tex is not None]
+            box = layout.box()
+            box.label(text=f"TPL: {os.path.basename(tpl.path)} ({tpl.file_size / 1024:.1f} KiB)")
+            box.label(text=f"{len(textures)} textures, {sum(tex.size for tex in textures) / 1024:.1f} KiB texture data")
+            for tex in textures:
+                row = box.row()
+                format_name = tex.format if tex.format is not None else f"{tex.format_id:#x}"
+                row.label(text=f"#{tex.index} {format_name} {tex.width}x{tex.height} ({tex.size / 1024:.1f} KiB)")
+                decode = row.operator("object.decode_tpl_texture", text="", icon='IMAGE_DATA')
+                decode.index = tex.index
+
 # UI panel for active object modification
 class VIEW3D_PT_3_active_object_panel(bpy.types.Panel):
     bl_idname = "VIEW3D_PT_3_active_object_panel"
@@ -454,6 +513,13 @@ class VIEW3D_PT_3_active_object_panel(bpy.types.Panel):
                     unsubdivide_grid = properties.operator("object.collision_grid_subdivide", text="Un-subdivide Collision Grid")
                     unsubdivide_grid.unsubdivide = True
                     fit_grid = properties.operator("object.collision_grid_fit", text="Fit Collision Grid")
+                    fit_selected_grids = properties.operator("object.collision_grid_fit", text="Fit Collision Grids of All Selected")
+                    fit_selected_grids.all_selected = True
+                    fit_swept_grid = properties.operator("object.collision_grid_fit", text="Fit Collision Grid to Animation")
+                    fit_swept_grid.swept = True
+                    properties.operator("object.collision_grid_tune", text="Tune Collision Grid Step Counts")
+                    tune_all_grids = properties.operator("object.collision_grid_tune", text="Tune All Item Groups")
+                    tune_all_grids.all_item_groups = True
                     duplicate_grid = properties.operator("object.collision_grid_duplicate", text="Copy Collision Grid to All Selected")
 
             if '[PATH]' in obj.name:
@@ -466,6 +532,10 @@ class VIEW3D_PT_3_active_object_panel(bpy.types.Panel):
         if context.active_object is not None:
             obj = context.active_object
 
+            # Properties can't be written while drawing, so out of date UI properties are synced right after
+            if needsUIPropsSync(obj) and not bpy.app.timers.is_registered(syncActiveUIProps):
+                bpy.app.timers.register(syncActiveUIProps, first_interval=0.0)
+
             is_descriptor = False
             propertyGroup = []
 
@@ -498,6 +568,9 @@ class VIEW3D_PT_4_export_panel(bpy.types.Panel):
         layout.prop(context.scene, "export_model_path")
         layout.prop(context.scene, "export_gma_path")
         layout.prop(context.scene, "export_tpl_path")
+        layout.prop(context.scene, "export_native_tpl_path")
+        layout.prop(context.scene, "native_tpl_mipmaps")
+        layout.prop(context.scene, "export_use_native_tpl")
         layout.prop(context.scene, "export_raw_stagedef_path")
         layout.prop(context.scene, "export_stagedef_path")
         layout.prop(context.scene, "export_background_path")
@@ -507,12 +580,55 @@ class VIEW3D_PT_4_export_panel(bpy.types.Panel):
         layout.operator("object.generate_config", text="Generate Config")
         layout.operator("object.export_obj", text="Export OBJ")
         layout.operator("object.export_gmatpl", text="Export GMA/TPL")
+        layout.operator("object.export_native_tpl", text="Export Native TPL")
         export_lz_raw = layout.operator("object.export_stagedef", text="Export LZ.RAW")
         export_lz_raw.compressed = False
         export_lz = layout.operator("object.export_stagedef", text="Export LZ")
         export_lz.compressed = True
         export_bg = layout.operator("object.export_background", text="Export Background")
 
+# UI panel for the render cost report of the stage
+class VIEW3D_PT_4b_stage_report_panel(bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_4b_stage_report_panel"
+    bl_label = "Stage Report"
+    bl_category = "Blend2SMB"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator("object.generate_stage_report")
+        layout.prop(context.scene, "stage_report_sort")
+        layout.prop(context.scene, "stage_report_triangle_budget")
+        layout.prop(context.scene, "stage_report_switch_budget")
+        layout.prop(context.scene, "stage_report_texture_budget")
+
+        report = statics.stage_report
+        if report is None:
+            return
+
+        triangle_budget = context.scene.stage_report_triangle_budget
+        switch_budget = context.scene.stage_report_switch_budget
+        texture_budget = context.scene.stage_report_texture_budget * 1024
+
+        total = report.total
+        box = layout.box()
+        box.label(text=f"{len(report.rows)} models/item groups, {total.triangles} triangles, {total.vertices} vertices")
+        box.label(text=f"{total.materials} materials, ~{total.material_switches} material switches")
+        row = box.row()
+        row.alert = total.texture_memory > texture_budget
+        row.label(text=f"Texture memory: {total.texture_memory / 1024:.1f} KiB ({len(total.images)} textures)")
+        box.label(text=f"{total.reflective} reflective, {total.transparent} transparent models")
+
+        box = layout.box()
+        for report_row in stage_report.sort_rows(report, context.scene.stage_report_sort):
+            row = box.row()
+            row.alert = report_row.triangles > triangle_budget or report_row.material_switches > switch_budget
+            flags = ("MIR " if report_row.reflective else "") + ("TRANS" if report_row.transparent else "")
+            row.label(text=f"[{report_row.category}] {report_row.name}")
+            row.label(text=f"{report_row.triangles} tris, {report_row.material_switches} mats, {report_row.texture_memory / 1024:.0f} KiB {flags}")
+
 # UI panel for global scene/stage settings
 class VIEW3D_PT_5_settings(bpy.types.Panel):
     bl_idname = "VIEW3D_PT_5_settings"
@@ -531,41 +647,31 @@ class VIEW3D_PT_5_settings(bpy.types.Panel):
         layout.prop(context.scene, "fog_end_distance")
         layout.prop(context.scene, "fog_color")
         layout.label(text="Editor Operators")
-        layout.operator("view3d.draw_stage_objects")
         layout.operator("object.generate_texture_scroll_preview")
         layout.operator("object.set_backface_culling")
+        layout.operator("object.run_migrations")
         layout.label(text="Editor Properties")
         layout.prop(context.scene, "draw_stage_objects")
         layout.prop(context.scene, "draw_falloutProp")
         layout.prop(context.scene, "draw_collision_grid")
         layout.prop(context.scene, "draw_only_active_collision_grid")
+        layout.prop(context.scene, "draw_collision_heatmap")
+        layout.prop(context.scene, "overlay_lod_bias")
+        layout.prop(context.scene, "overlay_use_instancing")
+        layout.prop(context.scene, "overlay_show_stats")
         layout.prop(context.scene, "optimize_keyframes")
 
-# Operator for toggling the drawing of stage objects
+# Operator for starting the drawing of stage objects
 class VIEW3D_OT_draw_stage_objects(bpy.types.Operator):
     bl_idname = "view3d.draw_stage_objects"
     bl_label = "Draw Stage Objects"
-    bl_description = "Whether or not visual representations of stage objects should be drawn"
-
-    def modal(self, context, event):
-        context.area.tag_redraw()
-        return {'PASS_THROUGH'}
+    bl_description = "Draw visual representations of stage objects"
 
     def execute(self, context):
-        global draw_handlers
-        if context.scene.draw_stage_objects and context.area.type == "VIEW_3D":
-            # Arguments passed to the callback
-            args = (self, context)
-            # Adds the region drawing callback
-            self._handle_3d = bpy.types.SpaceView3D.draw_handler_add(draw_callback_3d, args, "WINDOW", "POST_VIEW")
-
-            statics.active_draw_handlers.append(self._handle_3d)
-            context.window_manager.modal_handler_add(self)
-
-            return {'RUNNING_MODAL'}
-        else:
-            self.report({"WARNING"}, "View3D not found, or stage visibility toggled off.")
-            return {'CANCELLED'}
+        # Overlays are drawn by a single handler registered with the addon, so this only switches them on.
+        # They're switched off with the Draw Stage Objects setting.
+        context.scene.draw_stage_objects = True
+        return {'FINISHED'}
 
 # Panel for material modification
 class MATERIAL_PT_blend2smb_material(bpy.types.Panel):
@@ -744,22 +850,6 @@ class MATERIAL_OT_set_material_flags(bpy.types.Operator):
             mat.name = f"[{self.flag}_{self.name}] {mat.name}"
 
         return {'FINISHED'}
-# Callback function for drawing stage objects, as well as the fallout plane grid
-def draw_callback_3d(self, context):
-    gpu.state.blend_set("ALPHA")
-    gpu.state.depth_test_set("LESS_EQUAL")
-
-    if context.scene.draw_stage_objects:
-        # Draw objects
-        for obj in context.scene.objects:
-            if obj.visible_get():
-                for desc in descriptors.descriptors:
-                    if desc.get_object_name() in obj.name:
-                        desc.render(obj)
-        # Draw fallout plane
-        if bpy.context.scene.draw_falloutProp:
-            FALLOUT_COLOR = (0.96, 0.26, 0.21, 0.3)
-            stage_object_drawing.draw_grid(-512, -512, 32, 32, 32, 32, bpy.context.scene.falloutProp, FALLOUT_COLOR)
 
 # Function for automatically setting up path names
 def autoPathNames(self, context):
@@ -769,26 +859,38 @@ def autoPathNames(self, context):
         context.scene.export_model_path = default_filename + ".obj"
         context.scene.export_gma_path = default_filename + ".gma"
         context.scene.export_tpl_path = default_filename + ".tpl"
+        context.scene.export_native_tpl_path = default_filename + ".native.tpl"
         context.scene.export_raw_stagedef_path = default_filename + ".lz.raw"
         context.scene.export_stagedef_path = default_filename + ".lz"
         context.scene.export_background_path = default_filename + ".bg.xml"
 
-# Function for syncing properties and UI properties of objects on load
-def autoUpdateUIProps():
-    bpy.context.view_layer.objects.active = None 
-
-    for obj in bpy.context.scene.objects:
-        updateUIProps(obj)
+# Returns the UI property groups of an object
+def getUIPropertyGroups(obj):
+    propertyGroup = []
+    # Append only one property group, unless the object has the '[MODEL]' tag
+    for desc in descriptors.descriptors:
+        if desc.get_object_name() in obj.name:
+            propertyGroup.append(desc.return_properties(obj))
+            if "[MODEL]" not in obj.name: break
+
+    return [group for group in propertyGroup if group is not None]
+
+# Returns the values of the custom properties shown by an object's UI property groups,
+# used to tell whether the object changed since it was last synced
+def getUIPropsStamp(obj, groups):
+    stamp = []
+    for group in groups:
+        for ui_prop in group.__annotations__.keys():
+            value = obj.get(ui_prop)
+            if hasattr(value, "to_list"):
+                value = tuple(value.to_list())
+            stamp.append(value)
+    return (obj.name, tuple(stamp))
 
 def updateUIProps(obj):
-        propertyGroup = []
-        # Append only one property group, unless the object has the '[MODEL]' tag
-        for desc in descriptors.descriptors:
-            if desc.get_object_name() in obj.name: 
-                propertyGroup.append(desc.return_properties(obj))
-                if "[MODEL]" not in obj.name: break
-        
-        for group in [group for group in propertyGroup if group is not None]:
+        groups = getUIPropertyGroups(obj)
+
+        for group in groups:
             for ui_prop in group.__annotations__.keys():
                 if ui_prop in obj.keys():
                     if getattr(group, ui_prop) is not None:
@@ -798,6 +900,50 @@ def updateUIProps(obj):
                 else:
                     print("Property " + ui_prop + " not found in " + obj.name)
 
+        statics.ui_props_stamps[obj.session_uid] = getUIPropsStamp(obj, groups)
+
+# Syncs the UI properties of an object, unless its custom properties haven't changed since it was last synced
+def syncUIProps(obj):
+    if needsUIPropsSync(obj):
+        updateUIProps(obj)
+
+def needsUIPropsSync(obj):
+    return statics.ui_props_stamps.get(obj.session_uid) != getUIPropsStamp(obj, getUIPropertyGroups(obj))
+
+# UI properties are synced lazily, when an object becomes active or its properties are drawn, instead of
+# syncing every object in the scene on load
+def syncActiveUIProps(*args):
+    obj = bpy.context.view_layer.objects.active if bpy.context.view_layer is not None else None
+    if obj is not None:
+        syncUIProps(obj)
+
+# Owner used for message bus subscriptions
+ui_sync_msgbus_owner = object()
+
+def subscribe_active_object():
+    bpy.msgbus.clear_by_owner(ui_sync_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+            key=(bpy.types.LayerObjects, "active"),
+            owner=ui_sync_msgbus_owner,
+            args=(),
+            notify=syncActiveUIProps,
+    )
+
+# Object session UIDs aren't kept across files, and message bus subscriptions are cleared on load
+@persistent
+def ui_sync_load_handler(dummy):
+    statics.ui_props_stamps.clear()
+    subscribe_active_object()
+
+def handle_register():
+    bpy.app.handlers.load_post.append(ui_sync_load_handler)
+    subscribe_active_object()
+
+def handle_unregister():
+    bpy.app.handlers.load_post.remove(ui_sync_load_handler)
+    bpy.msgbus.clear_by_owner(ui_sync_msgbus_owner)
+    statics.ui_props_stamps.clear()
+
 # Operator for auto-generating keyframes for a UV warp modifier to preview texture scroll
 class OBJECT_OT_generate_texture_scroll_preview(bpy.types.Operator):
     bl_idname = "object.generate_texture_scroll_preview"
@@ -960,30 +1106,65 @@ class OBJECT_OT_generate_cpu_starts(bpy.types.Operator):
 class OBJECT_OT_drop_selected_objects(bpy.types.Operator):
     bl_idname = "object.drop_selected_objects"
     bl_label = "Drop Selected Objects"
-    bl_description = "Drops the selected objects to a location 0.5 units above the nearest surface below the object."
-    bl_options = {"UNDO"}
+    bl_description = "Drops the selected objects onto the nearest surface in the drop direction, placed above it by the height of each object type"
+    bl_options = {'UNDO', 'REGISTER'}
+
+    direction: EnumProperty(name="Direction",
+            items=[('NEG_Z', "-Z (Down)", ""),
+                   ('POS_Z', "+Z (Up)", ""),
+                   ('NEG_X', "-X", ""),
+                   ('POS_X', "+X", ""),
+                   ('NEG_Y', "-Y", ""),
+                   ('POS_Y', "+Y", ""),
+                   ('LOCAL', "Local -Z", "Drop each object along its own -Z axis")],
+            default='NEG_Z')
+    distance: FloatProperty(name="Max Distance", default=1000, min=0.0)
+    collidable_only: BoolProperty(name="Collidable Only", description="Only drop onto item group models with collision (without [NOCOLI])", default=False)
+    target_item_group: StringProperty(name="Item Group", description="Only drop onto the models of this item group", options={"SKIP_SAVE"})
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "direction")
+        layout.prop(self, "distance")
+        layout.prop(self, "collidable_only")
+        layout.prop_search(self, "target_item_group", context.scene, "objects")
+
+    def execute(self, context):
+        depsgraph = context.evaluated_depsgraph_get()
+
+        item_group = None
+        if self.target_item_group != "":
+            item_group = context.scene.objects.get(self.target_item_group)
+            if item_group is None or "[IG]" not in item_group.name:
+                self.report({'ERROR'}, "Drop target " + self.target_item_group + " is not an item group")
+                return {'CANCELLED'}
+
+        # Build the BVH tree once for all objects, leaving out the objects being dropped
+        dropped_objects = context.selected_objects
+        excluded = set(dropped_objects)
+        targets = [obj for obj in object_drop.get_drop_targets(context.scene, self.collidable_only, item_group) if obj not in excluded]
+        bvh = object_drop.build_drop_bvh(targets, depsgraph)
+        if bvh is None:
+            self.report({'WARNING'}, "No surfaces to drop onto")
+            return {'CANCELLED'}
+
+        dropped = object_drop.drop_objects(dropped_objects, bvh, self.direction, self.distance)
+        print("Dropped " + str(dropped) + " of " + str(len(dropped_objects)) + " objects")
+
+        return {'FINISHED'}
+
+# Operator for re-running every file migration, e.g. after appending objects from older files
+class OBJECT_OT_run_migrations(bpy.types.Operator):
+    bl_idname = "object.run_migrations"
+    bl_label = "Update Legacy Properties"
+    bl_description = "Updates the properties of all objects and materials made with older versions of the addon, including ones appended from older files"
+    bl_options = {'UNDO'}
 
     def execute(self, context):
-        for object in [obj for obj in context.selected_objects]:
-            cast = context.scene.ray_cast(context.view_layer.depsgraph, object.location, Vector((0,0,-1)), distance=1000)
-            if cast[0]:
-                height = 0.0 
-
-                if "[START]" in object.name or "[BANANA_S]" in object.name:
-                    height = 0.5
-                elif "[BANANA_B]" in object.name:
-                    height = 1.0 
-                elif "[SPHERE_COL]" in object.name:
-                    height = object.scale.x
-                elif "[CYLINDER_COL]" in object.name or "[FALLOUT_VOL]" in object.name:
-                    height = object.scale.z/2
-
-                normal = cast[2]
-                object.location = cast[1]
-                object.location = object.location + normal*height
-
-                face_rotation = Vector.to_track_quat(normal, 'Z')
-                object.rotation_euler = face_rotation.to_euler()
+        steps = migrations.migrate_file(from_version=0)
+        for obj in context.scene.objects:
+            updateUIProps(obj)
+        print(f"Ran {steps} migration steps")
 
         return {'FINISHED'}
 
@@ -1018,7 +1199,8 @@ class OBJECT_OT_export_obj(bpy.types.Operator):
 
         bpy.ops.object.mode_set(mode='OBJECT')
         bpy.ops.object.select_all(action='DESELECT')
-        for obj in [obj for obj in bpy.context.editable_objects if obj.type == 'MESH']:
+        # Imported background point clouds are loose vertices by design, so they're left alone
+        for obj in [obj for obj in bpy.context.editable_objects if obj.type == 'MESH' and not background_import.is_point_cloud(obj)]:
             print(str(obj))
             bpy.context.view_layer.objects.active = obj
             bpy.ops.object.mode_set(mode='EDIT')
@@ -1126,7 +1308,7 @@ class OBJECT_OT_export_obj(bpy.types.Operator):
         # Dumb hacky way to not export path curves since they screw everything up
         bpy.ops.object.select_all(action='DESELECT')
         for obj in context.scene.objects:
-            if '[PATH]' not in obj.name:
+            if '[PATH]' not in obj.name and not background_import.is_point_cloud(obj):
                 obj.select_set(True)
 
         # Oh gosh, more hacky stuff... this lets the unshaded material preview work since only
@@ -1251,6 +1433,41 @@ class OBJECT_OT_export_obj(bpy.types.Operator):
         print("Finished exporting OBJ")
         return {'FINISHED'}
 
+# Returns the path of the MTL written alongside an exported OBJ
+def get_mtl_path(obj_path):
+    return os.path.splitext(obj_path)[0] + ".mtl"
+
+# Returns the external GMA/TPL paths if both exist, so they get merged into exported models, or None
+def get_merged_gmatpl_paths(scene):
+    import_gma_path = bpy.path.abspath(scene.import_gma_path)
+    import_tpl_path = bpy.path.abspath(scene.import_tpl_path)
+    if os.path.exists(import_gma_path) and os.path.exists(import_tpl_path):
+        return import_gma_path, import_tpl_path
+    return None
+
+# Builds the textures of the stage's TPL in the order GxModelViewer numbers them in the GMA: the textures of the exported MTL,
+# followed by the textures of the external TPL if it gets merged. Raises ValueError if a texture can't be read.
+def get_native_tpl_textures(scene, mtl_path):
+    # The OBJ exporter writes material names with spaces replaced
+    materials = {}
+    for mat in bpy.data.materials:
+        materials.setdefault(mat.name, mat)
+        materials.setdefault(mat.name.replace(" ", "_"), mat)
+
+    textures = []
+    for material_name, texture_path in tpl_encoder.read_mtl_textures(mtl_path):
+        mat = materials.get(material_name)
+        image = tpl_encoder.get_material_image(mat)
+        if image is None or 0 in image.size:
+            raise ValueError(f"No image with pixel data found for material {material_name} ({texture_path})")
+        textures.append(tpl_encoder.TplTexture(tpl_encoder.read_image_pixels(image), tpl_encoder.get_material_format(mat), scene.native_tpl_mipmaps))
+
+    merged_paths = get_merged_gmatpl_paths(scene)
+    if merged_paths is not None:
+        textures.extend(gma_tpl_reader.read_tpl_encoded_textures(merged_paths[1]))
+
+    return textures
+
 # Operator for calling GxModelViewer to export the stage model as a .GMA and .TPL file
 class OBJECT_OT_export_gmatpl(bpy.types.Operator):
     bl_idname = "object.export_gmatpl"
@@ -1258,6 +1475,43 @@ class OBJECT_OT_export_gmatpl(bpy.types.Operator):
     bl_description = "Export an OBJ, then call GxModelViewer to export a GMA/TPL to the specified path"
     bl_options = {'UNDO'} 
 
+    # Runs GxModelViewer and reports its warnings and errors. Returns whether it ran.
+    def run_gx(self, gx_path, args):
+        try:
+            gx_result = subprocess.run(args, capture_output=True)
+        except PermissionError:
+            try:
+                os.chmod(gx_path, stat.S_IRWXU | stat.S_IROTH | stat.S_IRGRP)  # attempt to set execute permissions for the owner
+                gx_result = subprocess.run(args, capture_output=True)
+            except:
+                self.report({'ERROR'}, f"GxModelViewer does not have the correct permissions to run. \nPlease set executable permissions on:\n{gx_path}")
+                return False
+        except:
+            self.report({'ERROR'}, f"GxModelViewer failed to run. See the console for more details.")
+            return False
+
+        gx_stdout_bytes = gx_result.stdout
+
+        try:
+            gx_stdout_str = gx_stdout_bytes.decode().split('\r\n')
+        except UnicodeDecodeError:
+            try:
+                if sys.platform == 'win32':
+                    codepage = f"cp{windll.kernel32.GetConsoleOutputCP()}"
+                    gx_stdout_str = gx_stdout_bytes.decode(encoding=codepage).split('\r\n')
+                else:
+                    gx_stdout_str = gx_stdout_bytes.decode(encoding=locale.getpreferredencoding(False)).split('\r\n')
+            except:
+                gx_stdout_str = gx_stdout_bytes.decode(errors="replace").split('\r\n')
+
+        errors = [error for error in gx_stdout_str if ("Import Warning" in error) or ("Error" in error)]
+        if len(errors) > 0:
+            self.report({'ERROR'}, "GxModelViewer warnings/errors occured: " + "\n".join(errors))
+
+        print('\n'.join(gx_stdout_str))
+
+        return True
+
     def execute(self, context):
         bpy.ops.object.export_obj("INVOKE_DEFAULT")
         obj_path = bpy.path.abspath(context.scene.export_model_path)
@@ -1277,57 +1531,157 @@ class OBJECT_OT_export_gmatpl(bpy.types.Operator):
         args.append(preset_path)
         args.append("-importObjMtl")
         args.append(obj_path)
-        args.append("-removeUnusedTextures")
 
-        import_gma_path = bpy.path.abspath(context.scene.import_gma_path) 
-        import_tpl_path = bpy.path.abspath(context.scene.import_tpl_path)
-        if os.path.exists(import_gma_path) and os.path.exists(import_tpl_path):
+        # With native encoding, GxModelViewer only writes the GMA and the TPL is written here instead. Unused textures
+        # are kept then, since removing them would renumber the GMA's texture indices away from the MTL order.
+        use_native_tpl = context.scene.export_use_native_tpl
+        if not use_native_tpl:
+            args.append("-removeUnusedTextures")
+
+        merged_paths = get_merged_gmatpl_paths(context.scene)
+        if merged_paths is not None:
             args.append("-mergeGmaTpl")
-            args.append(import_gma_path + "," + import_tpl_path)
+            args.append(merged_paths[0] + "," + merged_paths[1])
 
         args.append("-exportGma")
         args.append(gma_path)
-        args.append("-exportTpl")
-        args.append(tpl_path)
+
+        if not use_native_tpl:
+            args.append("-exportTpl")
+            args.append(tpl_path)
 
         if not os.path.exists(gx_path):
             self.report({'ERROR'}, "GxModelViewer not found. Ensure you have downloaded BlendToSMBStage2 from the 'Releases' section on GitHub, not from the 'Code' dropdown.")
             return {'CANCELLED'}
 
-        try:
-            gx_result = subprocess.run(args, capture_output=True)
-        except PermissionError:
+        if not self.run_gx(gx_path, args):
+            return {'CANCELLED'}
+
+        if use_native_tpl:
+            start_time = time.perf_counter()
             try:
-                os.chmod(gx_path, stat.S_IRWXU | stat.S_IROTH | stat.S_IRGRP)  # attempt to set execute permissions for the owner
-                gx_result = subprocess.run(args, capture_output=True)
-            except:
-                self.report({'ERROR'}, f"GxModelViewer does not have the correct permissions to run. \nPlease set executable permissions on:\n{gx_path}")
-                return {'CANCELLED'}
-        except:
-            self.report({'ERROR'}, f"GxModelViewer failed to run. See the console for more details.")
+                textures = get_native_tpl_textures(context.scene, get_mtl_path(obj_path))
+
+                # The GMA must not reference textures the MTL order didn't account for
+                gma = gma_tpl_reader.read_gma(gma_path)
+                used_count = max((max(model.texture_indices, default=-1) for model in gma.models), default=-1) + 1
+                if used_count > len(textures):
+                    raise ValueError(f"the GMA uses {used_count} textures, but only {len(textures)} were found")
+
+                tpl_encoder.write_tpl(tpl_path, textures)
+                print(f"Encoded {len(textures)} textures to {tpl_path} in {time.perf_counter() - start_time:.2f}s")
+            except (ValueError, OSError, struct.error) as e:
+                self.report({'WARNING'}, f"Couldn't encode the TPL natively ({e}), exporting it with GxModelViewer instead")
+                obj_arg_index = args.index(obj_path) + 1
+                fallback_args = args[:obj_arg_index] + ["-removeUnusedTextures"] + args[obj_arg_index:] + ["-exportTpl", tpl_path]
+                if not self.run_gx(gx_path, fallback_args):
+                    return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+# Operator for encoding the textures of the stage into a .TPL file without GxModelViewer
+class OBJECT_OT_export_native_tpl(bpy.types.Operator):
+    bl_idname = "object.export_native_tpl"
+    bl_label = "Export Native TPL"
+    bl_description = "Encode the textures of the exported OBJ (plus the external TPL, if merged) into a TPL, in the order GxModelViewer numbers them and in the format set by each material's texture type. Unchanged textures are not re-encoded"
+
+    def execute(self, context):
+        start_time = time.perf_counter()
+        tpl_path = bpy.path.abspath(context.scene.export_native_tpl_path)
+        mtl_path = get_mtl_path(bpy.path.abspath(context.scene.export_model_path))
+
+        # Textures are written in the order of the exported MTL, which is what the GMA's texture indices follow
+        if not os.path.isfile(mtl_path):
+            self.report({'ERROR'}, "No exported MTL found, export the OBJ first")
             return {'CANCELLED'}
 
-        
-        gx_stdout_bytes = gx_result.stdout
+        try:
+            textures = get_native_tpl_textures(context.scene, mtl_path)
+            tpl_encoder.write_tpl(tpl_path, textures)
+        except (ValueError, struct.error) as e:
+            self.report({'ERROR'}, f"Failed to encode TPL: {e}")
+            return {'CANCELLED'}
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to write TPL: {e}")
+            return {'CANCELLED'}
+
+        print(f"Encoded {len(textures)} textures to {tpl_path} in {time.perf_counter() - start_time:.2f}s")
+        return {'FINISHED'}
+
+# Operator for reading the contents of the external GMA/TPL set for import
+class OBJECT_OT_inspect_gmatpl(bpy.types.Operator):
+    bl_idname = "object.inspect_gmatpl"
+    bl_label = "Inspect External GMA/TPL"
+    bl_description = "Lists the models, materials and textures of the external GMA/TPL that gets merged into exported models"
+
+    def execute(self, context):
+        gma_path = bpy.path.abspath(context.scene.import_gma_path)
+        tpl_path = bpy.path.abspath(context.scene.import_tpl_path)
+        statics.inspected_gma = None
+        statics.inspected_tpl = None
+
+        if not os.path.isfile(gma_path) and not os.path.isfile(tpl_path):
+            self.report({'ERROR'}, "No external GMA or TPL found at the import paths")
+            return {'CANCELLED'}
 
         try:
-            gx_stdout_str = gx_stdout_bytes.decode().split('\r\n')
-        except UnicodeDecodeError:
-            try:
-                if sys.platform == 'win32':
-                    codepage = f"cp{windll.kernel32.GetConsoleOutputCP()}"
-                    gx_stdout_str = gx_stdout_bytes.decode(encoding=codepage).split('\r\n')
-                else:
-                    gx_stdout_str = gx_stdout_bytes.decode(encoding=locale.getpreferredencoding(False)).split('\r\n')
-            except:
-                gx_stdout_str = gx_stdout_bytes.decode(errors="replace").split('\r\n')
+            if os.path.isfile(gma_path):
+                statics.inspected_gma = gma_tpl_reader.read_gma(gma_path)
+            if os.path.isfile(tpl_path):
+                statics.inspected_tpl = gma_tpl_reader.read_tpl(tpl_path)
+        except (ValueError, struct.error) as e:
+            self.report({'ERROR'}, f"Failed to read external GMA/TPL: {e}")
+            return {'CANCELLED'}
 
-        errors = [error for error in gx_stdout_str if ("Import Warning" in error) or ("Error" in error)]
-        if len(errors) > 0:
-            self.report({'ERROR'}, "GxModelViewer warnings/errors occured: " + "\n".join(errors))
-        
-        print('\n'.join(gx_stdout_str))
-        
+        if statics.inspected_gma is not None:
+            print(f"GMA {gma_path}:")
+            for model in statics.inspected_gma.models:
+                print(f"\t{model.index}: {model.name}, {model.size} bytes, textures {model.texture_indices}")
+
+        if statics.inspected_tpl is not None:
+            print(f"TPL {tpl_path}:")
+            for tex in statics.inspected_tpl.textures:
+                if tex is not None:
+                    print(f"\t{tex.index}: {tex.format} {tex.width}x{tex.height}, {tex.level_count} levels, {tex.size} bytes")
+
+        return {'FINISHED'}
+
+# Operator for building the render cost report of the stage
+class OBJECT_OT_generate_stage_report(bpy.types.Operator):
+    bl_idname = "object.generate_stage_report"
+    bl_label = "Analyze Stage"
+    bl_description = "Counts the triangles, vertices, materials and texture memory of every item group and background/foreground model"
+
+    def execute(self, context):
+        start_time = time.time()
+        statics.stage_report = stage_report.build_stage_report(context.scene, context.evaluated_depsgraph_get())
+        total = statics.stage_report.total
+        print(f"Analyzed stage in {time.time() - start_time:.2f}s: {total.triangles} triangles, {total.texture_memory} bytes of textures")
+
+        return {'FINISHED'}
+
+# Operator for decoding a texture of the inspected TPL into a Blender image
+class OBJECT_OT_decode_tpl_texture(bpy.types.Operator):
+    bl_idname = "object.decode_tpl_texture"
+    bl_label = "Decode TPL Texture"
+    bl_description = "Decodes this texture of the external TPL into a Blender image"
+
+    index: bpy.props.IntProperty(default=0)
+
+    def execute(self, context):
+        tpl = statics.inspected_tpl
+        if tpl is None or not (0 <= self.index < len(tpl.textures)):
+            self.report({'ERROR'}, "Texture not found, inspect the external TPL first")
+            return {'CANCELLED'}
+
+        try:
+            pixels = gma_tpl_reader.decode_tpl_texture(tpl, self.index)
+        except (ValueError, OSError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        image = gma_tpl_reader.pixels_to_image(pixels, f"[TPL:{os.path.basename(tpl.path)}:{self.index}]")
+        self.report({'INFO'}, f"Decoded texture into image {image.name}")
         return {'FINISHED'}
 
 # Operator for calling Workshop 2 to export the stage config as a .LZ or .LZ.RAW file
@@ -1411,71 +1765,146 @@ class OBJECT_OT_import_background(bpy.types.Operator):
         if not (os.path.exists(bg_path)):
             self.report({'ERROR'}, "Invalid background file path selected!")
             return {'CANCELLED'}
-        
-        bg = etree.parse(bg_path)
-        bg_root = bg.getroot()
 
-        if bg_root.tag != 'superMonkeyBallBackground':
-            self.report({'ERROR'}, "Imported background XML not an exported background XML")
+        try:
+            if not background_import.is_background_xml(bg_path):
+                self.report({'ERROR'}, "Imported background XML not an exported background XML")
+                return {'CANCELLED'}
+
+            if context.scene.background_import_preview and context.scene.background_import_point_cloud:
+                # Every model and effect keyframe becomes a point of a single instanced mesh
+                start_time = time.perf_counter()
+                cloud, created = background_import.import_background_point_cloud(bg_path,
+                                                                                 context.scene,
+                                                                                 context.scene.background_import_use_cubes,
+                                                                                 context.scene.background_import_effects,
+                                                                                 context.window_manager)
+                print(f"Imported {created} background instances into {cloud.name} in {time.perf_counter() - start_time:.2f}s")
+            elif context.scene.background_import_preview:
+                # Models are streamed from the file and created in batches, effect keyframes can be imported later on demand
+                start_time = time.perf_counter()
+                collection, created = background_import.import_background(bg_path,
+                                                                          context.scene,
+                                                                          context.scene.background_import_use_cubes,
+                                                                          context.scene.background_import_effects,
+                                                                          context.window_manager)
+                print(f"Imported {created} background objects into {collection.name} in {time.perf_counter() - start_time:.2f}s")
+        except etree.ParseError as e:
+            self.report({'ERROR'}, "Failed to parse background XML: " + str(e))
+            return {'CANCELLED'}
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
 
-        if context.scene.background_import_preview:
-            # Converts an XML attribute list from SMB coordinates to Blender coordinates,
-            # 'n' is whether or not to negate the Y axis
-            convert_from_smb_coords = lambda v, n: Vector((float(v[0]), (-1+int(2*(not n)))*float(v[2]), float(v[1])))
-
-            # Converts an XML attribute list from degrees to radians
-            convert_to_radians = lambda v: Vector((math.radians(v[0]), math.radians(v[1]), math.radians(v[2])))
-
-            for i, imported_bg_model in enumerate(list(bg_root)):
-                preview_name = imported_bg_model.find('name').text
-                preview_pos = convert_from_smb_coords(list(imported_bg_model.find('position').attrib.values()), True)
-                preview_rot = convert_to_radians(convert_from_smb_coords(list(imported_bg_model.find('rotation').attrib.values()), True))
-                preview_scale = convert_from_smb_coords(list(imported_bg_model.find('scale').attrib.values()), False)
-                preview_dimensions = Vector((1, 1, 1))
-
-                print("Importing model " + str(preview_name))
-
-                if preview_name in dimension_dict.dimensions.keys():
-                    preview_dimensions = convert_from_smb_coords(list(dimension_dict.dimensions[preview_name]), False)
-
-                newEmpty = bpy.data.objects.new("[EXT_IMPORTED:{}:{}]".format(preview_name, i), None)
-                newEmpty.location = preview_pos
-                newEmpty.rotation_euler = preview_rot
-                if context.scene.background_import_use_cubes:
-                    newEmpty.empty_display_size = 0.5
-                    newEmpty.scale[0] = preview_scale[0] * preview_dimensions[0]
-                    newEmpty.scale[1] = preview_scale[1] * preview_dimensions[1]
-                    newEmpty.scale[2] = preview_scale[2] * preview_dimensions[2]
-                    newEmpty.empty_display_type = "CUBE"
-                else:
-                    newEmpty.empty_display_type = "ARROWS"
-                bpy.context.collection.objects.link(newEmpty)
-            
-                effects = imported_bg_model.find('effectKeyframes')
-                if effects is not None: 
-                    for effect in effects:
-                        if effect.tag == 'effectType1':
-                            for j, ef1 in enumerate(list(effect)):
-                                effect_pos = convert_from_smb_coords([ef1.attrib['posX'], ef1.attrib['posY'], ef1.attrib['posZ']], True)
-                                effect_rot = convert_to_radians(convert_from_smb_coords([ef1.attrib['rotX'], ef1.attrib['rotY'], ef1.attrib['rotZ']], True))
-
-                                newEmpty = bpy.data.objects.new("[EXT_IMPORTED_FX:{}:{}:{}]".format(preview_name, i, j), None)
-                                newEmpty.location = effect_pos
-                                newEmpty.rotation_euler = effect_rot
-                                newEmpty.empty_display_type = "ARROWS"
-                                bpy.context.collection.objects.link(newEmpty)
-
-                        elif effect.tag == 'effectType2':
-                            for j, ef2 in enumerate(list(effect)):
-                                effect_pos = convert_from_smb_coords([ef2.attrib['posX'], ef2.attrib['posY'], ef2.attrib['posZ']], True)
-                                effect_rot = Vector((0,0,0))
-
-                                newEmpty = bpy.data.objects.new("[EXT_IMPORTED_FX:{}:{}:{}]".format(preview_name, i, j), None)
-                                newEmpty.location = effect_pos
-                                newEmpty.rotation_euler = effect_rot
-                                newEmpty.empty_display_type = "ARROWS"
-                                bpy.context.collection.objects.link(newEmpty)
+        return {'FINISHED'}
+
+# Operator for importing the effect keyframe previews of selected imported background objects
+class OBJECT_OT_import_background_effects(bpy.types.Operator):
+    bl_idname ="object.import_background_effects"
+    bl_label = "Import Background Effects"
+    bl_description = "Import the effect keyframe previews of the selected imported background objects from the background .XML file"
+    bl_options = {'UNDO'}
+
+    def execute(self, context):
+        bg_path = bpy.path.abspath(context.scene.background_import_path)
+        if not (os.path.exists(bg_path)):
+            self.report({'ERROR'}, "Invalid background file path selected!")
+            return {'CANCELLED'}
+
+        # Effect previews that already exist aren't imported again
+        existing = set(import_id[0] for import_id in background_import.build_import_index(context.scene) if import_id[1] >= 0)
+
+        indices = {}
+        for obj in context.selected_objects:
+            index = background_import.get_imported_model_index(obj)
+            if index is not None and index not in existing:
+                indices[index] = obj.users_collection[0]
+
+        if len(indices) == 0:
+            self.report({'WARNING'}, "No imported background objects without effect previews selected")
+            return {'CANCELLED'}
+
+        created = 0
+        try:
+            # Group by collection so every collection only needs one pass over the file
+            for collection in set(indices.values()):
+                collection_indices = [index for index, col in indices.items() if col == collection]
+                created += background_import.import_effect_previews(bg_path, collection_indices, collection)
+        except (etree.ParseError, ValueError) as e:
+            self.report({'ERROR'}, "Failed to parse background XML: " + str(e))
+            return {'CANCELLED'}
+
+        print(f"Imported {created} background effect objects")
+
+        return {'FINISHED'}
+
+# Operator for turning the selected points of an imported background point cloud into editable empties
+class OBJECT_OT_materialize_background_instances(bpy.types.Operator):
+    bl_idname ="object.materialize_background_instances"
+    bl_label = "Materialize Background Instances"
+    bl_description = "Replaces the selected points of an imported background point cloud with preview empties that can be edited"
+    bl_options = {'UNDO'}
+
+    def execute(self, context):
+        cloud = context.active_object
+        if not background_import.is_point_cloud(cloud):
+            self.report({'ERROR'}, "Active object is not an imported background point cloud")
+            return {'CANCELLED'}
+
+        # Selection made in edit mode is only written to the mesh when leaving edit mode
+        if cloud.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        created = background_import.materialize_point_cloud_selection(cloud)
+        if created == 0:
+            self.report({'WARNING'}, "No points selected, select instances in edit mode first")
+            return {'CANCELLED'}
+
+        print(f"Materialized {created} background instances")
+
+        return {'FINISHED'}
+
+# Operator for measuring background model dimensions from a directory of GMAs into the user dimension table
+class OBJECT_OT_generate_dimension_table(bpy.types.Operator):
+    bl_idname ="object.generate_dimension_table"
+    bl_label = "Generate BG Dimension Table"
+    bl_description = "Measures the models of every GMA in the specified directory and adds their dimensions to the BG dimension table file. Dimensions are measured from the vertices of each model, models that can't be measured are listed in the console and left out"
+    bl_options = {'REGISTER'}
+
+    overwrite_vanilla: BoolProperty(name="Overwrite Vanilla Dimensions", description="Also add measured dimensions for models that already have hand-measured vanilla dimensions", default=False)
+
+    def execute(self, context):
+        gma_directory = bpy.path.abspath(context.scene.background_dimension_gma_directory)
+        table_path = bpy.path.abspath(context.scene.background_dimension_table_path)
+        if not os.path.isdir(gma_directory):
+            self.report({'ERROR'}, "Invalid GMA directory selected!")
+            return {'CANCELLED'}
+        if context.scene.background_dimension_table_path == "":
+            self.report({'ERROR'}, "No BG dimension table path to write to!")
+            return {'CANCELLED'}
+
+        start_time = time.perf_counter()
+        measured, approximate, errors = dimension_dict.generate_table(gma_directory)
+        for path, error in errors:
+            print(f"Failed to read {path}: {error}")
+        for name, diameter in approximate.items():
+            print(f"Couldn't measure the vertices of {name}, left out (bounding sphere diameter {diameter})")
+
+        # Measurements are added to the existing user table, vanilla entries are kept unless overwritten
+        table = {}
+        if os.path.isfile(table_path):
+            table.update(dimension_dict.get_user_table(table_path))
+        vanilla = dimension_dict.get_vanilla_table()
+        for name, dimensions in measured.items():
+            if self.overwrite_vanilla or name not in vanilla:
+                table[name] = dimensions
+
+        dimension_dict.write_table(table_path, table)
+        print(f"Measured {len(measured)} models in {time.perf_counter() - start_time:.2f}s, wrote {len(table)} dimensions to {table_path}")
+        if errors:
+            self.report({'WARNING'}, f"{len(errors)} GMA files couldn't be read, see the console for details")
+        elif approximate:
+            self.report({'WARNING'}, f"{len(approximate)} models couldn't be measured, see the console for details")
 
         return {'FINISHED'}
 
@@ -1577,17 +2006,16 @@ class OBJECT_OT_export_background(bpy.types.Operator):
             descriptor_model_bg.DescriptorBG.generate_xml_with_anim(root, bg_exp.obj, bg_exp.anim_data)
 
         # Import background and foreground objects from a .XML file, if it exists
-        obj_names = [obj.name for obj in context.scene.objects]
         bg_path = bpy.path.abspath(context.scene.background_import_path)
         if os.path.exists(bg_path):
-            bg = etree.parse(bg_path)
-            bg_root = bg.getroot()
-
-            if bg_root.tag != 'superMonkeyBallBackground':
-                self.report({'ERROR'}, "Imported background XML not an exported background XML")
+            try:
+                imported_models = background_merge.get_background(bg_path)
+            except (etree.ParseError, ValueError) as e:
+                self.report({'ERROR'}, str(e))
                 return {'CANCELLED'}
 
-            append_imported_bg_objects(self, context, bg_root, root, obj_names)
+            changed = background_merge.append_imported_bg_objects(context.scene, imported_models, root, context.scene.background_import_preview)
+            print(f"Merged {len(imported_models)} imported background objects ({changed} changed)")
 
         print("Completed, saving...")
 
@@ -1610,160 +2038,6 @@ class OBJECT_OT_export_background(bpy.types.Operator):
 
         return {'FINISHED'}
 
-# Function for appending all imported background objects in an XML to a config root
-def append_imported_bg_objects(self, context, imported_xml_root, destination_root, obj_names):
-    # There's lots of wacky axis swapping going on here so make sure to pay attention to that
-
-    # Converts an XML attribute list from Blender coordinates to SMB coordinates,
-    # 'n' is whether or not to negate the Z axis
-    convert_to_smb_coords = lambda v, n: Vector((float(v[0]), float(v[2]), (float(-1+int(2*(not n)))*float(v[1]))))
-
-    # Converts an XML attribute list to a vector.
-    convert_to_vector = lambda v: Vector((float(v[0]), float(v[1]), float(v[2])))
-
-    # Converts an XML attribute list from radians to degrees
-    convert_to_degrees = lambda v: Vector((math.degrees(v[0]), math.degrees(v[1]), math.degrees(v[2])))
-
-    for index, imported_bg_model in enumerate(list(imported_xml_root)):
-        xml_name = imported_bg_model.find('name')
-        blender_name = "[EXT_IMPORTED:" + xml_name.text + ":" + str(index) + "]"
-
-        print(f"\tExporting imported background object {blender_name}...")
-
-        # If we're using background previews, check to see if the object exists, if it doesn't, it was probably deleted
-        if context.scene.background_import_preview:
-            if blender_name in obj_names:
-                imported_blender_object = context.scene.objects[blender_name]
-            else:
-                continue
-        else:
-            imported_blender_object = None
-
-        # Grabs the original pos/rot/scale from the imported XML file
-        # The XML background is expected to provide vectors in SMB's coordinate system, so we do not convert here
-        orig_pos = convert_to_vector(list(imported_bg_model.find('position').attrib.values()))
-        orig_rot = convert_to_vector(list(imported_bg_model.find('rotation').attrib.values()))
-        orig_scale = convert_to_vector(list(imported_bg_model.find('scale').attrib.values()))
-
-        # Handles position of imported BG object
-        bg_pos = imported_bg_model.find('position').attrib
-
-        # If no empties were imported, we can just rely on the original position
-        if imported_blender_object is None:
-            current_bg_pos = orig_pos
-        else:
-            current_bg_pos = convert_to_smb_coords(imported_blender_object.location, True)
-
-        bg_pos['x'] = str(current_bg_pos[0])
-        bg_pos['y'] = str(current_bg_pos[1])
-        bg_pos['z'] = str(current_bg_pos[2])
-
-        # Handles rotation of imported BG object
-        bg_rot = imported_bg_model.find('rotation').attrib
-
-        # If no empties were imported, we can just rely on the original position
-        if imported_blender_object is None:
-            current_bg_rot = orig_rot
-        else:
-            current_bg_rot = convert_to_smb_coords(convert_to_degrees(imported_blender_object.rotation_euler), True)
-
-        bg_rot['x'] = str(current_bg_rot[0])
-        bg_rot['y'] = str(current_bg_rot[1])
-        bg_rot['z'] = str(current_bg_rot[2])
-
-        # Handles scale of imported BG object
-        bg_scale = imported_bg_model.find('scale').attrib
-
-        # If no empties were imported, we can just rely on the original position
-        # Also special handling for the case of cube empty approximations, which are scaled to their in-game
-        # dimensions. Since this effect is achieved through scaling, this is accounted for here, and the scaling
-        # is un-done.
-        if imported_blender_object is None:
-            current_bg_scale = orig_scale
-        else:
-            bg_dimensions = Vector((1, 1, 1))
-
-            if xml_name.text in dimension_dict.dimensions.keys():
-                bg_dimensions = dimension_dict.dimensions[xml_name.text]
-
-            adjusted_scale = Vector((imported_blender_object.scale[0]/bg_dimensions[0],
-                                     imported_blender_object.scale[1]/bg_dimensions[2],
-                                     imported_blender_object.scale[2]/bg_dimensions[1]))
-            current_bg_scale = convert_to_smb_coords(adjusted_scale, False)
-
-        bg_scale['x'] = str(current_bg_scale[0])
-        bg_scale['y'] = str(current_bg_scale[1])
-        bg_scale['z'] = str(current_bg_scale[2])
-
-        # Handles imported effects
-        effects = imported_bg_model.find('effectKeyframes')
-        if effects is not None:
-            for effect in effects:
-                if effect.tag == 'effectType1':
-                    for j, ef1 in enumerate(list(effect)):
-                        blender_name = "[EXT_IMPORTED_FX:" + xml_name.text + ":" + str(index) + ":" + str(j) + "]"
-
-                        if blender_name in obj_names:
-                            effect_obj = context.scene.objects[blender_name]
-                        else:
-                            effect_obj = None
-
-                        attr = ef1.attrib
-
-                        if effect_obj is not None:
-                            attr['posX'] = str(effect_obj.location[0])
-                            attr['posY'] = str(effect_obj.location[2])
-                            attr['posZ'] = str(-1*effect_obj.location[1])
-                            attr['rotX'] = str(math.degrees(effect_obj.rotation_euler[0]))
-                            attr['rotY'] = str(math.degrees(effect_obj.rotation_euler[2]))
-                            attr['rotZ'] = str(math.degrees(-1*effect_obj.rotation_euler[1]))
-
-                elif effect.tag == 'effectType2':
-                    for j, ef2 in enumerate(list(effect)):
-                        blender_name = "[EXT_IMPORTED_FX:" + xml_name.text + ":" + str(index) + ":" + str(j) + "]"
-
-                        if blender_name in obj_names:
-                            effect_obj = context.scene.objects[blender_name]
-                        else:
-                            effect_obj = None
-
-                        attr = ef2.attrib
-
-                        if effect_obj is not None:
-                            attr['posX'] = str(effect_obj.location[0])
-                            attr['posY'] = str(effect_obj.location[2])
-                            attr['posZ'] = str(-1*effect_obj.location[1])
-
-        anim = imported_bg_model.find('animKeyframes')
-
-        # Handles updating all animation keyframes for imported object previews
-        # TODO: Not perfect! Need to handle object translations properly...
-        if anim is not None and imported_blender_object is not None:
-            # For imported objects, determine how much the object has moved from its original position, so this change
-            # can be applied to animation keyframes.
-            pos_delta = current_bg_pos - orig_pos
-            rot_delta = current_bg_rot - orig_rot
-            scale_delta = Vector((current_bg_scale[0]/orig_scale[0],
-                                  current_bg_scale[1]/orig_scale[1],
-                                  current_bg_scale[2]/orig_scale[2]))
-
-            for tag in list(anim):
-                for tag_name, delta in [('posX', pos_delta[0]), ('posY', pos_delta[1]), ('posZ', pos_delta[2]),
-                                        ('rotX', rot_delta[0]), ('rotY', rot_delta[1]), ('rotZ', rot_delta[2]),
-                                        ('scaleX', scale_delta[0]), ('scaleY', scale_delta[1]), ('scaleZ', scale_delta[2])]:
-                    if tag.tag == tag_name:
-                        for keyframe in list(tag):
-                            if "pos" in tag_name:
-                                keyframe.attrib['value'] = str(float(keyframe.attrib['value']))
-                            elif "rot" in tag_name:
-                                keyframe.attrib['value'] = str(float(keyframe.attrib['value']) + delta)
-                            elif "scale" in tag_name:
-                                keyframe.attrib['value'] = str(float(keyframe.attrib['value']) * delta)
-                        break
-
-        destination_root.append(imported_bg_model)
-
-
 # Operator for exporting the stage config as a .XML file
 class OBJECT_OT_generate_config(bpy.types.Operator):
     bl_idname = "object.generate_config"
@@ -1966,16 +2240,15 @@ class OBJECT_OT_generate_config(bpy.types.Operator):
 
         # Import background and foreground objects from a .XML file, if it exists
         bg_path = bpy.path.abspath(context.scene.background_import_path)
-        obj_names = [obj.name for obj in context.scene.objects]
         if os.path.exists(bg_path):
-            bg = etree.parse(bg_path)
-            bg_root = bg.getroot()
-
-            if bg_root.tag != 'superMonkeyBallBackground':
-                self.report({'ERROR'}, "Imported background XML not an exported background XML")
+            try:
+                imported_models = background_merge.get_background(bg_path)
+            except (etree.ParseError, ValueError) as e:
+                self.report({'ERROR'}, str(e))
                 return {'CANCELLED'}
 
-            append_imported_bg_objects(self, context, bg_root, root, obj_names)
+            changed = background_merge.append_imported_bg_objects(context.scene, imported_models, root, context.scene.background_import_preview)
+            print(f"Merged {len(imported_models)} imported background objects ({changed} changed)")
 
         print("Completed, saving...")
 
@@ -4,6 +4,11 @@ import bpy
 
 from gpu_extras.batch import batch_for_shader
 from mathutils import Matrix, Vector, Euler
+from .. import developer_utils
+from . import collision_grid
+
+# Loaded on the first draw, see collision_grid
+np = developer_utils.lazy_import("numpy")
 
 COLOR_BLACK = (0.0, 0.0, 0.0, 0.8)
 COLOR_BLUE = (0.13, 0.59, 0.95, 0.8)
@@ -15,45 +20,167 @@ COLOR_GREEN_FAINT = (0.18, 0.83, 0.11, 0.5)
 COLOR_PURPLE = (0.40, 0.23, 0.72, 0.8)
 ZERO_VEC = (0.0, 0.0, 0.0)
 
+# Shapes are built once as line lists and then reused for every object and every redraw
+_shader = None
+_instance_shader = None
+_instancing_supported = True
+_shape_coords = {}
+_shape_batches = {}
+_instanced_batches = {}
+_shape_bounds = {}
+
+# Collision grid animation offsets, keyed by (object name, action name, start frame, current frame)
+_grid_anim_cache = {}
+# Grid shape last drawn for each item group, so geometry of grids that changed can be freed
+_ig_grid_keys = {}
+# Heatmap geometry, keyed by item group name. Computed outside of drawing by update_heatmaps(). Each entry holds the
+# heatmap it was built from and the (positions, colors) of its cells and of its out-of-grid triangles, or None for either.
+_heatmap_data = {}
+# Heatmap batches, keyed by item group name. Each entry holds the heatmap it was built from and the cell and out-of-grid batches.
+_heatmap_batches = {}
+_heatmap_shader = None
+
+HEATMAP_ALPHA = 0.35
+
+# While batching, draw_shape() queues matrices here, grouped by (line width, color) and then by shape.
+# Each shape holds a list of matrices and a parallel list of the draw owner each matrix was queued for.
+_line_groups = None
+_batch_view = None
+_batch_instanced = False
+
+# While collecting statistics, the (descriptor name, object name) of every draw owner set with set_draw_owner(),
+# along with the vertices and batches drawn for each owner straight away instead of through the batch
+_draw_owners = None
+_draw_owner_vertices = None
+_draw_owner_batches = None
+_draw_owner = -1
+
+# Draw calls and vertices submitted since the last reset, shown in the overlay statistics.
+# Objects are counted as drawn or culled once the batch has been culled, descriptors maps each descriptor name to
+# [drawn objects, culled objects, vertices, batches it has vertices in].
+draw_stats = {"batches": 0, "vertices": 0, "drawn": 0, "culled": 0, "descriptors": {}}
+
+def reset_draw_stats():
+    draw_stats["batches"] = 0
+    draw_stats["vertices"] = 0
+    draw_stats["drawn"] = 0
+    draw_stats["culled"] = 0
+    draw_stats["descriptors"] = {}
+
+def count_draw(vertex_count):
+    draw_stats["batches"] += 1
+    draw_stats["vertices"] += vertex_count
+    if _draw_owners is not None and _draw_owner >= 0:
+        _draw_owner_vertices[_draw_owner] += vertex_count
+        _draw_owner_batches[_draw_owner] += 1
+
+# Sets the descriptor and object that shapes drawn from now on belong to, for the overlay statistics
+def set_draw_owner(descriptor_name, object_name):
+    global _draw_owner
+    if _draw_owners is None:
+        return
+    _draw_owners.append((descriptor_name, object_name))
+    _draw_owner_vertices.append(0)
+    _draw_owner_batches.append(0)
+    _draw_owner = len(_draw_owners) - 1
+
+# Stops attributing drawn shapes to the last draw owner
+def clear_draw_owner():
+    global _draw_owner
+    _draw_owner = -1
+
+# Shapes queued at least this many times with the same color and line width are drawn with one instanced call
+INSTANCING_MIN_COUNT = 8
+# Instances are uploaded as rows of a float texture, which is limited in height
+MAX_INSTANCES_PER_DRAW = 8192
+
+# Levels of detail. Shapes whose bounding sphere covers fewer pixels than the thresholds are simplified.
+LOD_CULLED = -1
+LOD_FULL = 0
+LOD_REDUCED = 1
+LOD_POINT = 2
+LOD_REDUCED_PIXELS = 48
+LOD_POINT_PIXELS = 6
+
 def norm(vec):
     return [float(i) / sum(vec) for i in vec]
 
-def rotate_gl(euler_rot):
-    x_rot = Matrix.Rotation(euler_rot[0], 4, 'X')
-    y_rot = Matrix.Rotation(euler_rot[1], 4, 'Y')
-    z_rot = Matrix.Rotation(euler_rot[2], 4, 'Z')
-    final_rot = x_rot @ y_rot @ z_rot
-    gpu.matrix.multiply_matrix(final_rot)
-
-def draw_batch(coord, color, primitive_type):
-    shader = gpu.shader.from_builtin("UNIFORM_COLOR")
-    batch = batch_for_shader(shader, primitive_type, {"pos": coord})
-    shader.bind()
-    shader.uniform_float("color", color)
-    batch.draw(shader)
-    coord.clear()
-
-# Draws a circle on the XY plane. 'rot' is a XYZ Vector in degrees.
-# Probably a smarter way to do this, like drawing it orthagonal to a unit vector
-def draw_circle(pos, rot, radius, color, segments, radians=(2*math.pi)):
-    gpu.matrix.push()
-
-    coord = []
+def get_shader():
+    global _shader
+    if _shader is None:
+        _shader = gpu.shader.from_builtin("UNIFORM_COLOR")
+    return _shader
+
+# Shader that positions and colors every instance of a shape from rows of a float texture.
+# Each row holds the top three rows of the instance's matrix followed by its color.
+def get_instance_shader():
+    global _instance_shader, _instancing_supported
+    if _instance_shader is None and _instancing_supported:
+        try:
+            iface = gpu.types.GPUStageInterfaceInfo("b2smb_instance_interface")
+            iface.flat('VEC4', "instanceColor")
+
+            info = gpu.types.GPUShaderCreateInfo()
+            info.push_constant('MAT4', "viewProjectionMatrix")
+            info.sampler(0, 'FLOAT_2D', "instanceData")
+            info.vertex_in(0, 'VEC3', "pos")
+            info.vertex_out(iface)
+            info.fragment_out(0, 'VEC4', "fragColor")
+
+            info.vertex_source(
+                "void main()"
+                "{"
+                "  vec4 position = vec4(pos, 1.0);"
+                "  vec3 world = vec3(dot(texelFetch(instanceData, ivec2(0, gl_InstanceID), 0), position),"
+                "                    dot(texelFetch(instanceData, ivec2(1, gl_InstanceID), 0), position),"
+                "                    dot(texelFetch(instanceData, ivec2(2, gl_InstanceID), 0), position));"
+                "  instanceColor = texelFetch(instanceData, ivec2(3, gl_InstanceID), 0);"
+                "  gl_Position = viewProjectionMatrix * vec4(world, 1.0);"
+                "}"
+            )
+            info.fragment_source(
+                "void main()"
+                "{"
+                "  fragColor = instanceColor;"
+                "}"
+            )
+            _instance_shader = gpu.shader.create_from_info(info)
+        except Exception as e:
+            # Fall back to merged line buffers on GPU backends that can't compile the shader
+            print("Instanced overlay drawing unavailable: " + str(e))
+            _instancing_supported = False
+    return _instance_shader
+
+def rotation_matrix(euler_rot):
+    x_rot = Matrix.Rotation(euler_rot[0], 3, 'X')
+    y_rot = Matrix.Rotation(euler_rot[1], 3, 'Y')
+    z_rot = Matrix.Rotation(euler_rot[2], 3, 'Z')
+    return x_rot @ y_rot @ z_rot
+
+# Converts a line strip into pairs of points for drawing as 'LINES'
+def strip_to_lines(points):
+    coords = []
+    for start, end in zip(points, points[1:]):
+        coords.append(tuple(start))
+        coords.append(tuple(end))
+    return coords
+
+# Returns a circle on the XY plane, rotated by 'rot' (XYZ, in radians)
+def circle_coords(pos, rot, radius, segments, radians=(2*math.pi)):
+    rot_mtx = rotation_matrix(rot)
+    points = []
     for i in range(0, segments+1):
         segment = (i / segments)*radians
 
         x = pos[0] + radius * math.cos(segment)
         y = pos[1] + radius * math.sin(segment)
-        coord.append((x, y, pos[2]))
-
-    rotate_gl(rot)
-    draw_batch(coord, color, 'LINE_STRIP')
+        points.append(rot_mtx @ Vector((x, y, pos[2])))
 
-    gpu.matrix.pop()
+    return strip_to_lines(points)
 
-# Draw a sphere at the specified position with the given radius/color.
-# A detailed sphere has more circles to outline the spherical shape, but could cause performance issues
-def draw_sphere(pos, radius, color, detailed=False):
+# Returns a sphere outline at the specified position with the given radius.
+# A detailed sphere has more circles to outline the spherical shape
+def sphere_coords(pos, radius, detailed=False, segments=32):
     detailed_rotations = [
             Vector((45,0,0)),
             Vector((-45,0,0)),
@@ -71,263 +198,640 @@ def draw_sphere(pos, radius, color, detailed=False):
 
     if detailed: sphere_rotations.extend(detailed_rotations)
 
+    coords = []
     for rot in sphere_rotations:
         rot_radian = ((math.radians(rot[0]), math.radians(rot[1]), math.radians(rot[2])))
-        draw_circle(pos, rot_radian, radius, color, 32)
-
-# Draw a scaled box at the specified position with the given size/color.
-def draw_box_scaled(pos, scale, color):
-    gpu.matrix.push()
-    gpu.matrix.translate(pos)
-    gpu.matrix.scale(scale)
-
-    coord1 = []
-
-    coord1.append((-0.5, -0.5, -0.5))
-    coord1.append((-0.5, -0.5, +0.5))
-    coord1.append((-0.5, +0.5, +0.5))
-    coord1.append((-0.5, +0.5, -0.5))
-    coord1.append((-0.5, -0.5, -0.5))
-
-    coord1.append((+0.5, -0.5, -0.5))
-    coord1.append((+0.5, -0.5, +0.5))
-    coord1.append((-0.5, -0.5, +0.5))
-
-    coord2 = []
-    coord2.append((+0.5, +0.5, +0.5))
-    coord2.append((+0.5, +0.5, -0.5))
-    coord2.append((+0.5, -0.5, -0.5))
-    coord2.append((+0.5, -0.5, +0.5))
-    coord2.append((+0.5, +0.5, +0.5))
-
-    coord2.append((-0.5, +0.5, +0.5))
-    coord2.append((-0.5, +0.5, -0.5))
-    coord2.append((+0.5, +0.5, -0.5))
-
-    draw_batch(coord1, color, "LINE_STRIP")
-    draw_batch(coord2, color, "LINE_STRIP")
-    gpu.matrix.pop()
-    
-# Draw cylindrical prism or a cone with a base having the number of sides provided by arg 'segments'.
-def draw_cylinder(pos, rot, radius, height, segments, color, *, cone=False, radians=(2*math.pi)):
-    gpu.matrix.push()
+        coords.extend(circle_coords(pos, rot_radian, radius, segments))
+    return coords
+
+# Returns a scaled box at the specified position with the given size
+def box_coords(pos, scale):
+    strip1 = [(-0.5, -0.5, -0.5),
+              (-0.5, -0.5, +0.5),
+              (-0.5, +0.5, +0.5),
+              (-0.5, +0.5, -0.5),
+              (-0.5, -0.5, -0.5),
+              (+0.5, -0.5, -0.5),
+              (+0.5, -0.5, +0.5),
+              (-0.5, -0.5, +0.5)]
+
+    strip2 = [(+0.5, +0.5, +0.5),
+              (+0.5, +0.5, -0.5),
+              (+0.5, -0.5, -0.5),
+              (+0.5, -0.5, +0.5),
+              (+0.5, +0.5, +0.5),
+              (-0.5, +0.5, +0.5),
+              (-0.5, +0.5, -0.5),
+              (+0.5, +0.5, -0.5)]
+
+    coords = []
+    for strip in [strip1, strip2]:
+        points = [(pos[0] + scale[0]*p[0], pos[1] + scale[1]*p[1], pos[2] + scale[2]*p[2]) for p in strip]
+        coords.extend(strip_to_lines(points))
+    return coords
+
+# Returns a cylindrical prism or a cone with a base having the number of sides provided by arg 'segments'
+def cylinder_coords(pos, rot, radius, height, segments, *, cone=False, radians=(2*math.pi)):
     top_origin = Vector((pos[0], pos[1], pos[2]+height))
 
-    draw_circle(pos, rot, radius, color, segments, radians)
-    if not cone: draw_circle(top_origin, rot, radius, color, segments, radians)
+    coords = circle_coords(pos, rot, radius, segments, radians)
+    if not cone: coords.extend(circle_coords(top_origin, rot, radius, segments, radians))
 
-    coord = []
+    rot_mtx = rotation_matrix(rot)
     for i in range(0, segments+1):
         segment = (i / segments)*radians
 
         x = pos[0] + radius * math.cos(segment)
         y = pos[1] + radius * math.sin(segment)
-        coord.append((x, y, pos[2]))
+        coords.append(tuple(rot_mtx @ Vector((x, y, pos[2]))))
         if cone:
-            coord.append(top_origin)
+            coords.append(tuple(rot_mtx @ top_origin))
         else:
-            coord.append((x, y, top_origin.z)) 
-        
-    rotate_gl(rot)
-    draw_batch(coord, color, 'LINES')
-    
-    gpu.matrix.pop()
+            coords.append(tuple(rot_mtx @ Vector((x, y, top_origin.z))))
 
-# Draw a grid with the specified starting positions, square spacings, number of squares, height, and color.
-def draw_grid(start_x, start_y, space_x, space_y, repeat_x, repeat_y, z, color):
-    coord = []
-    for i in range(0, repeat_x + 1):
-        coord.append((start_x + space_x * i, start_y, z))
-        coord.append((start_x + space_x * i, start_y + space_y * repeat_y, z))
+    return coords
 
-    draw_batch(coord, color, 'LINES')
-    coord.clear()
+# Returns a grid with the specified starting positions, square spacings, number of squares and height
+def grid_coords(start_x, start_y, space_x, space_y, repeat_x, repeat_y, z):
+    coords = []
+    for i in range(0, repeat_x + 1):
+        coords.append((start_x + space_x * i, start_y, z))
+        coords.append((start_x + space_x * i, start_y + space_y * repeat_y, z))
 
     for i in range(0, repeat_y + 1):
-        coord.append((start_x, start_y + space_y * i, z))
-        coord.append((start_x + space_x * repeat_x, start_y + space_y * i, z))
+        coords.append((start_x, start_y + space_y * i, z))
+        coords.append((start_x + space_x * repeat_x, start_y + space_y * i, z))
 
-    draw_batch(coord, color, 'LINES')
+    return coords
 
-# Draw an arrow with the specified start and end position.
+# Returns an arrow with the specified start and end position.
 # TODO: Allow proper rotation on the arrow
-def draw_arrow(start_pos, end_pos, color):
-    gpu.matrix.push()
-    coord = []
-
-    coord.append(start_pos)
-    coord.append(end_pos)
-
-    coord.append(end_pos)
-    coord.append((end_pos[0] - 0.2, end_pos[1] - 0.2, end_pos[2]))
+def arrow_coords(start_pos, end_pos):
+    return [tuple(start_pos), tuple(end_pos),
+            tuple(end_pos), (end_pos[0] - 0.2, end_pos[1] - 0.2, end_pos[2]),
+            tuple(end_pos), (end_pos[0] + 0.2, end_pos[1] - 0.2, end_pos[2])]
+
+# Number of segments to use for a round shape at the given level of detail
+def lod_segments(segments, lod):
+    return max(4, segments >> lod)
+
+def _build_start(lod):
+    return sphere_coords(ZERO_VEC, 0.5, segments=lod_segments(32, lod)) + arrow_coords(ZERO_VEC, (0.0, 1.5, 0.0))
+
+def _build_goal(lod):
+    ring_pos = (-2.95, 1.22, -0.1)
+    ring_rot = ((math.pi*1/2), 0, -(math.pi*3/8))
+    coords = []
+    # Goal ring
+    coords += cylinder_coords(ring_pos, ring_rot, 2.35, 0.2, lod_segments(16, lod), radians=((7/4)*math.pi))
+    coords += cylinder_coords(ring_pos, ring_rot, 2.15, 0.2, lod_segments(16, lod), radians=((7/4)*math.pi))
+    # Goal posts
+    coords += box_coords((-1.11,0,0.6), (0.5,0.2,1.2))
+    coords += box_coords((1.11,0,0.6), (0.5,0.2,1.2))
+    coords += arrow_coords((0,0,0.6), (0.0, 1.5, 0.6))
+    # Party ball box
+    coords += box_coords((-1.2,0,2.2), (0,0.2,1.6))
+    coords += box_coords((1.2,0,2.2), (0,0.2,1.6))
+    coords += box_coords((0,0,3), (2.4,0.2,0))
+    # Timer display
+    coords += box_coords((-0.3,0,4.1), (2.2, 0.2, 1.2))
+    coords += box_coords((1.25,0,3.9), (0.9, 0.2, 0.8))
+    return coords
+
+def _build_bumper(lod):
+    return cylinder_coords(ZERO_VEC, ZERO_VEC, 0.25, 0.7, lod_segments(8, lod)) + cylinder_coords((0, 0, 0.28), ZERO_VEC, 0.4, 0.14, lod_segments(8, lod))
+
+def _build_jamabar(lod):
+    return (box_coords((0, 0, 0.5), (1, 1.35, 0.4))
+            + box_coords((0, -1.21, 0.5), (1, 1.075, 1))
+            + box_coords((0, 1.21, 0.5), (1, 1.075, 1))
+            + arrow_coords((0, 1.75, 0.5), (0, 4.0, 0.5)))
+
+# Extra box to show jamabar range
+def _build_jamabar_range(lod):
+    return box_coords((0, 3, 0.5), (1, 2.5, 1))
+
+def _build_cone_col(lod):
+    return cylinder_coords(ZERO_VEC, ZERO_VEC, 1, 1, lod_segments(16, lod), cone=True)
+
+def _build_cylinder_col(lod):
+    return cylinder_coords((0,0,-0.5), ZERO_VEC, 1, 1, lod_segments(16, lod))
+
+def _build_switch(lod):
+    rotation_rad = (0,0,math.radians(22.5))
+    return (cylinder_coords(ZERO_VEC, rotation_rad, 0.925, 0.15, lod_segments(8, lod))
+            + cylinder_coords(ZERO_VEC, rotation_rad, 0.725, 0.15, lod_segments(8, lod))
+            + arrow_coords(ZERO_VEC, (0.0, 1.5, 0.0)))
+
+def _build_wh(lod):
+    wh_frame = [(2.15, 0,0),
+                (1.15, 0, 4.23),
+                (0.87929, 0, 4.55),
+                (-0.87929, 0, 4.55),
+                (-1.15, 0, 4.3),
+                (-2.15, 0, 0),
+                (2.15, 0, 0)]
+    arrow_mtx = Matrix.Rotation(math.radians(180), 4, 'Z') @ Matrix.Translation(Vector((0,-0.75,1)))
+    arrow = [tuple(arrow_mtx @ Vector(p)) for p in arrow_coords(ZERO_VEC, (0.0, 1.5, 0.0))]
+    return strip_to_lines(wh_frame) + arrow
+
+def _build_booster(lod):
+    return box_coords(ZERO_VEC, (2,1.0,0)) + arrow_coords((0, 0.1, 0), (0, 0.1, 0))
+
+def _build_golf_hole(lod):
+    return cylinder_coords(ZERO_VEC, ZERO_VEC, 1, 0, lod_segments(12, lod))
+
+# Line from the origin to (1, 1, 1), scaled into place for vectors such as conveyor arrows
+def _build_unit_line(lod):
+    return [ZERO_VEC, (1.0, 1.0, 1.0)]
+
+# Shape name -> function returning the shape's line list at a level of detail.
+# Shape keys are tuples of the name and any further arguments.
+SHAPE_BUILDERS = {
+    "start": _build_start,
+    "goal": _build_goal,
+    "bumper": _build_bumper,
+    "jamabar": _build_jamabar,
+    "jamabar_range": _build_jamabar_range,
+    "cone_col": _build_cone_col,
+    "sphere": lambda lod: sphere_coords(ZERO_VEC, 1.0, segments=lod_segments(32, lod)),
+    "sphere_detailed": lambda lod: sphere_coords(ZERO_VEC, 1.0, detailed=(lod == 0), segments=lod_segments(32, lod)),
+    "cylinder_col": _build_cylinder_col,
+    "box": lambda lod: box_coords(ZERO_VEC, (1,1,1)),
+    "switch": _build_switch,
+    "wh": _build_wh,
+    "booster": _build_booster,
+    "golf_hole": _build_golf_hole,
+    "line": _build_unit_line,
+    "axis": lambda lod: [(0.0, 0.5, 0.0), (0.0, -0.5, 0.0)],
+    "grid": lambda lod, *args: grid_coords(*args, 0),
+}
+
+def get_shape_coords(shape_key, lod=LOD_FULL):
+    coords = _shape_coords.get((shape_key, lod))
+    if coords is None:
+        coords = np.array(SHAPE_BUILDERS[shape_key[0]](lod, *shape_key[1:]), dtype=np.float32).reshape(-1, 3)
+        _shape_coords[(shape_key, lod)] = coords
+    return coords
+
+# Returns the center and radius of a sphere enclosing the shape
+def get_shape_bounds(shape_key):
+    bounds = _shape_bounds.get(shape_key)
+    if bounds is None:
+        coords = get_shape_coords(shape_key)
+        center = (coords.min(axis=0) + coords.max(axis=0)) / 2
+        radius = float(np.linalg.norm(coords - center, axis=1).max())
+        bounds = (center, radius)
+        _shape_bounds[shape_key] = bounds
+    return bounds
+
+def get_shape_batch(shape_key):
+    batch = _shape_batches.get(shape_key)
+    if batch is None:
+        batch = batch_for_shader(get_shader(), 'LINES', {"pos": get_shape_coords(shape_key)})
+        _shape_batches[shape_key] = batch
+    return batch
+
+def get_instanced_batch(shape_key, lod):
+    batch = _instanced_batches.get((shape_key, lod))
+    if batch is None:
+        batch = batch_for_shader(get_instance_shader(), 'LINES', {"pos": get_shape_coords(shape_key, lod)})
+        _instanced_batches[(shape_key, lod)] = batch
+    return batch
+
+def clear_shape_cache():
+    _shape_coords.clear()
+    _shape_batches.clear()
+    _instanced_batches.clear()
+    _shape_bounds.clear()
+    _ig_grid_keys.clear()
+
+# Frees all cached geometry of a single shape
+def discard_shape(shape_key):
+    for lod in (LOD_FULL, LOD_REDUCED):
+        _shape_coords.pop((shape_key, lod), None)
+        _instanced_batches.pop((shape_key, lod), None)
+    _shape_batches.pop(shape_key, None)
+    _shape_bounds.pop(shape_key, None)
+
+def clear_anim_cache():
+    _grid_anim_cache.clear()
+
+# Frustum planes and projection scale of a viewport, used for culling and picking levels of detail
+class ViewInfo:
+    def __init__(self, region, region_data, lod_bias=1.0):
+        m = np.array(region_data.perspective_matrix, dtype=np.float32)
+        planes = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+
+        self.perspective_matrix = m
+        self.planes = planes
+        # Size in pixels of one unit at a clip space W of 1
+        self.pixel_scale = region_data.window_matrix[1][1] * region.height / 2 * lod_bias
+
+# Returns the level of detail of every instance of a shape along with the world space centers of the instances
+def select_lods(shape_key, matrices, view):
+    center, radius = get_shape_bounds(shape_key)
+    centers = matrices[:, :3, :3] @ center + matrices[:, :3, 3]
+    if view is None:
+        return np.full(len(matrices), LOD_FULL), centers
+
+    radii = radius * np.linalg.norm(matrices[:, :3, :3], axis=1).max(axis=1)
+    homogeneous = np.hstack((centers, np.ones((len(centers), 1), dtype=centers.dtype)))
+
+    # Spheres entirely behind any frustum plane are culled
+    visible = ((homogeneous @ view.planes.T) >= -radii[:, None]).all(axis=1)
+
+    w = np.maximum(homogeneous @ view.perspective_matrix[3], 1e-6)
+    pixels = radii * view.pixel_scale / w
+    lods = np.where(pixels < LOD_POINT_PIXELS, LOD_POINT, np.where(pixels < LOD_REDUCED_PIXELS, LOD_REDUCED, LOD_FULL))
+    lods[~visible] = LOD_CULLED
+    return lods, centers
+
+# Starts collecting shapes instead of drawing them straight away.
+# If view info is given, shapes outside of the view are culled and distant shapes are drawn with less detail.
+# If instanced is set, shapes repeated many times are drawn with instancing where the GPU backend supports it.
+# If collect_stats is set, drawn and culled objects and their vertices are counted per draw owner into draw_stats.
+def begin_batch(view=None, instanced=False, collect_stats=False):
+    global _line_groups, _batch_view, _batch_instanced, _draw_owners, _draw_owner_vertices, _draw_owner_batches, _draw_owner
+    _line_groups = {}
+    _batch_view = view
+    _batch_instanced = instanced and _instancing_supported
+    _draw_owners = [] if collect_stats else None
+    _draw_owner_vertices = [] if collect_stats else None
+    _draw_owner_batches = [] if collect_stats else None
+    _draw_owner = -1
+
+# Per owner totals of a batch while collecting statistics, as numpy arrays indexed by draw owner.
+# Batches are counted per descriptor, since a batch holds the shapes of many owners.
+class OwnerCounts:
+    def __init__(self, owners, vertices, batches):
+        self.descriptor_names = sorted({descriptor_name for descriptor_name, _ in owners})
+        descriptor_ids = {name: i for i, name in enumerate(self.descriptor_names)}
+        self.owner_descriptors = np.array([descriptor_ids[descriptor_name] for descriptor_name, _ in owners], dtype=np.int64).reshape(len(owners))
+
+        self.vertices = np.array(vertices, dtype=np.int64).reshape(len(owners))
+        self.batches = np.zeros(len(self.descriptor_names), dtype=np.int64)
+        np.add.at(self.batches, self.owner_descriptors, np.array(batches, dtype=np.int64).reshape(len(owners)))
+        # Owners that drew something straight away count as visible
+        self.queued = self.vertices > 0
+        self.visible = self.vertices > 0
+
+    # Counts the instances of one shape, given the owner of each instance and whether it survived culling
+    def add_instances(self, owners, visible):
+        tracked = owners >= 0
+        self.queued[owners[tracked]] = True
+        self.visible[owners[tracked & visible]] = True
+
+    # Counts a batch made of instances of the given owners, with vertices_per_instance vertices each
+    def add_batch(self, owner_lists):
+        in_batch = np.zeros(len(self.batches), dtype=bool)
+        for owners, vertices_per_instance in owner_lists:
+            owners = owners[owners >= 0]
+            np.add.at(self.vertices, owners, vertices_per_instance)
+            in_batch[self.owner_descriptors[owners]] = True
+        self.batches += in_batch
+
+# Sums the per owner counts of a batch into draw_stats, per descriptor and per object
+def store_owner_stats(counts):
+    objects = {}
+    descriptor_stats = draw_stats["descriptors"]
+    for descriptor_name, batches in zip(counts.descriptor_names, counts.batches.tolist()):
+        descriptor_stats.setdefault(descriptor_name, [0, 0, 0, 0])[3] += batches
+    for owner, (descriptor_name, object_name) in enumerate(_draw_owners):
+        entry = descriptor_stats[descriptor_name]
+        entry[2] += int(counts.vertices[owner])
+        if counts.visible[owner]:
+            entry[0] += 1
+            objects[object_name] = True
+        elif counts.queued[owner]:
+            entry[1] += 1
+            objects.setdefault(object_name, False)
+
+    draw_stats["drawn"] += sum(objects.values())
+    draw_stats["culled"] += len(objects) - sum(objects.values())
+
+# Draws every queued instance of each shape with a single instanced call per shape
+def draw_instanced_shapes(instanced, width, counts=None):
+    shader = get_instance_shader()
+    shader.bind()
+    shader.uniform_float("viewProjectionMatrix", gpu.matrix.get_projection_matrix() @ gpu.matrix.get_model_view_matrix())
+    gpu.state.line_width_set(width)
+
+    for (shape_key, lod), (matrices, colors, owners) in instanced.items():
+        matrices = np.concatenate(matrices)
+        owners = np.concatenate(owners)
+        data = np.empty((len(matrices), 4, 4), dtype=np.float32)
+        data[:, :3] = matrices[:, :3]
+        data[:, 3] = np.concatenate(colors)
+
+        batch = get_instanced_batch(shape_key, lod)
+        vertex_count = len(get_shape_coords(shape_key, lod))
+        for start in range(0, len(data), MAX_INSTANCES_PER_DRAW):
+            chunk = data[start:start + MAX_INSTANCES_PER_DRAW]
+            buffer = gpu.types.Buffer('FLOAT', chunk.size, chunk.ravel())
+            texture = gpu.types.GPUTexture((4, len(chunk)), format='RGBA32F', data=buffer)
+            shader.uniform_sampler("instanceData", texture)
+            batch.draw_instanced(shader, instance_count=len(chunk))
+            count_draw(vertex_count * len(chunk))
+            if counts is not None:
+                counts.add_batch([(owners[start:start + MAX_INSTANCES_PER_DRAW], vertex_count)])
+
+# Transforms every queued shape into one vertex buffer per (line width, color) and draws each buffer in a single call.
+# Wider passes go first so black outlines stay underneath the colored lines.
+def end_batch():
+    global _line_groups, _batch_view, _draw_owners
+    line_groups = _line_groups
+    _line_groups = None
+    clear_draw_owner()
+
+    counts = None
+    if _draw_owners is not None:
+        counts = OwnerCounts(_draw_owners, _draw_owner_vertices, _draw_owner_batches)
+    try:
+        if line_groups:
+            draw_line_groups(line_groups, counts)
+    finally:
+        if counts is not None:
+            store_owner_stats(counts)
+        _draw_owners = None
+
+# Draws the queued shapes of a batch, see end_batch()
+def draw_line_groups(line_groups, counts):
+    shader = get_shader()
+    for width in sorted({width for width, _ in line_groups}, reverse=True):
+        # (shape, level of detail) -> lists of matrices and colors drawn with instancing at this width
+        instanced = {}
+
+        shader.bind()
+        for (group_width, color), shapes in line_groups.items():
+            if group_width != width:
+                continue
+
+            vertices = []
+            points = []
+            # (owners, vertices per instance) of the instances in the line and point batches
+            line_owners = []
+            point_owners = []
+            for shape_key, (matrices, owners) in shapes.items():
+                matrices = np.array(matrices, dtype=np.float32)
+                owners = np.array(owners, dtype=np.int64)
+                lods, centers = select_lods(shape_key, matrices, _batch_view)
+                if counts is not None:
+                    counts.add_instances(owners, lods != LOD_CULLED)
+
+                for lod in (LOD_FULL, LOD_REDUCED):
+                    lod_mask = lods == lod
+                    lod_matrices = matrices[lod_mask]
+                    if len(lod_matrices) == 0:
+                        continue
+                    # The instance shader is only compiled once a shape is repeated enough to use it
+                    if _batch_instanced and len(lod_matrices) >= INSTANCING_MIN_COUNT and get_instance_shader() is not None:
+                        entry = instanced.setdefault((shape_key, lod), ([], [], []))
+                        entry[0].append(lod_matrices)
+                        entry[1].append(np.tile(np.array(color, dtype=np.float32), (len(lod_matrices), 1)))
+                        entry[2].append(owners[lod_mask])
+                        continue
+                    coords = get_shape_coords(shape_key, lod)
+                    transformed = np.einsum('mij,nj->mni', lod_matrices[:, :3, :3], coords) + lod_matrices[:, None, :3, 3]
+                    vertices.append(transformed.reshape(-1, 3))
+                    line_owners.append((owners[lod_mask], len(coords)))
+
+                point_mask = lods == LOD_POINT
+                points.append(centers[point_mask])
+                point_owners.append((owners[point_mask], 1))
+
+            shader.uniform_float("color", color)
+            if vertices:
+                vertices = np.concatenate(vertices)
+                batch = batch_for_shader(shader, 'LINES', {"pos": vertices})
+                gpu.state.line_width_set(width)
+                batch.draw(shader)
+                count_draw(len(vertices))
+                if counts is not None:
+                    counts.add_batch(line_owners)
+
+            points = np.concatenate(points)
+            if len(points):
+                batch = batch_for_shader(shader, 'POINTS', {"pos": points})
+                gpu.state.point_size_set(width + 2)
+                batch.draw(shader)
+                count_draw(len(points))
+                if counts is not None:
+                    counts.add_batch(point_owners)
+
+        if instanced:
+            draw_instanced_shapes(instanced, width, counts)
+
+# Draws a cached shape under the given matrix, once for every (line width, color) pass
+def draw_shape(shape_key, matrix, passes):
+    if _line_groups is not None:
+        for width, color in passes:
+            shapes = _line_groups.setdefault((width, tuple(color)), {})
+            matrices, owners = shapes.setdefault(shape_key, ([], []))
+            matrices.append(matrix)
+            owners.append(_draw_owner)
+        return
 
-    coord.append(end_pos)
-    coord.append((end_pos[0] + 0.2, end_pos[1] - 0.2, end_pos[2]))
+    batch = get_shape_batch(shape_key)
+    shader = get_shader()
 
-    draw_batch(coord, color, "LINES")
-    gpu.matrix.pop()
-
-def draw_start(obj):
     gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1 / obj.scale.x, 1 / obj.scale.y, 1 / obj.scale.z))  # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_BLUE)]
-    for width, color in lineWidth:
+    gpu.matrix.multiply_matrix(matrix)
+    shader.bind()
+    for width, color in passes:
         gpu.state.line_width_set(width)
-        draw_sphere(ZERO_VEC, 0.5, color)
-        draw_arrow(ZERO_VEC, (0.0, 1.5, 0.0), color)
-
+        shader.uniform_float("color", color)
+        batch.draw(shader)
+        count_draw(len(get_shape_coords(shape_key)))
     gpu.matrix.pop()
 
-def draw_goal(obj, goal_color):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
+# Object world matrix with the object's scale removed
+def unscaled_matrix(obj):
     if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, goal_color)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        # Goal ring
-        draw_cylinder((-2.95,1.22,-0.1), ((math.pi*1/2),0,-(math.pi*3/8)), 2.35, 0.2, 16, color, radians=((7/4)*math.pi))
-        draw_cylinder((-2.95,1.22,-0.1), ((math.pi*1/2),0,-(math.pi*3/8)), 2.15, 0.2, 16, color, radians=((7/4)*math.pi))
-        # Goal posts
-        draw_box_scaled((-1.11,0,0.6), (0.5,0.2,1.2), color)
-        draw_box_scaled((1.11,0,0.6), (0.5,0.2,1.2), color)
-        draw_arrow((0,0,0.6), (0.0, 1.5, 0.6), color)
-        # Party ball box
-        draw_box_scaled((-1.2,0,2.2), (0,0.2,1.6), color)
-        draw_box_scaled((1.2,0,2.2), (0,0.2,1.6), color)
-        draw_box_scaled((0,0,3),(2.4,0.2,0), color)
-        # Timer display
-        draw_box_scaled((-0.3,0,4.1), (2.2, 0.2, 1.2), color)
-        draw_box_scaled((1.25,0,3.9), (0.9, 0.2, 0.8), color)
-
-    gpu.matrix.pop()   
+        return obj.matrix_world @ Matrix.Diagonal((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z, 1.0)) # No scaling
+    return obj.matrix_world
 
-def draw_bumper(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_BLUE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_cylinder(ZERO_VEC, ZERO_VEC, 0.25, 0.7, 8, color)
-        draw_cylinder((0, 0, 0.28), ZERO_VEC, 0.4, 0.14, 8, color)
+def outline_passes(color):
+    return [(6, COLOR_BLACK), (2, color)]
 
-    gpu.matrix.pop()
+# Draw a grid with the specified starting positions, square spacings, number of squares, height, and color.
+def draw_grid(start_x, start_y, space_x, space_y, repeat_x, repeat_y, z, color, width=2):
+    draw_shape(("grid", start_x, start_y, space_x, space_y, repeat_x, repeat_y), Matrix.Translation((0, 0, z)), [(width, color)])
 
-def draw_jamabar(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
+def draw_start(obj):
+    draw_shape(("start",), unscaled_matrix(obj), outline_passes(COLOR_BLUE))
 
-    gpu.state.line_width_set(6)
-    draw_box_scaled((0, 0, 0.5), (1, 1.35, 0.4), COLOR_BLACK)
-    draw_box_scaled((0, -1.21, 0.5), (1, 1.075, 1), COLOR_BLACK)
-    draw_box_scaled((0, 1.21, 0.5), (1, 1.075, 1), COLOR_BLACK)
-    draw_arrow((0, 1.75, 0.5), (0, 4, 0.5), COLOR_BLACK)
+def draw_goal(obj, goal_color):
+    draw_shape(("goal",), unscaled_matrix(obj), outline_passes(goal_color))
 
-    gpu.state.line_width_set(2)
-    draw_box_scaled((0, 0, 0.5), (1, 1.35, 0.4), COLOR_BLUE)
-    draw_box_scaled((0, 3, 0.5), (1, 2.5, 1), COLOR_BLUE) # Extra box to show jamabar range
-    draw_box_scaled((0, -1.21, 0.5), (1, 1.075, 1), COLOR_BLUE)
-    draw_box_scaled((0, 1.21, 0.5), (1, 1.075, 1), COLOR_BLUE)
-    draw_arrow((0, 1.75, 0.5), (0, 4.0, 0.5), COLOR_BLUE)
+def draw_bumper(obj):
+    draw_shape(("bumper",), obj.matrix_world, outline_passes(COLOR_BLUE))
 
-    gpu.matrix.pop()
+def draw_jamabar(obj):
+    draw_shape(("jamabar",), obj.matrix_world, outline_passes(COLOR_BLUE))
+    draw_shape(("jamabar_range",), obj.matrix_world, [(2, COLOR_BLUE)])
 
 def draw_cone_col(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
+    matrix = obj.matrix_world
     if obj.scale.y != 0:
-        gpu.matrix.scale((1, obj.scale.x/obj.scale.y, 1)) # No Y scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_PURPLE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_cylinder(ZERO_VEC, ZERO_VEC, 1, 1, 16, color, cone=True)
-
-    gpu.matrix.pop()
+        matrix = matrix @ Matrix.Diagonal((1, obj.scale.x/obj.scale.y, 1, 1)) # No Y scaling
+    draw_shape(("cone_col",), matrix, outline_passes(COLOR_PURPLE))
 
 def draw_sphere_col(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
+    matrix = obj.matrix_world
     if 0 not in [obj.scale.z, obj.scale.y]:
-        gpu.matrix.scale((1, obj.scale.x/obj.scale.y, obj.scale.x/obj.scale.z)) # No Y/Z scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_PURPLE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_sphere(ZERO_VEC, 1, color, detailed=True)
-
-    gpu.matrix.pop()
+        matrix = matrix @ Matrix.Diagonal((1, obj.scale.x/obj.scale.y, obj.scale.x/obj.scale.z, 1)) # No Y/Z scaling
+    draw_shape(("sphere_detailed",), matrix, outline_passes(COLOR_PURPLE))
 
 def draw_cylinder_col(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
+    matrix = obj.matrix_world
     if obj.scale.y != 0:
-        gpu.matrix.scale((1, obj.scale.x/obj.scale.y, 1)) # No Y scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_PURPLE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_cylinder((0,0,-0.5), ZERO_VEC, 1, 1, 16, color)
-
-    gpu.matrix.pop()
+        matrix = matrix @ Matrix.Diagonal((1, obj.scale.x/obj.scale.y, 1, 1)) # No Y scaling
+    draw_shape(("cylinder_col",), matrix, outline_passes(COLOR_PURPLE))
 
 def draw_fallout_volume(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_RED_FAINT)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_box_scaled(ZERO_VEC, (1,1,1), color)
-
-    gpu.matrix.pop()
+    draw_shape(("box",), obj.matrix_world, outline_passes(COLOR_RED_FAINT))
 
 def draw_switch(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
+    draw_shape(("switch",), unscaled_matrix(obj), outline_passes(COLOR_BLUE))
 
-    rotation_rad = (0,0,math.radians(22.5))
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_BLUE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_cylinder(ZERO_VEC, rotation_rad, 0.925, 0.15, 8, color)
-        draw_cylinder(ZERO_VEC, rotation_rad, 0.725, 0.15, 8, color)
-        draw_arrow(ZERO_VEC, (0.0, 1.5, 0.0), color)
+def draw_wh(obj):
+    draw_shape(("wh",), unscaled_matrix(obj), outline_passes(COLOR_BLUE))
+
+# Returns the offset of an item group's collision grid at the current frame, relative to the start frame
+def get_grid_anim_matrix(obj):
+    if obj.animation_data is None or obj.animation_data.action is None:
+        return Matrix.Identity(4)
+
+    action = obj.animation_data.action
+    start_frame = bpy.context.scene.frame_start
+    current_frame = bpy.context.scene.frame_current
+
+    key = (obj.name, action.name, start_frame, current_frame)
+    grid_mtx = _grid_anim_cache.get(key)
+    if grid_mtx is not None:
+        return grid_mtx
+
+    pos_delta = Vector((0,0,0))
+    rot_mode = obj.rotation_mode
+    rot_delta = Euler((0,0,0), rot_mode)
+
+    for c in action.fcurves:
+        if c.array_index > 2:
+            continue
+        if c.data_path == "location":
+            pos_delta[c.array_index] = c.evaluate(current_frame) - c.evaluate(start_frame)
+        elif c.data_path == "rotation_euler":
+            rot_delta[c.array_index] = c.evaluate(current_frame) - c.evaluate(start_frame)
+
+    grid_mtx_rot = rot_delta.to_matrix().to_4x4()
+    grid_mtx_pos = Matrix.Translation(pos_delta)
+    grid_mtx = grid_mtx_pos @ grid_mtx_rot
+
+    _grid_anim_cache[key] = grid_mtx
+    return grid_mtx
+
+def get_heatmap_shader():
+    global _heatmap_shader
+    if _heatmap_shader is None:
+        _heatmap_shader = gpu.shader.from_builtin("SMOOTH_COLOR")
+    return _heatmap_shader
+
+# Returns a green to yellow to red color for each value between 0 and 1
+def heatmap_colors(values):
+    colors = np.empty((len(values), 4), dtype=np.float32)
+    colors[:, 0] = np.clip(values * 2, 0, 1)
+    colors[:, 1] = np.clip(2 - values * 2, 0, 1)
+    colors[:, 2] = 0.0
+    colors[:, 3] = HEATMAP_ALPHA
+    return colors
+
+# Builds the geometry of a heatmap in the grid's space: one quad per non-empty cell colored by its triangle count,
+# and the triangles that reach outside the grid in red. Returns (positions, colors) of each, or None if there are none.
+def build_heatmap_geometry(obj, heatmap):
+    cell_counts, outside_triangles = heatmap
+    start, size = collision_grid.get_grid_extent(obj)
+    count_z, count_x = cell_counts.shape
+    cell_w, cell_h = size[0] / count_x, size[1] / count_z
+
+    cells = None
+    iz, ix = np.nonzero(cell_counts)
+    if len(ix):
+        x0 = start[0] + ix * cell_w
+        x1 = x0 + cell_w
+        # SMB Z is Blender's -Y
+        y0 = -(start[1] + iz * cell_h)
+        y1 = y0 - cell_h
+        corners = np.stack((np.stack((x0, y0), axis=-1), np.stack((x1, y0), axis=-1),
+                            np.stack((x1, y1), axis=-1), np.stack((x0, y1), axis=-1)), axis=1)
+        quads = np.zeros((len(ix), 4, 3), dtype=np.float32)
+        quads[:, :, :2] = corners
+        tris = quads[:, [0, 1, 2, 0, 2, 3]].reshape(-1, 3)
+
+        values = cell_counts[iz, ix] / cell_counts.max()
+        cells = (tris, np.repeat(heatmap_colors(values), 6, axis=0))
+
+    outside = None
+    if len(outside_triangles):
+        coords = outside_triangles.reshape(-1, 3).astype(np.float32)
+        outside = (coords, np.tile(np.array(COLOR_RED_FAINT, dtype=np.float32), (len(coords), 1)))
+
+    return cells, outside
+
+# Computes the heatmaps of the collision grids of every item group in a scene on the current frame.
+# Evaluates geometry, so it's called from handlers and timers rather than while drawing.
+def update_heatmaps(scene, depsgraph):
+    names = set()
+    for obj in scene.objects:
+        if not collision_grid.is_item_group(obj) or "collisionStartX" not in obj.keys():
+            continue
+        names.add(obj.name)
+
+        heatmap = collision_grid.get_heatmap(obj, depsgraph, get_grid_anim_matrix(obj))
+        entry = _heatmap_data.get(obj.name)
+        if entry is None or entry[0] is not heatmap:
+            _heatmap_data[obj.name] = (heatmap, *build_heatmap_geometry(obj, heatmap))
+
+    for name in [name for name in _heatmap_data if name not in names]:
+        del _heatmap_data[name]
+        _heatmap_batches.pop(name, None)
+    collision_grid.prune_heatmaps(names)
+
+def clear_heatmaps():
+    _heatmap_data.clear()
+    _heatmap_batches.clear()
+    collision_grid.clear_heatmaps()
+
+# Uploads (positions, colors) of heatmap geometry, or returns None if there's none
+def get_heatmap_batch(geometry):
+    if geometry is None:
+        return None
+    coords, colors = geometry
+    return batch_for_shader(get_heatmap_shader(), 'TRIS', {"pos": coords, "color": colors})
+
+# Draws the triangle density heatmap of an item group's collision grid, as last computed by update_heatmaps()
+def draw_heatmap(obj, grid_mtx):
+    data = _heatmap_data.get(obj.name)
+    if data is None:
+        return
+    heatmap, cells, outside = data
 
-    gpu.matrix.pop()
+    shader = get_heatmap_shader()
+    entry = _heatmap_batches.get(obj.name)
+    if entry is None or entry[0] is not heatmap:
+        entry = (heatmap, get_heatmap_batch(cells), get_heatmap_batch(outside))
+        _heatmap_batches[obj.name] = entry
+    _, cells_batch, outside_batch = entry
 
-def draw_wh(obj):
+    # Both the cells and the triangles outside of the grid are stored in the grid's space
+    shader.bind()
     gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_BLUE)]
-    for width, color in lineWidth:
-        wh_frame = [(2.15, 0,0),
-                    (1.15, 0, 4.23),
-                    (0.87929, 0, 4.55),
-                    (-0.87929, 0, 4.55),
-                    (-1.15, 0, 4.3),
-                    (-2.15, 0, 0),
-                    (2.15, 0, 0)]
-        gpu.state.line_width_set(width)
-        draw_batch(wh_frame, color, "LINE_STRIP")
-        gpu.matrix.push()
-        gpu.matrix.multiply_matrix(Matrix.Rotation(math.radians(180), 4, 'Z'))
-        gpu.matrix.multiply_matrix(Matrix.Translation(Vector((0,-0.75,1))))
-        draw_arrow(ZERO_VEC, (0.0, 1.5, 0.0), color)
-        gpu.matrix.pop()
-
+    gpu.matrix.multiply_matrix(grid_mtx)
+    for batch, geometry in ((cells_batch, cells), (outside_batch, outside)):
+        if batch is not None:
+            batch.draw(shader)
+            count_draw(len(geometry[0]))
     gpu.matrix.pop()
 
 def draw_ig(obj, draw_collision_grid):
@@ -345,114 +849,46 @@ def draw_ig(obj, draw_collision_grid):
 
     # Draw collision grid
     if draw_collision_grid:
-        gpu.matrix.push()
-
-        if obj.animation_data is not None and obj.animation_data.action is not None:
-            action = obj.animation_data.action
-
-            start_frame = bpy.context.scene.frame_start
-            current_frame = bpy.context.scene.frame_current
-            pos_delta = Vector((0,0,0))
-            rot_mode = obj.rotation_mode
-            rot_delta = Euler((0,0,0), rot_mode)
-
-            for i in range(3):
-                if action.fcurves.find("location", index=i):
-                    c = action.fcurves.find("location", index=i)
-                    delta = c.evaluate(current_frame) - c.evaluate(start_frame)
-                    pos_delta[i] = delta
-                if action.fcurves.find("rotation_euler", index=i):
-                    c = action.fcurves.find("rotation_euler", index=i)
-                    delta = c.evaluate(current_frame) - c.evaluate(start_frame)
-                    rot_delta[i] = delta
+        grid_key = ("grid", startX, startY, stepX, stepY, stepCountX, stepCountY)
 
-            grid_mtx_rot = rot_delta.to_matrix().to_4x4()
-            grid_mtx_pos = Matrix.Translation(pos_delta)
-            grid_mtx = grid_mtx_pos @ grid_mtx_rot
+        # Free the geometry of this item group's previous grid once no other item group uses it
+        old_grid_key = _ig_grid_keys.get(obj.name)
+        _ig_grid_keys[obj.name] = grid_key
+        if old_grid_key is not None and old_grid_key != grid_key and old_grid_key not in _ig_grid_keys.values():
+            discard_shape(old_grid_key)
 
-            gpu.matrix.multiply_matrix(grid_mtx)
+        grid_mtx = get_grid_anim_matrix(obj)
+        draw_shape(grid_key, grid_mtx, [(2, COLOR_GREEN_FAINT)])
 
-        gpu.state.line_width_set(2)
-        draw_grid(startX, startY, stepX, stepY, stepCountX, stepCountY, 0, COLOR_GREEN_FAINT)
-
-        gpu.matrix.pop()
+        if bpy.context.scene.draw_collision_heatmap:
+            draw_heatmap(obj, grid_mtx)
 
     # Draw conveyor arrow
     conveyorObjects = [child for child in obj.children if child.data is not None]
     if obj.data is not None: conveyorObjects.append(obj)
 
     for conveyorObject in conveyorObjects:
-        gpu.matrix.push()
-
         # Conveyors vectors are absolute, so we don't apply the entire IG transform to them
-        gpu.matrix.translate(conveyorObject.matrix_world.to_translation())
+        matrix = Matrix.Translation(conveyorObject.matrix_world.to_translation())
 
         if 0 not in conveyorObject.scale:
-            gpu.matrix.scale((1/conveyorObject.scale.x, 1/conveyorObject.scale.y, 1/conveyorObject.scale.z)) # No scaling
+            matrix = matrix @ Matrix.Diagonal((1/conveyorObject.scale.x, 1/conveyorObject.scale.y, 1/conveyorObject.scale.z, 1)) # No scaling
 
-        lineWidth = [(6, COLOR_BLACK), (2, COLOR_GREEN)]
-        for (width, color) in lineWidth:
-            coords = [ZERO_VEC, conveyorEndPos]
-            gpu.state.line_width_set(width)
-            draw_batch(coords, color, 'LINES')
-        gpu.matrix.pop()
+        matrix = matrix @ Matrix.Diagonal((*conveyorEndPos, 1))
+        draw_shape(("line",), matrix, outline_passes(COLOR_GREEN))
 
 def draw_generic_sphere(obj, radius, color):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, color)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_sphere(ZERO_VEC, radius, color)
-
-    gpu.matrix.pop()
+    draw_shape(("sphere",), unscaled_matrix(obj) @ Matrix.Scale(radius, 4), outline_passes(color))
 
 def draw_booster(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_RED)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_box_scaled(ZERO_VEC, (2,1.0,0), color)
-        draw_arrow((0, 0.1, 0), (0, 0.1, 0), color)
-
-    gpu.matrix.pop()
+    draw_shape(("booster",), unscaled_matrix(obj), outline_passes(COLOR_RED))
 
 def draw_golf_hole(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-
-    lineWidth = [(6, COLOR_BLACK), (2, COLOR_BLUE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-        draw_cylinder(ZERO_VEC, ZERO_VEC, 1, 0, 12, color)
-
-    gpu.matrix.pop()
+    draw_shape(("golf_hole",), unscaled_matrix(obj), outline_passes(COLOR_BLUE))
 
 def draw_seesaw_axis(obj):
-    gpu.matrix.push()
-    gpu.matrix.multiply_matrix(obj.matrix_world)
-    if 0 not in obj.scale:
-        gpu.matrix.scale((1/obj.scale.x, 1/obj.scale.y, 1/obj.scale.z)) # No scaling
-    
-    lineWidth = [(8, COLOR_BLACK), (4, COLOR_PURPLE)]
-    for width, color in lineWidth:
-        gpu.state.line_width_set(width)
-
-        dim = obj.dimensions
-        scale = 1.25
+    dim = obj.dimensions
+    scale = 1.25
 
-        points = [Vector((0.0, dim[1]*scale*0.5, 0.0)),
-                  Vector((0.0, dim[1]*scale*-0.5, 0.0))]
-
-        draw_batch(points, color, 'LINES')
-
-    gpu.matrix.pop()
+    matrix = unscaled_matrix(obj) @ Matrix.Diagonal((1, dim[1]*scale, 1, 1))
+    draw_shape(("axis",), matrix, [(8, COLOR_BLACK), (4, COLOR_PURPLE)])
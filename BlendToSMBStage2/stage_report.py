@@ -0,0 +1,112 @@
+import bpy
+
+import numpy as np
+
+from . import tpl_encoder, collision_grid
+
+# One line of the stage report: an item group (including all of its descendants) or a background/foreground model
+class StageReportRow:
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.triangles = 0
+        self.vertices = 0
+        self.materials = 0
+        self.material_switches = 0
+        self.texture_memory = 0
+        self.reflective = 0
+        self.transparent = 0
+        self.images = set()
+
+class StageReport:
+    def __init__(self, rows, total):
+        self.rows = rows
+        self.total = total
+
+# Returns the vertex count, triangle count and per-triangle material indices of an object's evaluated mesh
+def get_mesh_stats(obj, depsgraph):
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        if mesh is None:
+            return 0, 0, np.empty(0, dtype=np.int32)
+        mesh.calc_loop_triangles()
+        material_indices = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+        mesh.loop_triangles.foreach_get("material_index", material_indices)
+        return len(mesh.vertices), len(mesh.loop_triangles), material_indices
+    finally:
+        obj_eval.to_mesh_clear()
+
+# Encoded size of a material's texture, using the [TEX_*] format flag of the material
+def get_material_texture_memory(mat, mipmap_count):
+    image = tpl_encoder.get_material_image(mat)
+    if image is None or image.size[0] == 0 or image.size[1] == 0:
+        return None, 0
+
+    width, height = image.size
+    fmt = tpl_encoder.get_material_format(mat)
+    mipmaps = tpl_encoder.clamp_mipmap_count(width, height, mipmap_count)
+    return image, tpl_encoder.get_encoded_size(width, height, fmt, mipmaps)
+
+# Adds the render cost of a single object to a report row. Encoded texture sizes are collected in image_sizes.
+def add_object_to_row(row, obj, depsgraph, mipmap_count, image_sizes):
+    if obj.type not in collision_grid.GEOMETRY_TYPES:
+        return
+
+    vertices, triangles, material_indices = get_mesh_stats(obj, depsgraph)
+    row.vertices += vertices
+    row.triangles += triangles
+
+    # Models are drawn one mesh per used material, so each used material is one switch
+    used_slots = np.unique(material_indices)
+    materials = [obj.material_slots[i].material for i in used_slots if i < len(obj.material_slots)]
+    materials = [mat for mat in materials if mat is not None]
+    row.materials += len(materials)
+    row.material_switches += max(len(materials), 1 if triangles else 0)
+
+    for mat in materials:
+        image, size = get_material_texture_memory(mat, mipmap_count)
+        # Textures are shared in the TPL, so each image only counts once per row
+        if image is not None and image.name not in row.images:
+            row.images.add(image.name)
+            row.texture_memory += size
+            image_sizes[image.name] = size
+
+    if "[MIR]" in obj.name:
+        row.reflective += 1
+    if obj.get("transparencyA") or obj.get("transparencyB"):
+        row.transparent += 1
+
+# Builds the render cost report for every item group and background/foreground model in the scene
+def build_stage_report(scene, depsgraph):
+    mipmap_count = scene.native_tpl_mipmaps
+    image_sizes = {}
+    rows = []
+
+    for obj in scene.objects:
+        if "[IG]" in obj.name:
+            row = StageReportRow(obj.name, "IG")
+            for child in collision_grid.get_item_group_objects(obj):
+                add_object_to_row(row, child, depsgraph, mipmap_count, image_sizes)
+            rows.append(row)
+        elif "[BG]" in obj.name or "[FG]" in obj.name:
+            row = StageReportRow(obj.name, "BG" if "[BG]" in obj.name else "FG")
+            add_object_to_row(row, obj, depsgraph, mipmap_count, image_sizes)
+            rows.append(row)
+
+    total = StageReportRow("Total", "STAGE")
+    for row in rows:
+        for attr in ("triangles", "vertices", "materials", "material_switches", "reflective", "transparent"):
+            setattr(total, attr, getattr(total, attr) + getattr(row, attr))
+
+    # Shared textures only count once for the whole stage
+    total.images = set(image_sizes)
+    total.texture_memory = sum(image_sizes.values())
+
+    return StageReport(rows, total)
+
+# Returns the rows of a report sorted by the given attribute, largest first
+def sort_rows(report, sort_key):
+    if sort_key == "NAME":
+        return sorted(report.rows, key=lambda row: row.name)
+    return sorted(report.rows, key=lambda row: getattr(row, sort_key.lower()), reverse=True)
@@ -1,3 +1,9 @@
 active_draw_handlers = []
 anim_id_list = []
 imported_bg = None
+inspected_gma = None
+inspected_tpl = None
+stage_report = None
+
+# Objects whose UI properties were synced, as object session UID -> values of their custom properties when synced
+ui_props_stamps = {}
@@ -0,0 +1,386 @@
+import hashlib
+import os
+import re
+import struct
+
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+# GX texture format IDs, as stored in the texture headers of Monkey Ball TPL files
+GX_FORMAT_IDS = {
+    "I4": 0x0,
+    "I8": 0x1,
+    "IA4": 0x2,
+    "IA8": 0x3,
+    "RGB565": 0x4,
+    "RGB5A3": 0x5,
+    "RGBA8": 0x6,
+    "CMPR": 0xE,
+}
+
+# Block width, block height and bits per pixel of each GX texture format
+GX_FORMAT_BLOCKS = {
+    "I4": (8, 8, 4),
+    "I8": (8, 4, 8),
+    "IA4": (8, 4, 8),
+    "IA8": (4, 4, 16),
+    "RGB565": (4, 4, 16),
+    "RGB5A3": (4, 4, 16),
+    "RGBA8": (4, 4, 32),
+    "CMPR": (8, 8, 4),
+}
+
+DEFAULT_FORMAT = "CMPR"
+
+TPL_HEADER_ENTRY_SIZE = 0x10
+TPL_ALIGNMENT = 0x20
+TPL_ENTRY_MAGIC = 0x1234
+
+# Encoded texture data, keyed by (pixel hash, width, height, format, mipmap count).
+# Only the textures written by the last TPL export are kept, and the cache is cleared when a file is loaded.
+_encode_cache = {}
+
+# Returns the texture format selected for a material through its [TEX_*] tag
+def get_material_format(mat):
+    match = re.search(r"\[TEX_([^\]]*)\]", mat.name)
+    if match is not None and match.group(1) in GX_FORMAT_IDS:
+        return match.group(1)
+    return DEFAULT_FORMAT
+
+# Returns the first image used by an image texture node of a material, if any
+def get_material_image(mat):
+    if mat is None or not mat.use_nodes:
+        return None
+    for node in mat.node_tree.nodes:
+        if node.type == 'TEX_IMAGE' and node.image is not None:
+            return node.image
+    return None
+
+# Returns the number of bytes a texture occupies in a TPL, including all of its mipmap levels
+def get_encoded_size(width, height, fmt, mipmap_count=0):
+    block_w, block_h, bpp = GX_FORMAT_BLOCKS[fmt]
+    size = 0
+    for level in range(mipmap_count + 1):
+        level_w = max(width >> level, 1)
+        level_h = max(height >> level, 1)
+        padded_w = -(-level_w // block_w) * block_w
+        padded_h = -(-level_h // block_h) * block_h
+        size += padded_w * padded_h * bpp // 8
+    return size
+
+# Reads the pixels of a Blender image as a top-down (height, width, 4) uint8 array.
+# Grayscale and RGB images are expanded to RGBA, with opaque alpha where the image has none.
+def read_image_pixels(image):
+    width, height = image.size
+    channels = image.channels
+    buf = np.empty(width * height * channels, dtype=np.float32)
+    image.pixels.foreach_get(buf)
+    pixels = buf.reshape(height, width, channels)[::-1]
+
+    if channels != 4:
+        rgba = np.ones((height, width, 4), dtype=np.float32)
+        if channels <= 2:
+            rgba[..., :3] = pixels[..., :1]
+        else:
+            rgba[..., :3] = pixels[..., :3]
+        if channels == 2:
+            rgba[..., 3] = pixels[..., 1]
+        pixels = rgba
+
+    return (np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+def _is_number(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+# Returns the textures of an MTL file in the order GxModelViewer numbers them when importing it: every distinct
+# map_Kd path, in the order it first appears. Returns a list of (material name, texture path) tuples,
+# with paths relative to the MTL resolved.
+def read_mtl_textures(mtl_path):
+    textures = []
+    seen = set()
+    material = None
+    mtl_directory = os.path.dirname(mtl_path)
+
+    with open(mtl_path, "r", encoding="utf-8", errors="replace") as mtl_file:
+        for line in mtl_file:
+            parts = line.strip().split(None, 1)
+            if len(parts) < 2:
+                continue
+            if parts[0] == "newmtl":
+                material = parts[1]
+            elif parts[0] == "map_Kd" and material is not None:
+                # Options such as -s 1 1 1 come before the path, which may contain spaces
+                tokens = parts[1].split(" ")
+                while len(tokens) > 1 and tokens[0].startswith("-"):
+                    tokens = tokens[1:]
+                    while len(tokens) > 1 and _is_number(tokens[0]):
+                        tokens = tokens[1:]
+                path = os.path.normpath(os.path.join(mtl_directory, " ".join(tokens)))
+                if path not in seen:
+                    seen.add(path)
+                    textures.append((material, path))
+
+    return textures
+
+# Pads an image to a multiple of the block size by repeating its edge pixels
+def _pad_to_blocks(pixels, block_w, block_h):
+    height, width = pixels.shape[:2]
+    pad_h = -height % block_h
+    pad_w = -width % block_w
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w), (0, 0)), mode='edge')
+    return pixels
+
+# Splits an image into GX tiles, returning a (block count, block_h * block_w, channels) array in TPL block order
+def _to_blocks(pixels, block_w, block_h):
+    pixels = _pad_to_blocks(pixels, block_w, block_h)
+    height, width, channels = pixels.shape
+    blocks = pixels.reshape(height // block_h, block_h, width // block_w, block_w, channels)
+    blocks = blocks.transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(-1, block_h * block_w, channels)
+
+def _intensity(rgba):
+    rgb = rgba[..., :3].astype(np.float32)
+    return (rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114 + 0.5).astype(np.uint8)
+
+def _encode_i4(pixels):
+    i = _intensity(_to_blocks(pixels, 8, 8)) >> 4
+    return ((i[:, 0::2] << 4) | i[:, 1::2]).astype(np.uint8).tobytes()
+
+def _encode_i8(pixels):
+    return _intensity(_to_blocks(pixels, 8, 4)).tobytes()
+
+def _encode_ia4(pixels):
+    blocks = _to_blocks(pixels, 8, 4)
+    i = _intensity(blocks) >> 4
+    a = blocks[..., 3] >> 4
+    return ((a << 4) | i).astype(np.uint8).tobytes()
+
+def _encode_ia8(pixels):
+    blocks = _to_blocks(pixels, 4, 4)
+    out = np.empty(blocks.shape[:2] + (2,), dtype=np.uint8)
+    out[..., 0] = blocks[..., 3]
+    out[..., 1] = _intensity(blocks)
+    return out.tobytes()
+
+def _pack_rgb565(rgb):
+    rgb = rgb.astype(np.uint16)
+    return ((rgb[..., 0] >> 3) << 11) | ((rgb[..., 1] >> 2) << 5) | (rgb[..., 2] >> 3)
+
+def _encode_rgb565(pixels):
+    return _pack_rgb565(_to_blocks(pixels, 4, 4)[..., :3]).astype('>u2').tobytes()
+
+def _encode_rgb5a3(pixels):
+    blocks = _to_blocks(pixels, 4, 4).astype(np.uint16)
+    r, g, b, a = blocks[..., 0], blocks[..., 1], blocks[..., 2], blocks[..., 3]
+    opaque = 0x8000 | ((r >> 3) << 10) | ((g >> 3) << 5) | (b >> 3)
+    translucent = ((a >> 5) << 12) | ((r >> 4) << 8) | ((g >> 4) << 4) | (b >> 4)
+    return np.where(a == 255, opaque, translucent).astype('>u2').tobytes()
+
+def _encode_rgba8(pixels):
+    blocks = _to_blocks(pixels, 4, 4)
+    out = np.empty((blocks.shape[0], 2, 16, 2), dtype=np.uint8)
+    out[:, 0, :, 0] = blocks[..., 3]
+    out[:, 0, :, 1] = blocks[..., 0]
+    out[:, 1, :, 0] = blocks[..., 1]
+    out[:, 1, :, 1] = blocks[..., 2]
+    return out.tobytes()
+
+# Expands packed RGB565 values back to 8-bit RGB, the way the GX decoder does
+def _unpack_rgb565(packed):
+    packed = packed.astype(np.int32)
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.float32)
+
+# Encodes 4x4 colour blocks as DXT1-style sub-blocks, using a principal axis fit per block
+def _encode_dxt1_blocks(blocks):
+    count = blocks.shape[0]
+    rgb = blocks[..., :3].astype(np.float32)
+    transparent = blocks[..., 3] < 128
+    has_alpha = transparent.any(axis=1)
+
+    # Transparent pixels don't contribute to the colour endpoints
+    weights = (~transparent).astype(np.float32)[..., None]
+    weight_sum = np.maximum(weights.sum(axis=1), 1.0)
+    mean = (rgb * weights).sum(axis=1) / weight_sum
+    centered = (rgb - mean[:, None, :]) * weights
+    cov = np.einsum('nki,nkj->nij', centered, centered)
+
+    # A few rounds of power iteration are enough to find the dominant colour axis
+    axis = np.ones((count, 3), dtype=np.float32)
+    for _ in range(4):
+        axis = np.einsum('nij,nj->ni', cov, axis)
+        axis /= np.maximum(np.linalg.norm(axis, axis=1, keepdims=True), 1e-6)
+
+    proj = np.einsum('nki,ni->nk', rgb - mean[:, None, :], axis)
+    proj_min = np.where(transparent, np.inf, proj).min(axis=1)
+    proj_max = np.where(transparent, -np.inf, proj).max(axis=1)
+    fully_transparent = ~np.isfinite(proj_min)
+    proj_min[fully_transparent] = 0.0
+    proj_max[fully_transparent] = 0.0
+
+    end_lo = np.clip(mean + proj_min[:, None] * axis, 0, 255).astype(np.uint8)
+    end_hi = np.clip(mean + proj_max[:, None] * axis, 0, 255).astype(np.uint8)
+    c0 = _pack_rgb565(end_hi)
+    c1 = _pack_rgb565(end_lo)
+
+    # Opaque blocks need c0 > c1 for four-colour mode, blocks with alpha need c0 <= c1
+    swap = np.where(has_alpha, c0 > c1, c0 < c1)
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    p0 = _unpack_rgb565(c0)
+    p1 = _unpack_rgb565(c1)
+    palette = np.empty((count, 4, 3), dtype=np.float32)
+    palette[:, 0] = p0
+    palette[:, 1] = p1
+    palette[:, 2] = np.where(has_alpha[:, None], (p0 + p1) / 2, (2 * p0 + p1) / 3)
+    palette[:, 3] = (p0 + 2 * p1) / 3
+
+    dist = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    dist[:, :, 3] = np.where(has_alpha[:, None], np.inf, dist[:, :, 3])
+    indices = dist.argmin(axis=2).astype(np.uint8)
+    indices[transparent] = 3
+    indices[(c0 == c1) & ~has_alpha] = 0
+
+    # First pixel of each row goes into the most significant bits
+    rows = indices.reshape(count, 4, 4)
+    index_bytes = (rows[..., 0] << 6) | (rows[..., 1] << 4) | (rows[..., 2] << 2) | rows[..., 3]
+
+    out = np.empty((count, 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype('>u2').view(np.uint8).reshape(count, 2)
+    out[:, 2:4] = c1.astype('>u2').view(np.uint8).reshape(count, 2)
+    out[:, 4:8] = index_bytes
+    return out
+
+def _encode_cmpr(pixels):
+    pixels = _pad_to_blocks(pixels, 8, 8)
+    height, width = pixels.shape[:2]
+
+    # 8x8 tiles made of four 4x4 sub-blocks, ordered top-left, top-right, bottom-left, bottom-right
+    blocks = pixels.reshape(height // 8, 2, 4, width // 8, 2, 4, 4)
+    blocks = blocks.transpose(0, 3, 1, 4, 2, 5, 6).reshape(-1, 16, 4)
+    return _encode_dxt1_blocks(blocks).tobytes()
+
+_ENCODERS = {
+    "I4": _encode_i4,
+    "I8": _encode_i8,
+    "IA4": _encode_ia4,
+    "IA8": _encode_ia8,
+    "RGB565": _encode_rgb565,
+    "RGB5A3": _encode_rgb5a3,
+    "RGBA8": _encode_rgba8,
+    "CMPR": _encode_cmpr,
+}
+
+# Halves an image with a 2x2 box filter
+def _downsample(pixels):
+    height, width = pixels.shape[:2]
+    if height > 1 and width > 1:
+        pixels = pixels[:height & ~1, :width & ~1].astype(np.uint16)
+        pixels = (pixels[0::2, 0::2] + pixels[1::2, 0::2] + pixels[0::2, 1::2] + pixels[1::2, 1::2] + 2) >> 2
+    elif height > 1:
+        pixels = pixels[:height & ~1].astype(np.uint16)
+        pixels = (pixels[0::2] + pixels[1::2] + 1) >> 1
+    elif width > 1:
+        pixels = pixels[:, :width & ~1].astype(np.uint16)
+        pixels = (pixels[:, 0::2] + pixels[:, 1::2] + 1) >> 1
+    return pixels.astype(np.uint8)
+
+# Returns the number of mipmap levels that can actually be generated for an image
+def clamp_mipmap_count(width, height, mipmap_count):
+    levels = 0
+    while levels < mipmap_count and (width >> (levels + 1)) >= 1 and (height >> (levels + 1)) >= 1:
+        levels += 1
+    return levels
+
+# Encodes a (height, width, 4) uint8 image and its mipmaps in the given GX format
+def encode_texture(pixels, fmt, mipmap_count=0):
+    encoder = _ENCODERS[fmt]
+    data = []
+    level = pixels
+    for i in range(mipmap_count + 1):
+        if i > 0:
+            level = _downsample(level)
+        data.append(encoder(np.ascontiguousarray(level)))
+    return b"".join(data)
+
+# Returns the cache key of an image in a given format
+def get_cache_key(pixels, fmt, mipmap_count):
+    digest = hashlib.sha1(pixels.tobytes()).hexdigest()
+    return (digest, pixels.shape[1], pixels.shape[0], fmt, mipmap_count)
+
+# Encodes an image, reusing previously encoded data if the pixels haven't changed. Returns the cache key and the data.
+def encode_texture_cached(pixels, fmt, mipmap_count=0):
+    key = get_cache_key(pixels, fmt, mipmap_count)
+    data = _encode_cache.get(key)
+    if data is None:
+        data = encode_texture(pixels, fmt, mipmap_count)
+        _encode_cache[key] = data
+    return key, data
+
+# Drops the encoded data of every texture not in a set of cache keys
+def prune_cache(keys):
+    for key in [key for key in _encode_cache if key not in keys]:
+        del _encode_cache[key]
+
+def clear_cache():
+    _encode_cache.clear()
+
+class TplTexture:
+    def __init__(self, pixels, fmt, mipmap_count=0):
+        self.pixels = pixels
+        self.format = fmt
+        self.width = pixels.shape[1]
+        self.height = pixels.shape[0]
+        self.mipmap_count = clamp_mipmap_count(self.width, self.height, mipmap_count)
+        self.data = None
+
+# Texture that is already encoded, such as one copied from another TPL
+class EncodedTplTexture:
+    def __init__(self, data, fmt, width, height, mipmap_count):
+        self.pixels = None
+        self.format = fmt
+        self.width = width
+        self.height = height
+        self.mipmap_count = mipmap_count
+        self.data = data
+
+# Encodes all textures on a thread pool (NumPy releases the GIL during block encoding),
+# then writes them out as a Monkey Ball TPL. None entries are written as empty texture slots.
+def write_tpl(path, textures, max_workers=None):
+    def encode(tex):
+        key, tex.data = encode_texture_cached(tex.pixels, tex.format, tex.mipmap_count)
+        return key
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        used_keys = set(pool.map(encode, [tex for tex in textures if tex is not None and tex.data is None]))
+
+    # Textures replaced since the last export (such as repainted ones) would otherwise stay cached for the session
+    prune_cache(used_keys)
+
+    header_size = 4 + len(textures) * TPL_HEADER_ENTRY_SIZE
+    offset = header_size + (-header_size % TPL_ALIGNMENT)
+
+    header = [struct.pack(">I", len(textures))]
+    body = [b"\x00" * (offset - header_size)]
+    for tex in textures:
+        if tex is None:
+            header.append(b"\x00" * TPL_HEADER_ENTRY_SIZE)
+            continue
+        header.append(struct.pack(">IIHHHH", GX_FORMAT_IDS[tex.format], offset, tex.width, tex.height,
+                                  tex.mipmap_count + 1, TPL_ENTRY_MAGIC))
+        padding = -len(tex.data) % TPL_ALIGNMENT
+        body.append(tex.data)
+        body.append(b"\x00" * padding)
+        offset += len(tex.data) + padding
+
+    with open(path, "wb") as tpl_file:
+        tpl_file.write(b"".join(header))
+        tpl_file.write(b"".join(body))
@@ -1,3 +1,11 @@
+import time
+
+# Startup timing, reported once the addon is registered
+import_start_time = time.perf_counter()
+
+# Modules are only reloaded when this file is executed again (e.g. with Reload Scripts)
+reloading = "modules" in globals()
+
 import bpy
 import importlib
 import inspect
@@ -6,7 +14,6 @@ import pdb
 import re
 
 from . import developer_utils
-from .BlendToSMBStage2 import stage_editor, statics, menus
 from bpy.app.handlers import persistent
 
 bl_info = {
@@ -21,168 +28,36 @@ bl_info = {
     "tracker_url": "https://b2smb.bombsquad.xyz",
 }
 
+# Modules only used by specific operators, which are imported the first time they're used
+LAZY_MODULES = {
+    "BlendToSMBStage2.background_import",
+    "BlendToSMBStage2.background_merge",
+    "BlendToSMBStage2.dimension_dict",
+    "BlendToSMBStage2.gma_tpl_reader",
+    "BlendToSMBStage2.object_drop",
+    "BlendToSMBStage2.stage_report",
+    "BlendToSMBStage2.tpl_encoder",
+}
+
 # Load and reload submodules
 importlib.reload(developer_utils)
-modules = developer_utils.setup_addon_modules(__path__, __name__, "bpy" in locals())
+modules = developer_utils.setup_addon_modules(__path__, __name__, reloading, LAZY_MODULES)
+
+from .BlendToSMBStage2 import stage_editor, statics, menus, overlay, migrations, tpl_encoder
+
+import_time = time.perf_counter() - import_start_time
 
 @persistent
 def load_handler(dummy):
     print("Loaded file")
 
-    # Update possibly outdated properties 
-    for obj in bpy.data.objects:
-        # Delete old unused animation properties
-        if "posXAnim" in obj.keys():
-            del obj["posXAnim"]
-        if "posYAnim" in obj.keys():
-            del obj["posYAnim"]
-        if "posZAnim" in obj.keys():
-            del obj["posZAnim"]
-        if "rotXAnim" in obj.keys():
-            del obj["rotXAnim"]
-        if "rotYAnim" in obj.keys():
-            del obj["rotYAnim"]
-        if "rotZAnim" in obj.keys():
-            del obj["rotZAnim"]
-
-        # Item Groups
-        if "[IG]" in obj.name:
-            # Properties with changed names
-            # Properties with _ in the beginning of their name were used for a hacky RNA property display thing
-            # This isn't used anymore, so they're removed
-            if "_initPlaying" in obj.keys():
-                obj["initPlaying"] = obj["_initPlaying"]
-                del obj["_initPlaying"]
-            if "_loopAnim" in obj.keys():
-                obj["loopAnim"] = obj["_loopAnim"]
-                del obj["_loopAnim"]
-
-            # "loopTime" was renamed to "animLoopTime" for clarity
-            if "loopTime" in obj.keys():
-                obj["animLoopTime"] = obj["loopTime"]
-                del obj["loopTime"]
-
-            # Cast collision start and step amounts to floats
-            for floatKey in ["collisionStartX", "collisionStartY", "collisionStepX", "collisionStepY"]:
-                if floatKey in obj.keys():
-                    obj[floatKey] = float(obj[floatKey])
-
-            # Casts to float, since certain old properties don't line up correctly
-            if "animLoopTime" in obj.keys():
-                if type(obj["animLoopTime"]) is int:
-                    obj["animLoopTime"] = float(obj["animLoopTime"])
-                    if (obj["animLoopTime"] != -1.0):
-                        obj["animLoopTime"] = obj["animLoopTime"]/bpy.context.scene.render.fps
-
-            # New properties
-            if "seesawSensitivity" not in obj.keys():
-                obj["seesawSensitivity"] = 0.0
-            if "seesawFriction" not in obj.keys():
-                obj["seesawFriction"] = 0.0
-            if "seesawSpring" not in obj.keys():
-                obj["seesawSpring"] = 0.0
-            if "texScrollUSpeed" not in obj.keys():
-                obj["texScrollUSpeed"] = 0.0
-            if "texScrollVSpeed" not in obj.keys():
-                obj["texScrollVSpeed"] = 0.0
-            if "exportTimestep" not in obj.keys():
-                obj["exportTimestep"] = -1
-            if "conveyorX" not in obj.keys():
-                obj["conveyorX"] = 0.0
-            if "conveyorY" not in obj.keys():
-                obj["conveyorY"] = 0.0
-            if "conveyorZ" not in obj.keys():
-                obj["conveyorZ"] = 0.0
-            if "collisionTriangleFlag" not in obj.keys():
-                obj["collisionTriangleFlag"] = 0
-
-        # Goals
-        if obj.name.startswith("[GOAL_"):
-            if "_cast_shadow" in obj.keys():
-                obj["cast_shadow"] = obj["_cast_shadow"]
-                del obj["_cast_shadow"]
-            if "cast_shadow" not in obj.keys():
-                obj["cast_shadow"] = True
-
-        # Wormholes
-        if obj.name.startswith("[WH]"):
-            if "id" in obj.keys():
-                obj["whId"] = obj["id"]
-                del obj["id"]
-            if "_id" in obj.keys():
-                obj["whId"] = obj["_id"]
-                del obj["_id"]
-            if "_linkedId" in obj.keys(): 
-                obj["linkedId"] = obj["_linkedId"]
-                del obj["_linkedId"]
-            if "_linkedObject" in obj.keys():
-                obj["linkedObject"] = obj["_linkedObject"]
-                del obj["_linkedObject"]
-            if "linkedObject" not in obj.keys():
-                obj["linkedObject"] = None
-
-        # Switches
-        if obj.name.startswith("[SW_"):
-            if "_animId" in obj.keys():
-                obj["linkedId"] = obj["_animId"]
-                del obj["_animId"]
-            if "animId" in obj.keys():
-                obj["linkedId"] = obj["animId"]
-                del obj["animId"]
-            if "_linkedObject" in obj.keys():
-                obj["linkedObject"] = obj["_linkedObject"]
-                del obj["_linkedObject"]
-            if "linkedObject" not in obj.keys():
-                obj["linkedObject"] = None
-
-        # BG objects
-        if obj.name.startswith("[BG]"):
-            if "animLoopTime" not in obj.keys():
-                obj["animLoopTime"] = -1.0
-            if "meshType" not in obj.keys():
-                obj["meshType"] = 0x1f
-            if "texScrollUSpeed" not in obj.keys():
-                obj["texScrollUSpeed"] = 0.0
-            if "texScrollVSpeed" not in obj.keys():
-                obj["texScrollVSpeed"] = 0.0
-        
-    for mat in bpy.data.materials:
-        # Enable backface culling for all materials
-        if hasattr(mat, 'use_backface_culling'):
-            mat.use_backface_culling = True
-
-        if (mat.use_nodes):
-            nodes = mat.node_tree.nodes
-            links = mat.node_tree.links
-
-            material_output_node = None
-            image_texture_node = None
-            diffuse_node = None
-
-            for node in nodes:
-                if (node.type == 'BSDF_PRINCIPLED'):
-                    continue
-                elif (node.type =='OUTPUT_MATERIAL'):
-                    material_output_node = node
-                elif (node.type == 'TEX_IMAGE'):
-                    image_texture_node = node
-                elif (node.type =='BSDF_DIFFUSE'):
-                    diffuse_node = node
-                #else:
-                    #print("Removing extraneous node" + str(node))
-                    #nodes.remove(node)
-
-            # Convert Diffuse BSDF nodes to Principled BSDF
-            if diffuse_node is not None:
-                print("Converting material " + mat.name + " diffuse BSDF node to principled BSDF...")
-                nodes.remove(diffuse_node)
-                principled_node = nodes.new("ShaderNodeBsdfPrincipled")
-                links.new(material_output_node.inputs['Surface'], principled_node.outputs['BSDF'])
-                links.new(principled_node.inputs['Base Color'], image_texture_node.outputs['Color'])
-                principled_node.inputs['Specular'].default_value = 0.0
-
-    # Sync all UI properties
-    stage_editor.autoUpdateUIProps()
+    # Update possibly outdated properties, only running migration steps newer than the file's schema version
+    # UI properties are synced lazily, see stage_editor.syncUIProps
+    migrations.migrate_file()
+
+    # Textures encoded for the previous file won't be exported again
+    if developer_utils.is_loaded(tpl_encoder):
+        tpl_encoder.clear_cache()
 
 # Function for handling material preset updates
 def update_preset(self, context, prop, flag):
@@ -198,9 +73,11 @@ def update_preset(self, context, prop, flag):
 
 # Register
 def register():
+    register_start_time = time.perf_counter()
+
     try:
         for m in modules:
-            for name,cls in inspect.getmembers(m, inspect.isclass):
+            for name,cls in developer_utils.get_module_classes(m):
                 if hasattr(cls, "bl_rna"):
                     bpy.utils.register_class(cls)
                     print("Registered: " + name)
@@ -252,6 +129,24 @@ def register():
             subtype='FILE_PATH',
             default="//model.tpl"
     )
+    bpy.types.Scene.export_native_tpl_path = bpy.props.StringProperty(
+            name="Native TPL Export Path",
+            description="The path to export the natively encoded TPL to",
+            subtype='FILE_PATH',
+            default="//model.native.tpl"
+    )
+    bpy.types.Scene.export_use_native_tpl = bpy.props.BoolProperty(
+            name="Encode TPL Natively",
+            description="Have Export GMA/TPL write the TPL with the native encoder instead of GxModelViewer, so unchanged textures aren't re-encoded. Textures follow the order of the exported MTL",
+            default=False
+    )
+    bpy.types.Scene.native_tpl_mipmaps = bpy.props.IntProperty(
+            name="TPL Mipmap Levels",
+            description="Number of mipmap levels to generate for each texture in the native TPL",
+            default=0,
+            min=0,
+            max=10
+    )
     bpy.types.Scene.export_raw_stagedef_path = bpy.props.StringProperty(
             name="LZ.RAW Export Path",
             description="The path to export the raw stagedef to",
@@ -292,27 +187,58 @@ def register():
             name="Fallout Plane",
             description="Height of the fallout plane",
             default=-10,
+            update=overlay.update_overlay_setting,
     )
     bpy.types.Scene.draw_falloutProp = bpy.props.BoolProperty(
             name="Draw Fallout Plane",
             description="Whether or not to draw a visual representation of the fallout plane",
             default=True,
+            update=overlay.update_overlay_setting,
     )
     bpy.types.Scene.draw_stage_objects = bpy.props.BoolProperty(
             name="Draw Stage Objects",
             description="Whether or not to draw a visual representation of stage objects",
             default=True,
+            update=overlay.update_overlay_setting,
     )
     bpy.types.Scene.draw_collision_grid = bpy.props.BoolProperty(
             name="Draw Collision Grids",
             description="Whether or not to draw a visual representation of collision grids",
             default=True,
+            update=overlay.update_overlay_setting,
     )
 
     bpy.types.Scene.draw_only_active_collision_grid = bpy.props.BoolProperty(
             name="Draw Only Active Collision Grids",
             description="Whether or not to only draw a visual representation of the active, selected collision grid",
             default=True,
+            update=overlay.update_overlay_setting,
+    )
+    bpy.types.Scene.draw_collision_heatmap = bpy.props.BoolProperty(
+            name="Draw Collision Heatmaps",
+            description="Color each cell of drawn collision grids by the number of collision triangles it contains, and highlight collision triangles outside of the grid",
+            default=False,
+            update=overlay.update_overlay_setting,
+    )
+    bpy.types.Scene.overlay_lod_bias = bpy.props.FloatProperty(
+            name="Overlay Detail",
+            description="Multiplier for the on-screen size at which stage object overlays switch to simpler shapes. Higher values keep full detail further away",
+            default=1.0,
+            min=0.1,
+            soft_max=4.0,
+            update=overlay.update_overlay_setting,
+    )
+    bpy.types.Scene.overlay_use_instancing = bpy.props.BoolProperty(
+            name="Instanced Overlays",
+            description="Draw repeated stage objects such as bananas and bumpers with GPU instancing. Falls back to regular drawing if the GPU backend doesn't support it",
+            default=True,
+            update=overlay.update_overlay_setting,
+    )
+    bpy.types.Scene.overlay_show_stats = bpy.props.BoolProperty(
+            name="Show Overlay Statistics",
+            description="Show the time, object count, draw calls and vertices of the stage object overlays in the corner of the viewport",
+            default=False,
+            update=overlay.update_overlay_setting,
     )
 
     bpy.types.Scene.auto_path_names = bpy.props.BoolProperty(
@@ -335,6 +261,35 @@ def register():
             default='MAIN_GAME'
     )
 
+    bpy.types.Scene.stage_report_sort = bpy.props.EnumProperty(
+            name="Sort By",
+            description="Order of the models and item groups in the stage report",
+            items=[('TRIANGLES', 'Triangles', ''),
+                   ('VERTICES', 'Vertices', ''),
+                   ('MATERIAL_SWITCHES', 'Material Switches', ''),
+                   ('TEXTURE_MEMORY', 'Texture Memory', ''),
+                   ('NAME', 'Name', '')],
+            default='TRIANGLES'
+    )
+    bpy.types.Scene.stage_report_triangle_budget = bpy.props.IntProperty(
+            name="Triangle Budget",
+            description="Triangle count above which a model or item group is highlighted in the stage report",
+            default=10000,
+            min=1
+    )
+    bpy.types.Scene.stage_report_switch_budget = bpy.props.IntProperty(
+            name="Material Switch Budget",
+            description="Material switch count above which a model or item group is highlighted in the stage report",
+            default=16,
+            min=1
+    )
+    bpy.types.Scene.stage_report_texture_budget = bpy.props.IntProperty(
+            name="Texture Budget (KiB)",
+            description="Total texture memory above which the stage report is highlighted",
+            default=8192,
+            min=1
+    )
+
     bpy.types.Scene.fog_type = bpy.props.EnumProperty(
             name="Fog Type",
             description="Type of fog for the stage",
@@ -376,6 +331,28 @@ def register():
             name="Use Cube Empty Approximations",
             default=False
     )
+    bpy.types.Scene.background_import_effects = bpy.props.BoolProperty(
+            name="Import Effect Previews",
+            description="Whether to create empties for effect keyframes when importing background previews. If disabled, they can be imported later for selected objects",
+            default=True
+    )
+    bpy.types.Scene.background_dimension_table_path = bpy.props.StringProperty(
+            name="BG Dimension Table",
+            description="Optional .JSON file of background object name -> [x, y, z] dimensions, adding to or overriding the vanilla dimensions used for cube previews",
+            subtype='FILE_PATH',
+            default=""
+    )
+    bpy.types.Scene.background_dimension_gma_directory = bpy.props.StringProperty(
+            name="BG GMA Directory",
+            description="A directory of extracted vanilla or custom .GMA files to measure background object dimensions from",
+            subtype='DIR_PATH',
+            default=""
+    )
+    bpy.types.Scene.background_import_point_cloud = bpy.props.BoolProperty(
+            name="Use Instanced Point Cloud",
+            description="Import background previews as a single mesh with one point per model, drawn as instances. Selected points can be turned into empties for editing",
+            default=False
+    )
 
     # Special properties for Monkey Ball objects (also for fancy UI property display)
     bpy.types.Object.item_group_properties = bpy.props.PointerProperty(
@@ -398,15 +375,22 @@ def register():
     bpy.types.Material.mesh_preset = bpy.props.StringProperty(name="Mesh Preset",
                                         update=lambda s,c: update_preset(s, c, "mesh_preset", "MESH"))
     menus.handle_register()
+    overlay.handle_register()
+    stage_editor.handle_register()
 
     bpy.app.handlers.load_post.append(load_handler)
     print("Successfully registered {} with {} modules".format(bl_info["name"], len(modules)))
     for module in modules:
         print("-", module.__name__)
+    print("Imported in {:.1f} ms, registered in {:.1f} ms ({} modules deferred until first use)".format(import_time * 1000,
+                                                                                                          (time.perf_counter() - register_start_time) * 1000,
+                                                                                                          len(LAZY_MODULES)))
 
 # Unregister
 def unregister():
     menus.handle_unregister()
+    overlay.handle_unregister()
+    stage_editor.handle_unregister()
 
     del bpy.types.Scene.export_timestep
     del bpy.types.Scene.export_value_round
@@ -415,6 +399,9 @@ def unregister():
     del bpy.types.Scene.export_model_path
     del bpy.types.Scene.export_gma_path
     del bpy.types.Scene.export_tpl_path
+    del bpy.types.Scene.export_native_tpl_path
+    del bpy.types.Scene.export_use_native_tpl
+    del bpy.types.Scene.native_tpl_mipmaps
     del bpy.types.Scene.export_raw_stagedef_path
     del bpy.types.Scene.export_stagedef_path
     del bpy.types.Scene.export_background_path
@@ -424,6 +411,10 @@ def unregister():
     del bpy.types.Scene.draw_falloutProp
     del bpy.types.Scene.draw_stage_objects
     del bpy.types.Scene.draw_collision_grid
+    del bpy.types.Scene.draw_collision_heatmap
+    del bpy.types.Scene.overlay_lod_bias
+    del bpy.types.Scene.overlay_use_instancing
+    del bpy.types.Scene.overlay_show_stats
     del bpy.types.Scene.auto_path_names
     del bpy.types.Scene.optimize_keyframes
     del bpy.types.Scene.falloutProp
@@ -433,6 +424,10 @@ def unregister():
     del bpy.types.Scene.background_import_path
     del bpy.types.Scene.background_import_preview
     del bpy.types.Scene.background_import_use_cubes
+    del bpy.types.Scene.background_import_effects
+    del bpy.types.Scene.background_import_point_cloud
+    del bpy.types.Scene.background_dimension_table_path
+    del bpy.types.Scene.background_dimension_gma_directory
 
     del bpy.types.Object.stage_model_properties 
     del bpy.types.Object.goal_properties 
@@ -440,6 +435,10 @@ def unregister():
     del bpy.types.Object.wormhole_properties 
     del bpy.types.Object.switch_properties 
     del bpy.types.Scene.fog_type
+    del bpy.types.Scene.stage_report_sort
+    del bpy.types.Scene.stage_report_triangle_budget
+    del bpy.types.Scene.stage_report_switch_budget
+    del bpy.types.Scene.stage_report_texture_budget
     del bpy.types.Scene.fog_start_distance
     del bpy.types.Scene.fog_end_distance
     del bpy.types.Scene.fog_color
@@ -448,12 +447,8 @@ def unregister():
     del bpy.types.Material.mesh_preset
 
     try:
-        # Remove draw handlers
-        for handler in statics.active_draw_handlers:
-            bpy.types.SpaceView3D.draw_handler_remove(handler, 'WINDOW')
-
         for m in modules:
-            for name,cls in inspect.getmembers(m, inspect.isclass):
+            for name,cls in developer_utils.get_module_classes(m):
                 if hasattr(cls, "bl_rna"):
                     bpy.utils.unregister_class(cls)
                     print("Unregistered: " + name)
@@ -1,14 +1,75 @@
 import os
+import sys
+import types
 import pkgutil
 import importlib
+import importlib.util
 
 
-def setup_addon_modules(path, package_name, reload):
+def lazy_import(full_name):
+    """
+    Imports a module lazily. The module is added to sys.modules and its
+    parent package right away, but its code only runs the first time one of
+    its attributes is accessed.
+
+    full_name -- absolute name of the module. Top level packages can be
+    imported lazily too, as long as the module using them refers to the
+    returned module instead of importing it again with an import statement,
+    which would load it.
+    """
+
+    if full_name in sys.modules:
+        return sys.modules[full_name]
+
+    spec = importlib.util.find_spec(full_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[full_name] = module
+    loader.exec_module(module)
+
+    parent_name, _, child_name = full_name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child_name, module)
+    return module
+
+
+def is_loaded(module):
+    """
+    Returns whether a module's code has run. Lazily imported modules are
+    loaded once one of their attributes is accessed, which this doesn't do.
+    """
+
+    # LazyLoader turns the module back into a plain module when loading it
+    return type(module) is types.ModuleType
+
+
+def get_module_classes(module):
+    """
+    Returns the (name, class) pairs defined or imported in a module, sorted by
+    name. Unlike inspect.getmembers, this doesn't trigger loading lazily
+    imported modules that the module refers to.
+    """
+
+    classes = []
+    for name, value in vars(module).items():
+        # Checking whether a lazy module is a class would load it
+        if isinstance(value, types.ModuleType):
+            continue
+        if isinstance(value, type):
+            classes.append((name, value))
+    return sorted(classes, key=lambda item: item[0])
+
+
+def setup_addon_modules(path, package_name, reload, lazy_modules=()):
     """
     Imports and reloads all modules in this addon.
 
     path -- __path__ from __init__.py
     package_name -- __name__ from __init__.py
+    lazy_modules -- names of modules (relative to the addon) that are only
+    imported on first use. They must not contain classes to register, and
+    are not returned.
 
     Individual modules can define a __reload_order_index__ property which
     will be used to reload the modules in a specific order. The default is 0.
@@ -38,7 +99,15 @@ def setup_addon_modules(path, package_name, reload):
             importlib.reload(module)
 
     names = get_submodule_names()
-    modules = import_submodules(names)
+
+    # Lazy modules are set up first, so eager modules importing them don't load them
+    for name in names:
+        if name in lazy_modules:
+            if reload:
+                sys.modules.pop(package_name + "." + name, None)
+            lazy_import(package_name + "." + name)
+
+    modules = import_submodules([name for name in names if name not in lazy_modules])
     if reload:
         reload_modules(modules)
     return modules